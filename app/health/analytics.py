@@ -0,0 +1,116 @@
+"""Time-bucketed totals over a date range.
+
+Buckets are computed in the database with one grouped query: over the
+DailySummary rollups by default, or over the raw Activity and
+NutritionEntry tables (one grouped query each) when ``source='raw'``.
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+
+from .models import Activity, DailySummary, NutritionEntry
+
+PERIODS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+SOURCES = ['rollup', 'raw']
+
+METRICS = [
+    'calories_burned', 'duration', 'distance', 'activity_count',
+    'calories_consumed', 'protein', 'carbs', 'fat', 'nutrition_count',
+]
+# Metric -> aggregate over the raw tables
+RAW_ACTIVITY_METRICS = {
+    'calories_burned': Sum('calories_burned'),
+    'duration': Sum('duration'),
+    'distance': Sum('distance'),
+    'activity_count': Count('id'),
+}
+RAW_NUTRITION_METRICS = {
+    'calories_consumed': Sum('calories'),
+    'protein': Sum('protein'),
+    'carbs': Sum('carbs'),
+    'fat': Sum('fat'),
+    'nutrition_count': Count('id'),
+}
+
+
+def bucket_start(date, period):
+    if period == 'week':
+        return date - timedelta(days=date.weekday())
+    if period == 'month':
+        return date.replace(day=1)
+    return date
+
+
+def bucket_starts(start, end, period):
+    """Every bucket start from the bucket containing ``start`` to ``end``"""
+    current = bucket_start(start, period)
+    while current <= end:
+        yield current
+        if period == 'day':
+            current += timedelta(days=1)
+        elif period == 'week':
+            current += timedelta(days=7)
+        else:
+            current = (current + timedelta(days=32)).replace(day=1)
+
+
+def _grouped(queryset, period, aggregates):
+    return queryset.annotate(
+        bucket=PERIODS[period]('date')
+    ).order_by().values('bucket').annotate(**{
+        f'total_{metric}': aggregate
+        for metric, aggregate in aggregates.items()
+    })
+
+
+def _from_rollups(user, start, end, period):
+    return _grouped(
+        DailySummary.objects.filter(user=user, date__range=(start, end)),
+        period,
+        {metric: Sum(metric) for metric in METRICS}
+    )
+
+
+def _from_raw(user, start, end, period):
+    rows = list(_grouped(
+        Activity.objects.filter(user=user, date__range=(start, end)),
+        period,
+        RAW_ACTIVITY_METRICS
+    ))
+    rows.extend(_grouped(
+        NutritionEntry.objects.filter(user=user, date__range=(start, end)),
+        period,
+        RAW_NUTRITION_METRICS
+    ))
+    return rows
+
+
+def bucket_totals(user, start, end, period='day', source='rollup'):
+    """Return a list of per-bucket totals for ``user`` between two dates.
+
+    Every bucket in the range is present, with zeros where the user logged
+    nothing, so charts can plot the result directly.
+    """
+    if source == 'raw':
+        rows = _from_raw(user, start, end, period)
+    else:
+        rows = _from_rollups(user, start, end, period)
+
+    buckets = {
+        day: dict.fromkeys(METRICS, 0)
+        for day in bucket_starts(start, end, period)
+    }
+    for row in rows:
+        bucket = buckets[row['bucket']]
+        for metric in METRICS:
+            value = row.get(f'total_{metric}')
+            if value is not None:
+                bucket[metric] = value
+    return [
+        {'start': day, **totals} for day, totals in buckets.items()
+    ]
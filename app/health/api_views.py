@@ -1,40 +1,299 @@
-from rest_framework import viewsets
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
-from django.db.models import Sum
-from django.utils import timezone
 from datetime import timedelta
-from .models import Activity, NutritionEntry, UserGoal
+
+from rest_framework import mixins, serializers, status, viewsets
+from rest_framework.decorators import (
+    action, api_view, authentication_classes, permission_classes,
+)
+from rest_framework.exceptions import NotFound
+from rest_framework.generics import get_object_or_404
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.response import Response
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
+from . import analytics, caching, exports, ingest, jobs, routers, tasks
+from .authentication import issue_token
+from .filters import EntryFilterBackend
+from .models import (
+    Activity, ApiToken, Job, NutritionEntry, UserGoal, UserProfile,
+)
+from .pagination import KeysetPagination
+from .parsers import NDJSONParser
 from .serializers import (
+    IDEMPOTENCY_KEY_PREFIX,
     ActivitySerializer,
+    ActivityFilterSerializer,
+    AnalyticsQuerySerializer,
+    ApiTokenSerializer,
+    ExportQuerySerializer,
+    JobSerializer,
     NutritionEntrySerializer,
-    UserGoalSerializer
+    NutritionFilterSerializer,
+    TokenLoginSerializer,
+    UserGoalSerializer,
+    UserProfileSerializer,
+    ValuesSerializer,
+    requested_fields,
 )
+from .services import DashboardService
+from .timezones import local_today
+
+
+class IdempotentCreateMixin:
+    """Turn creates that carry a client key into upserts.
+
+    The key is the item's ``external_id`` or, failing that, the
+    ``Idempotency-Key`` request header, stored as ``external_id`` with the
+    reserved ``ik:`` prefix.  A retried request then updates the row it
+    created the first time instead of adding a duplicate.
+    """
+    idempotency_header = 'Idempotency-Key'
+
+    def get_idempotency_key(self):
+        key = self.request.headers.get(self.idempotency_header)
+        if not key:
+            return None
+        if len(key) > 90:
+            raise serializers.ValidationError({
+                self.idempotency_header: [
+                    'Ensure this value has at most 90 characters.'
+                ]
+            })
+        return IDEMPOTENCY_KEY_PREFIX + key
+
+    def perform_create(self, serializer):
+        data = serializer.validated_data
+        external_id = data.get('external_id') or self.get_idempotency_key()
+        if not external_id:
+            serializer.save(user=self.request.user)
+            return
+        model = serializer.Meta.model
+        instance = model(
+            **{**data, 'external_id': external_id, 'user': self.request.user}
+        )
+        ingest.upsert(model, [instance])
+        serializer.instance = instance
+
+
+class BulkCreateMixin(IdempotentCreateMixin):
+    """Adds a ``bulk/`` route that creates many items in one request.
+
+    Accepts a JSON array or an NDJSON stream; bodies over
+    ``HEALTH_BULK_MAX_BYTES`` are refused before they are read.  Items are
+    validated with the viewset's serializer in ``many=True`` mode and
+    written together; if any item is invalid nothing is written and the
+    per-item errors are returned.
+    Items with an ``external_id`` are upserted, and with an
+    ``Idempotency-Key`` header the remaining items are keyed by their
+    position in the batch so the whole request can be retried safely.
+    """
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='bulk',
+        parser_classes=[JSONParser, NDJSONParser]
+    )
+    def bulk(self, request):
+        # Checked before request.data is touched, which parses the body
+        max_bytes = settings.HEALTH_BULK_MAX_BYTES
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            length = 0
+        if length > max_bytes:
+            return Response(
+                {'detail': f'At most {max_bytes} bytes per request.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': 'Expected a list of items.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_items = settings.HEALTH_BULK_MAX_ITEMS
+        if len(request.data) > max_items:
+            return Response(
+                {'detail': f'At most {max_items} items per request.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        key = self.get_idempotency_key()
+        serializer = self.get_serializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(
+                {
+                    'errors': [
+                        {'index': index, 'errors': errors}
+                        for index, errors in enumerate(serializer.errors)
+                        if errors
+                    ]
+                },
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if key:
+            for index, item in enumerate(serializer.validated_data):
+                if not item.get('external_id'):
+                    item['external_id'] = f'{key}:{index}'
+        instances = serializer.save(user=request.user)
+        return Response(
+            {
+                'created': len(instances),
+                'ids': [instance.pk for instance in instances],
+            },
+            status=status.HTTP_201_CREATED
+        )
+
 
+class ValuesReadMixin:
+    """Serve list and retrieve from ``.values()`` rows.
 
-class ActivityViewSet(viewsets.ModelViewSet):
+    Rows are rendered with :class:`ValuesSerializer`, which matches the
+    viewset's serializer output at a fraction of the cost.  A sparse
+    fieldset such as ``?fields=id,date,calories`` narrows both the
+    response and the selected columns.  Writes use the full serializer.
+    """
+    fields_query_param = 'fields'
+
+    def get_values_serializer(self):
+        serializer_class = self.get_serializer_class()
+        fields = requested_fields(
+            serializer_class,
+            self.request.query_params.get(self.fields_query_param)
+        )
+        return ValuesSerializer(serializer_class, fields)
+
+    def get_values_queryset(self, values_serializer):
+        # date and id are always selected for the keyset cursors
+        columns = dict.fromkeys([*values_serializer.columns, 'date', 'id'])
+        return self.filter_queryset(self.get_queryset()).values(*columns)
+
+    def list(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        page = self.paginate_queryset(self.get_values_queryset(serializer))
+        return self.get_paginated_response(serializer.many(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        serializer = self.get_values_serializer()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(
+            self.get_values_queryset(serializer),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return Response(serializer.to_representation(row))
+
+
+class ActivityViewSet(
+    routers.ReplicaReadMixin, ValuesReadMixin, BulkCreateMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = ActivitySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [EntryFilterBackend]
+    filter_serializer_class = ActivityFilterSerializer
     queryset = Activity.objects.all()
 
     def get_queryset(self):
         return Activity.objects.filter(user=self.request.user)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-
 
-class NutritionEntryViewSet(viewsets.ModelViewSet):
+class NutritionEntryViewSet(
+    routers.ReplicaReadMixin, ValuesReadMixin, BulkCreateMixin,
+    viewsets.ModelViewSet
+):
     serializer_class = NutritionEntrySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    filter_backends = [EntryFilterBackend]
+    filter_serializer_class = NutritionFilterSerializer
     queryset = NutritionEntry.objects.all()
 
     def get_queryset(self):
         return NutritionEntry.objects.filter(user=self.request.user)
 
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
+
+class JobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Status of the current user's background jobs, newest first"""
+    serializer_class = JobSerializer
+    permission_classes = [IsAuthenticated]
+    queryset = Job.objects.all()
+
+    def get_queryset(self):
+        return Job.objects.filter(user=self.request.user).order_by(
+            '-created_at', '-id'
+        )
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """The file written by a finished export job"""
+        job = self.get_object()
+        finished_export = (
+            job.task == tasks.export_data.task_name
+            and job.status == Job.SUCCEEDED
+        )
+        if not finished_export:
+            raise NotFound('No file for this job.')
+        if 'file' not in job.result:
+            raise NotFound('This export has expired.')
+        try:
+            export_file = tasks.export_storage().open(job.result['file'])
+        except FileNotFoundError:
+            raise NotFound('This export has expired.')
+        file_format = job.payload['file_format']
+        return FileResponse(
+            export_file,
+            as_attachment=True,
+            filename=f"{job.payload['kind']}.{file_format}",
+            content_type=exports.CONTENT_TYPES[file_format]
+        )
+
+
+def _issue_token(user, serializer):
+    """Issue a token from validated ApiToken data; the response shows it"""
+    days = serializer.validated_data.get('expires_in_days')
+    token, key = issue_token(
+        user,
+        name=serializer.validated_data.get('name', ''),
+        expires_in=timedelta(days=days) if days else None,
+    )
+    return Response(
+        {**ApiTokenSerializer(token).data, 'token': key},
+        status=status.HTTP_201_CREATED
+    )
+
+
+class ApiTokenViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
+                      mixins.DestroyModelMixin, viewsets.GenericViewSet):
+    """The current user's API tokens; deleting one revokes it"""
+    serializer_class = ApiTokenSerializer
+    permission_classes = [IsAuthenticated]
+    queryset = ApiToken.objects.all()
+    pagination_class = None
+
+    def get_queryset(self):
+        return ApiToken.objects.filter(user=self.request.user).order_by(
+            '-created_at', '-id'
+        )
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return _issue_token(request.user, serializer)
+
+
+@api_view(['POST'])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def obtain_api_token(request):
+    """Exchange a username and password for a new API token"""
+    serializer = TokenLoginSerializer(
+        data=request.data, context={'request': request}
+    )
+    serializer.is_valid(raise_exception=True)
+    return _issue_token(serializer.validated_data['user'], serializer)
 
 
 class UserGoalViewSet(viewsets.ModelViewSet):
@@ -51,73 +310,146 @@ class UserGoalViewSet(viewsets.ModelViewSet):
         serializer.save(user=self.request.user)
 
 
+@api_view(['GET', 'PUT', 'PATCH'])
+@permission_classes([IsAuthenticated])
+def user_profile(request):
+    """Get or update the current user's preferences (``time_zone``)"""
+    profile = UserProfile.objects.filter(user=request.user).first() or (
+        UserProfile(user=request.user)
+    )
+    if request.method == 'GET':
+        return Response(UserProfileSerializer(profile).data)
+    serializer = UserProfileSerializer(
+        profile, data=request.data, partial=request.method == 'PATCH'
+    )
+    serializer.is_valid(raise_exception=True)
+    serializer.save()
+    return Response(serializer.data)
+
+
+def _etag_matches(request, etag):
+    header = request.headers.get('If-None-Match')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return '*' in etags or etag in [
+        tag.removeprefix('W/') for tag in etags
+    ]
+
+
+@routers.replica_reads
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_stats(request):
-    """Get dashboard statistics for the current user"""
-    today = timezone.now().date()
+    """Get dashboard statistics for the current user
+
+    The payload is cached per user and its ETag is derived from the
+    user's data version, so a client that sends the ETag back in
+    If-None-Match gets a 304 without the statistics being recomputed
+    until one of its activities, nutrition entries or goals changes.
+    """
+    today = local_today(request.user.pk)
+    version = caching.data_version(request.user.pk)
+    etag = caching.dashboard_etag(request.user.pk, version, today)
+
+    if _etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        cache = caching.get_cache()
+        key = caching.dashboard_key(request.user.pk, version, today)
+        payload = cache.get(key)
+        if payload is None:
+            payload = DashboardService(request.user, today).payload()
+            cache.set(
+                key, payload, settings.HEALTH_DASHBOARD_CACHE_TIMEOUT
+            )
+        response = Response(payload)
+
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@routers.replica_reads
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def analytics_buckets(request, period):
+    """Per-day, per-week or per-month totals over a date range
 
-    # Today's totals
-    today_activities = Activity.objects.filter(
-        user=request.user, date=today
+    Query parameters: ``start`` and ``end`` (ISO dates, default: a recent
+    window ending today) and ``source`` (``rollup`` or ``raw``).
+    """
+    if period not in analytics.PERIODS:
+        raise NotFound(
+            f"Unknown period; use one of {', '.join(analytics.PERIODS)}."
+        )
+    query = AnalyticsQuerySerializer(
+        data=request.query_params,
+        context={'period': period, 'today': local_today(request.user.pk)}
     )
-    today_calories_burned = today_activities.aggregate(
-        Sum('calories_burned')
-    )['calories_burned__sum'] or 0
-    today_duration = today_activities.aggregate(
-        Sum('duration')
-    )['duration__sum'] or 0
-
-    today_nutrition = NutritionEntry.objects.filter(
-        user=request.user, date=today
+    query.is_valid(raise_exception=True)
+    start, end, source = (
+        query.validated_data['start'],
+        query.validated_data['end'],
+        query.validated_data['source'],
     )
-    today_calories_consumed = today_nutrition.aggregate(
-        Sum('calories')
-    )['calories__sum'] or 0
-    today_protein = today_nutrition.aggregate(
-        Sum('protein')
-    )['protein__sum'] or 0
-    today_carbs = today_nutrition.aggregate(
-        Sum('carbs')
-    )['carbs__sum'] or 0
-    today_fat = today_nutrition.aggregate(
-        Sum('fat')
-    )['fat__sum'] or 0
-
-    # Recent activities (last 7 days)
-    week_ago = today - timedelta(days=7)
-    recent_activities = Activity.objects.filter(
-        user=request.user,
-        date__gte=week_ago
-    ).order_by('-date')[:5]
-
-    # Recent nutrition (last 7 days)
-    recent_nutrition = NutritionEntry.objects.filter(
-        user=request.user,
-        date__gte=week_ago
-    ).order_by('-date')[:5]
-
-    # User goal
-    try:
-        user_goal = UserGoal.objects.get(user=request.user)
-        goal_data = UserGoalSerializer(user_goal).data
-    except UserGoal.DoesNotExist:
-        goal_data = None
+
+    version = caching.data_version(request.user.pk)
+    key = (
+        f'health:analytics:{request.user.pk}:{version}:'
+        f'{period}:{start}:{end}:{source}'
+    )
+    cache = caching.get_cache()
+    buckets = cache.get(key)
+    if buckets is None:
+        buckets = analytics.bucket_totals(
+            request.user, start, end, period, source
+        )
+        cache.set(key, buckets, settings.HEALTH_DASHBOARD_CACHE_TIMEOUT)
 
     return Response({
-        'today_stats': {
-            'calories_burned': today_calories_burned,
-            'duration': today_duration,
-            'calories_consumed': today_calories_consumed,
-            'protein': today_protein,
-            'carbs': today_carbs,
-            'fat': today_fat,
-        },
-        'recent_activities': ActivitySerializer(
-            recent_activities, many=True
-        ).data,
-        'recent_nutrition': NutritionEntrySerializer(
-            recent_nutrition, many=True
-        ).data,
-        'user_goal': goal_data,
+        'period': period,
+        'start': start,
+        'end': end,
+        'source': source,
+        'buckets': buckets,
     })
+
+
+@routers.replica_reads
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def export_data(request, kind, file_format):
+    """Stream the user's activities, nutrition entries or goals
+
+    ``start`` and ``end`` query parameters limit dated rows to a range.
+    A POST queues the export as a background job instead and returns it;
+    the file is then downloaded from ``/api/jobs/<id>/download/``.
+    """
+    query = ExportQuerySerializer(data=request.query_params)
+    query.is_valid(raise_exception=True)
+    if request.method == 'POST':
+        job = jobs.enqueue('export_data', request.user, {
+            'kind': kind,
+            'file_format': file_format,
+            'start': request.query_params.get('start'),
+            'end': request.query_params.get('end'),
+        })
+        return Response(
+            JobSerializer(job).data, status=status.HTTP_202_ACCEPTED
+        )
+    response = StreamingHttpResponse(
+        exports.stream_export(
+            request.user,
+            kind,
+            file_format,
+            query.validated_data.get('start'),
+            query.validated_data.get('end'),
+            using=routers.read_alias(),
+        ),
+        content_type=exports.CONTENT_TYPES[file_format]
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="{kind}.{file_format}"'
+    )
+    return response
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HealthConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app.health'
+
+    def ready(self):
+        from . import checks, signals, tasks  # noqa: F401
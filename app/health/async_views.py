@@ -0,0 +1,216 @@
+"""Async versions of the read-heavy API endpoints.
+
+Served under ``/api/async/`` with the same responses as their DRF
+counterparts.  Under ASGI a request waiting on the database no longer
+holds a worker thread, though its queries still run one at a time (see
+``DashboardService.aload``).
+"""
+import math
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.http import (
+    HttpResponse, HttpResponseNotAllowed, HttpResponseNotModified,
+)
+from django.utils.cache import patch_cache_control
+from rest_framework.exceptions import ValidationError
+from rest_framework.utils.urls import replace_query_param
+
+from . import caching, routers
+from .api_views import _etag_matches
+from .authentication import request_token_user
+from .models import Activity, NutritionEntry
+from .pagination import InvalidCursor, KeysetPagination, apaginate_keyset
+from .renderers import FastJSONRenderer
+from .serializers import (
+    ActivityFilterSerializer,
+    ActivitySerializer,
+    NutritionEntrySerializer,
+    NutritionFilterSerializer,
+    ValuesSerializer,
+    requested_fields,
+)
+from .services import DashboardService
+from .throttling import RequestKindThrottle
+from .timezones import local_today
+
+
+def json_response(data, status=200):
+    # Same renderer as the synchronous endpoints, so output matches
+    return HttpResponse(
+        FastJSONRenderer().render(data),
+        status=status,
+        content_type='application/json'
+    )
+
+
+def _authenticate(request):
+    """The session's user, else the bearer token's, like the DRF defaults"""
+    user = get_user(request)
+    if user.is_authenticated:
+        return user
+    return request_token_user(request) or user
+
+
+def async_api_view(view):
+    """Allow GET/HEAD from authenticated users, like the DRF defaults"""
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        # Session, token and user lookups are synchronous
+        request.user = await sync_to_async(_authenticate)(request)
+        if not request.user.is_authenticated:
+            return json_response(
+                {'detail': 'Authentication credentials were not provided.'},
+                status=403
+            )
+        # Same buckets as the DRF endpoints, so they can't be bypassed
+        throttle = RequestKindThrottle()
+        if not await sync_to_async(throttle.allow_request)(request, None):
+            wait = math.ceil(throttle.wait())
+            response = json_response(
+                {'detail': f'Request was throttled. Expected available in '
+                           f'{wait} seconds.'},
+                status=429
+            )
+            response['Retry-After'] = str(wait)
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+@async_api_view
+@routers.replica_reads
+async def dashboard_stats(request):
+    """Async ``/api/dashboard/``, sharing its cache and ETags"""
+    user_id = request.user.pk
+    today = await sync_to_async(local_today)(user_id)
+    version = await sync_to_async(caching.data_version)(user_id)
+    etag = caching.dashboard_etag(user_id, version, today)
+
+    if _etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        cache = caching.get_cache()
+        key = caching.dashboard_key(user_id, version, today)
+        payload = await cache.aget(key)
+        if payload is None:
+            service = DashboardService(request.user, today)
+            await service.aload()
+            payload = service.payload()
+            await cache.aset(
+                key, payload, settings.HEALTH_DASHBOARD_CACHE_TIMEOUT
+            )
+        response = json_response(payload)
+
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def _page_size(request):
+    try:
+        size = int(request.GET[KeysetPagination.page_size_query_param])
+    except (KeyError, ValueError):
+        return KeysetPagination.page_size
+    if size <= 0:
+        return KeysetPagination.page_size
+    return min(size, KeysetPagination.max_page_size)
+
+
+def _values_serializer(request, serializer_class):
+    """ValuesSerializer for the request's ``?fields=``, as in ValuesReadMixin
+
+    Raises ValidationError for unknown fields.
+    """
+    return ValuesSerializer(
+        serializer_class,
+        requested_fields(serializer_class, request.GET.get('fields'))
+    )
+
+
+def _values(queryset, values_serializer):
+    columns = dict.fromkeys([*values_serializer.columns, 'date', 'id'])
+    return queryset.values(*columns)
+
+
+async def _list(request, model, serializer_class, filter_serializer_class):
+    query = filter_serializer_class(data=request.GET)
+    if not query.is_valid():
+        return json_response(query.errors, status=400)
+    try:
+        serializer = _values_serializer(request, serializer_class)
+    except ValidationError as exc:
+        return json_response(exc.detail, status=400)
+    param = KeysetPagination.cursor_query_param
+    try:
+        page = await apaginate_keyset(
+            _values(
+                query.filter(model.objects.filter(user=request.user)),
+                serializer
+            ),
+            request.GET.get(param),
+            _page_size(request)
+        )
+    except InvalidCursor:
+        return json_response(
+            {'detail': KeysetPagination.invalid_cursor_message}, status=404
+        )
+    url = request.build_absolute_uri()
+    return json_response({
+        'next': page.next_cursor and replace_query_param(
+            url, param, page.next_cursor
+        ),
+        'previous': page.previous_cursor and replace_query_param(
+            url, param, page.previous_cursor
+        ),
+        'results': serializer.many(page.items),
+    })
+
+
+async def _retrieve(request, model, serializer_class, pk):
+    try:
+        serializer = _values_serializer(request, serializer_class)
+    except ValidationError as exc:
+        return json_response(exc.detail, status=400)
+    try:
+        row = await _values(
+            model.objects.filter(user=request.user), serializer
+        ).aget(pk=pk)
+    except model.DoesNotExist:
+        return json_response({'detail': 'Not found.'}, status=404)
+    return json_response(serializer.to_representation(row))
+
+
+@async_api_view
+@routers.replica_reads
+async def activity_list(request):
+    return await _list(
+        request, Activity, ActivitySerializer, ActivityFilterSerializer
+    )
+
+
+@async_api_view
+@routers.replica_reads
+async def activity_detail(request, pk):
+    return await _retrieve(request, Activity, ActivitySerializer, pk)
+
+
+@async_api_view
+@routers.replica_reads
+async def nutrition_list(request):
+    return await _list(
+        request, NutritionEntry, NutritionEntrySerializer,
+        NutritionFilterSerializer
+    )
+
+
+@async_api_view
+@routers.replica_reads
+async def nutrition_detail(request, pk):
+    return await _retrieve(
+        request, NutritionEntry, NutritionEntrySerializer, pk
+    )
@@ -0,0 +1,161 @@
+"""Bearer token authentication for API clients.
+
+Session authentication costs a ``django_session`` lookup and a ``User``
+query before every API request.  Clients can instead send
+``Authorization: Bearer <token>``; validated tokens are kept in a small
+per-process LRU cache, so a repeat request authenticates without touching
+the database.  Tokens are stored as SHA-256 digests (they are random, so
+a slow password hash adds nothing).
+
+A revoked token stops working at once in the process that revoked it and
+within ``HEALTH_TOKEN_CACHE_TTL`` seconds everywhere else.
+"""
+import copy
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authentication import (
+    BaseAuthentication, get_authorization_header,
+)
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import routers
+from .models import ApiToken
+
+# Seconds between last_used_at writes for a token
+TOKEN_TOUCH_INTERVAL = 300
+
+
+def hash_token(key):
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def issue_token(user, name='', expires_in=None):
+    """Create a token for ``user``; returns the ApiToken and its key
+
+    ``expires_in`` is a timedelta, or None for a token that never expires.
+    The key is not stored and cannot be recovered later.
+    """
+    key = secrets.token_urlsafe(32)
+    token = ApiToken.objects.create(
+        user=user,
+        name=name,
+        prefix=key[:8],
+        digest=hash_token(key),
+        expires_at=timezone.now() + expires_in if expires_in else None,
+    )
+    return token, key
+
+
+class TokenCache:
+    """Thread-safe LRU of token digest -> user, with a TTL per entry"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, digest):
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            expires, user = entry
+            if expires <= time.monotonic():
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+        # Requests must not share (and mutate) one instance
+        return copy.copy(user)
+
+    def set(self, digest, user, ttl):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (time.monotonic() + ttl, user)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > settings.HEALTH_TOKEN_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def discard_user(self, user_id):
+        with self._lock:
+            for digest, (_expires, user) in list(self._entries.items()):
+                if user.pk == user_id:
+                    del self._entries[digest]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def authenticate_token(key):
+    """The active user owning token ``key``, or None"""
+    digest = hash_token(key)
+    user = token_cache.get(digest)
+    if user is not None:
+        return user
+    # A token just issued may not have reached the replica yet
+    with routers.use_replica(False):
+        token = ApiToken.objects.select_related('user').filter(
+            digest=digest
+        ).first()
+    if token is None or not token.user.is_active:
+        return None
+    now = timezone.now()
+    ttl = settings.HEALTH_TOKEN_CACHE_TTL
+    if token.expires_at is not None:
+        if token.expires_at <= now:
+            return None
+        # Never cache a token past its expiry
+        ttl = min(ttl, (token.expires_at - now).total_seconds())
+    touched = token.last_used_at
+    if touched is None or now - touched > timedelta(
+        seconds=TOKEN_TOUCH_INTERVAL
+    ):
+        ApiToken.objects.filter(pk=token.pk).update(last_used_at=now)
+    token_cache.set(digest, token.user, ttl)
+    return copy.copy(token.user)
+
+
+class ApiTokenAuthentication(BaseAuthentication):
+    """``Authorization: Bearer <token>`` with tokens from ``issue_token``"""
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+        if len(auth) != 2:
+            raise AuthenticationFailed('Invalid token header.')
+        try:
+            key = auth[1].decode()
+        except UnicodeError:
+            raise AuthenticationFailed('Invalid token header.')
+        user = authenticate_token(key)
+        if user is None:
+            raise AuthenticationFailed('Invalid or expired token.')
+        return (user, None)
+
+    def authenticate_header(self, request):
+        return f'{self.keyword} realm="api"'
+
+
+def request_token_user(request):
+    """The user of a valid bearer token sent with ``request``, or None"""
+    try:
+        result = ApiTokenAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    return result[0] if result else None
@@ -0,0 +1,357 @@
+"""Latency and query benchmarks for the HTML and REST entry points.
+
+Routes are requested either in-process through Django's test client, where
+every query can be captured, or over HTTP against a running server (e.g.
+gunicorn), where only latency and database-wide counters are visible.
+"""
+import http.cookiejar
+import math
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.throttling import UserRateThrottle
+
+from .models import Activity, NutritionEntry
+from .serializers import (
+    ActivitySerializer, NutritionEntrySerializer, ValuesSerializer,
+)
+from .throttling import BucketThrottle
+
+# name -> (url name, sample row model for "pk" or None)
+ROUTES = {
+    'dashboard': ('dashboard', None),
+    'activity_list': ('activity_list', None),
+    'nutrition_list': ('nutrition_list', None),
+    'api_dashboard_stats': ('api_dashboard_stats', None),
+    'api_activity_list': ('activity-list', None),
+    'api_activity_detail': ('activity-detail', Activity),
+    'api_nutrition_list': ('nutritionentry-list', None),
+    'api_nutrition_detail': ('nutritionentry-detail', NutritionEntry),
+    'api_goal_list': ('usergoal-list', None),
+}
+
+# Per-route limits; metrics are p50/p95/p99 (ms), queries and rows
+DEFAULT_BUDGETS = {
+    'dashboard': {'p95': 150, 'queries': 6},
+    'activity_list': {'p95': 100, 'queries': 5},
+    'nutrition_list': {'p95': 100, 'queries': 5},
+    'api_dashboard_stats': {'p95': 100, 'queries': 6},
+    'api_activity_list': {'p95': 100, 'queries': 4},
+    'api_activity_detail': {'p95': 50, 'queries': 4},
+    'api_nutrition_list': {'p95': 100, 'queries': 4},
+    'api_nutrition_detail': {'p95': 50, 'queries': 4},
+    'api_goal_list': {'p95': 50, 'queries': 5},
+}
+METRICS = ['p50', 'p95', 'p99', 'queries', 'rows']
+
+# Serialization benchmark: kind -> (model, serializer)
+SERIALIZED = {
+    'activities': (Activity, ActivitySerializer),
+    'nutrition': (NutritionEntry, NutritionEntrySerializer),
+}
+
+# Throttle benchmark: scope of the buckets it fills (and then deletes)
+THROTTLE_SCOPE = 'benchmark'
+
+# Tuples read by sequential and index scans, summed over user tables
+ROWS_SCANNED_SQL = (
+    'SELECT COALESCE(SUM(COALESCE(seq_tup_read, 0) '
+    '+ COALESCE(idx_tup_fetch, 0)), 0) FROM {}'
+)
+# Other backends flush their table statistics at most once a second
+STATS_FLUSH_DELAY = 1.1
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of ``values``"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(math.ceil(pct / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def rows_scanned(view='pg_stat_xact_user_tables'):
+    """Rows read so far according to PostgreSQL, or None elsewhere"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        if view == 'pg_stat_user_tables':
+            cursor.execute('SELECT pg_stat_clear_snapshot()')
+        cursor.execute(ROWS_SCANNED_SQL.format(view))
+        return int(cursor.fetchone()[0])
+
+
+class RouteResult:
+    def __init__(self, name, url):
+        self.name = name
+        self.url = url
+        self.timings = []
+        self.queries = []
+        self.rows = []
+        self.statuses = set()
+
+    def metrics(self):
+        timings = [seconds * 1000 for seconds in self.timings]
+        return {
+            'p50': percentile(timings, 50),
+            'p95': percentile(timings, 95),
+            'p99': percentile(timings, 99),
+            'queries': max(self.queries) if self.queries else None,
+            'rows': max(self.rows) if self.rows else None,
+        }
+
+    def violations(self, budget):
+        found = []
+        for metric, value in self.metrics().items():
+            limit = budget.get(metric)
+            if limit is not None and value is not None and value > limit:
+                found.append(f'{self.name} {metric} {value:.0f} > {limit}')
+        bad = sorted(status for status in self.statuses if status >= 400)
+        if bad:
+            found.append(f'{self.name} returned {bad}')
+        return found
+
+
+def sample_kwargs(user, model):
+    if model is None:
+        return {}
+    pk = model.objects.filter(user=user).values_list('pk', flat=True).first()
+    return None if pk is None else {'pk': pk}
+
+
+def resolve_routes(user, names=None):
+    """Return ``(name, path)`` for each benchmarked route"""
+    routes = []
+    for name, (url_name, model) in ROUTES.items():
+        if names and name not in names:
+            continue
+        kwargs = sample_kwargs(user, model)
+        if kwargs is not None:
+            routes.append((name, reverse(url_name, kwargs=kwargs)))
+    return routes
+
+
+class ClientRunner:
+    """Request routes in-process and capture every query"""
+
+    def __init__(self, user, before_request=None):
+        self.client = Client()
+        self.client.force_login(user)
+        self.before_request = before_request
+
+    def run(self, result, requests, warmup):
+        for iteration in range(warmup + requests):
+            if self.before_request:
+                self.before_request()
+            # One transaction per request so pg_stat_xact_* covers it
+            with transaction.atomic(), \
+                    CaptureQueriesContext(connection) as captured:
+                rows_before = rows_scanned()
+                started = time.perf_counter()
+                response = self.client.get(result.url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = time.perf_counter() - started
+                rows_after = rows_scanned()
+            if iteration < warmup:
+                continue
+            result.timings.append(elapsed)
+            result.statuses.add(response.status_code)
+            # Exclude the two pg_stat queries themselves
+            result.queries.append(
+                len(captured) - (2 if rows_before is not None else 0)
+            )
+            if rows_before is not None:
+                result.rows.append(rows_after - rows_before)
+
+
+class HTTPRunner:
+    """Request routes over HTTP from ``concurrency`` logged-in clients"""
+
+    def __init__(self, base_url, username, password, concurrency=1):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.openers = [
+            self.login(username, password) for _ in range(concurrency)
+        ]
+
+    def login(self, username, password):
+        cookies = http.cookiejar.CookieJar()
+        opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(cookies)
+        )
+        login_url = self.base_url + reverse('login')
+        opener.open(login_url).read()
+        token = next(
+            (cookie.value for cookie in cookies if cookie.name == 'csrftoken'),
+            ''
+        )
+        data = urllib.parse.urlencode({
+            'username': username,
+            'password': password,
+            'csrfmiddlewaretoken': token,
+        }).encode()
+        request = urllib.request.Request(
+            login_url, data=data, headers={'Referer': login_url}
+        )
+        opener.open(request).read()
+        if not any(cookie.name == 'sessionid' for cookie in cookies):
+            raise ValueError(f'Could not log in as {username}.')
+        return opener
+
+    def fetch(self, opener, url):
+        started = time.perf_counter()
+        try:
+            with opener.open(url) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        return time.perf_counter() - started, status
+
+    def run(self, result, requests, warmup):
+        url = self.base_url + result.url
+        for opener in self.openers:
+            for _ in range(warmup):
+                self.fetch(opener, url)
+
+        rows_before = rows_scanned('pg_stat_user_tables')
+        with ThreadPoolExecutor(self.concurrency) as pool:
+            outcomes = pool.map(
+                lambda index: self.fetch(
+                    self.openers[index % self.concurrency], url
+                ),
+                range(requests)
+            )
+            for elapsed, status in outcomes:
+                result.timings.append(elapsed)
+                result.statuses.add(status)
+        if rows_before is not None:
+            time.sleep(STATS_FLUSH_DELAY)
+            # Database-wide, so only meaningful on an otherwise idle server
+            total = rows_scanned('pg_stat_user_tables') - rows_before
+            result.rows.append(total // max(requests, 1))
+
+
+def run_benchmarks(runner, routes, requests=50, warmup=5):
+    results = []
+    for name, url in routes:
+        result = RouteResult(name, url)
+        runner.run(result, requests, warmup)
+        results.append(result)
+    return results
+
+
+def _timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def serialization_costs(user, kind, rows=1000, repeat=5, fields=None):
+    """Median ms per 1,000 rows to fetch and to serialize ``kind`` entries
+
+    Compares model instances through the ModelSerializer with ``.values()``
+    rows through ValuesSerializer (optionally limited to ``fields``).
+    Returns ``{path: (fetch ms, serialize ms)}``, or None without rows.
+    """
+    model, serializer_class = SERIALIZED[kind]
+    queryset = model.objects.filter(user=user).order_by('-date', '-id')
+    queryset = queryset[:rows]
+    values_serializer = ValuesSerializer(serializer_class, fields)
+    timings = {'model_serializer': [], 'values': []}
+    count = 0
+    for _ in range(max(repeat, 1)):
+        instances, fetch = _timed(lambda: list(queryset.all()))
+        _, serialize = _timed(
+            lambda: serializer_class(instances, many=True).data
+        )
+        timings['model_serializer'].append((fetch, serialize))
+
+        values, fetch = _timed(
+            lambda: list(queryset.values(*values_serializer.columns))
+        )
+        _, serialize = _timed(lambda: values_serializer.many(values))
+        timings['values'].append((fetch, serialize))
+        count = len(values)
+    if not count:
+        return None
+
+    scale = 1000 / count
+    return {
+        path: (
+            percentile([fetch for fetch, _ in samples], 50) * scale,
+            percentile([serialize for _, serialize in samples], 50) * scale,
+        )
+        for path, samples in timings.items()
+    }
+
+
+class _BenchmarkBucket(BucketThrottle):
+    scope = THROTTLE_SCOPE
+
+    def __init__(self, rate):
+        self.rate = rate
+
+    def get_rate(self):
+        return self.rate
+
+
+class _BenchmarkUserRate(UserRateThrottle):
+    scope = THROTTLE_SCOPE
+
+    def __init__(self, rate):
+        self.rate = rate
+        super().__init__()
+
+
+def throttle_costs(checks=10000, repeat=5, rate=None):
+    """Median microseconds per check of the token bucket and DRF's throttle
+
+    Both run against the configured cache at ``rate`` (default: the
+    ``read`` rate), with checks spread over enough users that each fills
+    its bucket or request log without being throttled.
+    Returns ``{throttle: microseconds}``.
+    """
+    rate = rate or api_settings.DEFAULT_THROTTLE_RATES['read']
+    throttles = {
+        'token_bucket': _BenchmarkBucket(rate),
+        'drf_user_rate': _BenchmarkUserRate(rate),
+    }
+    num_requests, _duration = throttles['drf_user_rate'].parse_rate(rate)
+    factory = APIRequestFactory()
+    requests = []
+    for index in range(checks // num_requests + 1):
+        request = Request(factory.get('/api/activities/'))
+        # Unsaved users: only their pk is needed for the cache keys
+        request.user = User(pk=index + 1, username=f'bench-{index}')
+        requests.append(request)
+    timings = {name: [] for name in throttles}
+    for _ in range(max(repeat, 1)):
+        for name, throttle in throttles.items():
+            keys = [
+                throttle.get_cache_key(request, None) for request in requests
+            ]
+            throttle.cache.delete_many(keys)
+            started = time.perf_counter()
+            for index in range(checks):
+                request = requests[index % len(requests)]
+                if not throttle.allow_request(request, None):
+                    raise AssertionError(f'{name} throttled a benchmark check')
+            timings[name].append(
+                (time.perf_counter() - started) / checks * 1e6
+            )
+            throttle.cache.delete_many(keys)
+    return {name: percentile(samples, 50) for name, samples in timings.items()}
@@ -0,0 +1,83 @@
+"""Per-user cache versioning for derived health data.
+
+Every user has a data version stored in the cache.  Cached payloads embed
+the version in their key, so bumping it on any write makes all of that
+user's cached data unreachable at once without deleting keys one by one.
+The backend is whatever ``HEALTH_CACHE_ALIAS`` points at.  Versions (and
+so the dashboard ETags) are only trustworthy when every process shares
+that cache, as the production settings require; in a per-process cache
+(local memory, the development default) a process that never saw a write
+keeps an old version, so there they expire with the cached payloads.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import routers
+from .checks import cache_is_shared
+
+
+def get_cache():
+    return caches[settings.HEALTH_CACHE_ALIAS]
+
+
+def _version_key(user_id):
+    return f'health:data-version:{user_id}'
+
+
+def _version_timeout():
+    # Bounds how long another process's write can go unnoticed
+    if cache_is_shared():
+        return None
+    return settings.HEALTH_DASHBOARD_CACHE_TIMEOUT
+
+
+def data_version(user_id):
+    """Return the current data version for ``user_id``"""
+    cache = get_cache()
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Seed from the clock so a version lost to eviction can never
+        # come back as a value that old payloads were stored under.
+        cache.add(key, time.time_ns(), _version_timeout())
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_id):
+    """Invalidate everything cached for ``user_id``"""
+    cache = get_cache()
+    try:
+        cache.incr(_version_key(user_id))
+    except ValueError:
+        cache.set(
+            _version_key(user_id), time.time_ns(), _version_timeout()
+        )
+
+
+def invalidate(user_id):
+    """Bump ``user_id``'s data version once the current transaction commits.
+
+    Bumping earlier would let a concurrent reader cache the pre-write
+    data under the new version.  The user's reads also stay on the
+    primary database for a while, until replicas have caught up.
+    """
+    routers.stick_to_primary(user_id)
+    transaction.on_commit(partial(bump_data_version, user_id))
+
+
+def dashboard_key(user_id, version, day):
+    return f'health:dashboard:{user_id}:{version}:{day.isoformat()}'
+
+
+def dashboard_etag(user_id, version, day):
+    digest = hashlib.md5(
+        dashboard_key(user_id, version, day).encode(),
+        usedforsecurity=False
+    ).hexdigest()
+    return f'"{digest}"'
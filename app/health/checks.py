@@ -0,0 +1,97 @@
+"""System checks for settings that only break once deployed."""
+from django.conf import settings
+from django.core.checks import Error, Warning, register
+from rest_framework.settings import api_settings
+
+# Backends whose entries are visible only to the process that wrote them
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+DATABASE_CACHE = 'django.core.cache.backends.db.DatabaseCache'
+
+
+def cache_is_shared(alias=None):
+    """Whether every process sees the entries of cache ``alias``"""
+    alias = alias or settings.HEALTH_CACHE_ALIAS
+    return settings.CACHES[alias]['BACKEND'] not in PROCESS_LOCAL_CACHES
+
+
+@register('caches')
+def check_shared_cache(app_configs, **kwargs):
+    if not settings.HEALTH_REQUIRE_SHARED_CACHE or cache_is_shared():
+        return []
+    return [
+        Error(
+            f'The "{settings.HEALTH_CACHE_ALIAS}" cache is local to each '
+            f'process.',
+            hint=(
+                'Data versions (ETags), replica stickiness, template '
+                'fragments and throttle buckets must be seen by every web '
+                'and job worker. Set REDIS_URL, or CACHE_BACKEND to '
+                'another shared backend.'
+            ),
+            id='health.E001',
+        )
+    ]
+
+
+@register('caches')
+def check_database_cache(app_configs, **kwargs):
+    alias = settings.HEALTH_CACHE_ALIAS
+    if (not settings.HEALTH_REQUIRE_SHARED_CACHE
+            or settings.CACHES[alias]['BACKEND'] != DATABASE_CACHE):
+        return []
+    return [
+        Warning(
+            f'The "{alias}" cache is a database table.',
+            hint=(
+                'Data versions, replica stickiness and throttle buckets are '
+                'read and written on every API request, which costs several '
+                'extra queries each. Set REDIS_URL for production traffic.'
+            ),
+            id='health.W002',
+        )
+    ]
+
+
+@register('caches')
+def check_replica_cache(app_configs, **kwargs):
+    if 'replica' not in settings.DATABASES or cache_is_shared():
+        return []
+    return [
+        Error(
+            'A read replica is configured but the cache is local to each '
+            'process.',
+            hint=(
+                'Read-your-writes markers would only reach the process that '
+                'handled the write, so all reads stay on the primary. Set '
+                'REDIS_URL or CACHE_BACKEND to a shared backend.'
+            ),
+            id='health.E002',
+        )
+    ]
+
+
+@register('caches')
+def check_throttle_cache(app_configs, **kwargs):
+    # health.E001 already covers deployments that require a shared cache
+    if (settings.DEBUG or settings.HEALTH_REQUIRE_SHARED_CACHE
+            or cache_is_shared()):
+        return []
+    # Imported here: the throttles depend on this module through caching
+    from .throttling import BucketThrottle
+    throttles = api_settings.DEFAULT_THROTTLE_CLASSES
+    if not any(issubclass(throttle, BucketThrottle) for throttle in throttles):
+        return []
+    return [
+        Warning(
+            'API throttle buckets are kept in a per-process cache.',
+            hint=(
+                'Each server process enforces the rates on its own, so the '
+                'effective limit is the rate times the number of processes. '
+                'Set REDIS_URL or CACHE_BACKEND to a shared backend.'
+            ),
+            id='health.W001',
+        )
+    ]
@@ -0,0 +1,120 @@
+"""Detect N+1 and duplicate queries in tests and during development.
+
+Use :class:`QueryDetector` as a context manager or decorator::
+
+    with QueryDetector(max_queries=5) as detector:
+        client.get('/dashboard/')
+    print(detector.report())
+
+    @assert_max_queries(3)
+    def test_activity_list(self):
+        ...
+
+Every query is fingerprinted (literals stripped) and remembers the stack
+frames inside this app that issued it, so repeated fingerprints point at
+the offending lines of ``views.py`` or ``api_views.py``.
+"""
+import os
+import traceback
+from collections import defaultdict
+from contextlib import ContextDecorator
+
+from .instrumentation import execute_wrapper, fingerprint_sql
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Transaction control issued by TestCase and atomic() is not interesting
+IGNORED_PREFIXES = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+# Frames from these modules only ever wrap the interesting ones
+SKIPPED_MODULES = ('detector.py', 'instrumentation.py', 'middleware.py')
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryDetector(ContextDecorator):
+    """Record the queries run inside a block.
+
+    Every database alias is watched unless ``using`` lists connections.  On
+    exit, raises :class:`QueryBudgetExceeded` when more than
+    ``max_queries`` ran or, with ``fail_on_repeats``, when any fingerprint
+    ran ``min_repeats`` times or more.
+    """
+
+    def __init__(self, max_queries=None, fail_on_repeats=False,
+                 min_repeats=2, using=None):
+        self.max_queries = max_queries
+        self.fail_on_repeats = fail_on_repeats
+        self.min_repeats = min_repeats
+        self.using = using
+        self.queries = []
+
+    def __enter__(self):
+        self.queries = []
+        self._wrapper = execute_wrapper(self._record, self.using)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._wrapper.__exit__(exc_type, exc, tb)
+        if exc_type is not None:
+            return False
+        problems = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            problems.append(
+                f'{self.count} queries executed, expected at most '
+                f'{self.max_queries}'
+            )
+        if self.fail_on_repeats and self.repeated():
+            problems.append('repeated queries detected')
+        if problems:
+            raise QueryBudgetExceeded(
+                '; '.join(problems) + '\n' + self.report()
+            )
+        return False
+
+    def _record(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(IGNORED_PREFIXES):
+            self.queries.append((sql, fingerprint_sql(sql), app_frames()))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def repeated(self):
+        """Return ``{fingerprint: [(sql, frames), ...]}`` of repeats"""
+        groups = defaultdict(list)
+        for sql, fingerprint, frames in self.queries:
+            groups[fingerprint].append((sql, frames))
+        return {
+            fingerprint: entries for fingerprint, entries in groups.items()
+            if len(entries) >= self.min_repeats
+        }
+
+    def report(self):
+        lines = [f'{self.count} queries']
+        for fingerprint, entries in self.repeated().items():
+            lines.append(f'{len(entries)}x {fingerprint[:300]}')
+            stacks = dict.fromkeys(frames for _, frames in entries)
+            for frames in stacks:
+                lines.append('  from:')
+                lines.extend(f'    {frame}' for frame in frames)
+        return '\n'.join(lines)
+
+
+def assert_max_queries(max_queries, **kwargs):
+    """Shortcut for ``QueryDetector(max_queries=...)``"""
+    return QueryDetector(max_queries=max_queries, **kwargs)
+
+
+def app_frames():
+    """Stack frames inside this app, innermost last, as short strings"""
+    frames = []
+    for frame in traceback.extract_stack()[:-2]:
+        if not frame.filename.startswith(APP_DIR) or \
+                frame.filename.endswith(SKIPPED_MODULES):
+            continue
+        name = os.path.relpath(frame.filename, os.path.dirname(APP_DIR))
+        frames.append(f'{name}:{frame.lineno} in {frame.name}')
+    return tuple(frames)
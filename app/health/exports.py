@@ -0,0 +1,103 @@
+"""Streaming CSV / NDJSON exports of a user's history.
+
+Rows are read with ``values_list(...).iterator()`` so only one chunk of
+tuples is in memory at a time, and encoded directly to text without going
+through ModelSerializer.  Encoded rows are grouped into ~64 KB pieces
+before being handed to the response.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Activity, NutritionEntry, UserGoal
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+
+# kind -> (model, exported fields)
+EXPORTS = {
+    'activities': (Activity, [
+        'id', 'date', 'activity_type', 'duration', 'distance',
+        'calories_burned', 'notes', 'external_id',
+    ]),
+    'nutrition': (NutritionEntry, [
+        'id', 'date', 'meal_type', 'food_name', 'calories', 'protein',
+        'carbs', 'fat', 'quantity', 'external_id',
+    ]),
+    'goals': (UserGoal, [
+        'id', 'goal_type', 'target_weight', 'target_calories_burn',
+        'target_calories_consume', 'target_protein',
+        'target_activity_days', 'created_at', 'updated_at',
+    ]),
+}
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def export_rows(user, kind, start=None, end=None, using=None):
+    """Iterate over ``(fields, rows)`` for one of the EXPORTS kinds"""
+    model, fields = EXPORTS[kind]
+    queryset = model.objects.using(using).filter(user=user)
+    if kind == 'goals':
+        queryset = queryset.order_by('id')
+    else:
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        queryset = queryset.order_by('date', 'id')
+    return fields, queryset.values_list(*fields).iterator(
+        chunk_size=CHUNK_SIZE
+    )
+
+
+class _Echo:
+    """File-like object whose write() returns what it was given"""
+
+    def write(self, value):
+        return value
+
+
+def encode_csv(fields, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def encode_ndjson(fields, rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'ndjson': encode_ndjson,
+}
+
+
+def buffered(pieces, size=BUFFER_SIZE):
+    """Join small strings into pieces of roughly ``size`` characters"""
+    buffer, length = [], 0
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_export(user, kind, file_format, start=None, end=None,
+                  using=None):
+    """Return an iterator of encoded text for a streaming response.
+
+    Rows are read lazily, after the view has returned, so the database
+    to read from is fixed up front with ``using``.
+    """
+    fields, rows = export_rows(user, kind, start, end, using)
+    return buffered(ENCODERS[file_format](fields, rows))
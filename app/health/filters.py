@@ -0,0 +1,17 @@
+"""Query-parameter filtering for the activity and nutrition list APIs.
+
+The parameters are validated by the viewset's ``filter_serializer_class``
+(see ``EntryFilterSerializer``) and applied in the database, on top of the
+per-user queryset, before keyset pagination.
+"""
+from rest_framework.filters import BaseFilterBackend
+
+
+class EntryFilterBackend(BaseFilterBackend):
+    def filter_queryset(self, request, queryset, view):
+        # Detail routes look up a single row; filtering would only 404 it
+        if getattr(view, 'action', None) != 'list':
+            return queryset
+        query = view.filter_serializer_class(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return query.filter(queryset)
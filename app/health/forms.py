@@ -1,5 +1,7 @@
+from zoneinfo import available_timezones
+
 from django import forms
-from .models import Activity, NutritionEntry, UserGoal
+from .models import Activity, NutritionEntry, UserGoal, UserProfile
 
 
 class ActivityForm(forms.ModelForm):
@@ -27,6 +29,21 @@ class NutritionEntryForm(forms.ModelForm):
         }
 
 
+def time_zone_choices():
+    return [(name, name) for name in sorted(available_timezones())]
+
+
+class UserProfileForm(forms.ModelForm):
+    time_zone = forms.ChoiceField(
+        choices=time_zone_choices,
+        help_text='Your days (totals, streaks) start at midnight here.'
+    )
+
+    class Meta:
+        model = UserProfile
+        fields = ['time_zone']
+
+
 class UserGoalForm(forms.ModelForm):
     class Meta:
         model = UserGoal
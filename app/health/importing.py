@@ -0,0 +1,203 @@
+"""Streaming bulk import of historical activity and nutrition rows.
+
+Rows are read one at a time from CSV or NDJSON, validated against the
+model field definitions (``Field.clean`` enforces max_digits, choices,
+null/blank and the like) and written in batches, each in its own
+transaction.  On PostgreSQL, batches without client keys are loaded with
+``COPY``; everything else goes through :func:`health.ingest.upsert`.
+"""
+import csv
+import io
+import json
+import os
+import time
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+
+from . import caching, ingest, summaries
+from .models import Activity, NutritionEntry
+
+MODELS = {
+    'activities': Activity,
+    'nutrition': NutritionEntry,
+}
+FORMATS = ['csv', 'ndjson']
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rate(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def read_rows(stream, file_format):
+    """Yield ``(row number, dict)`` from a text stream"""
+    if file_format == 'csv':
+        for number, row in enumerate(csv.DictReader(stream), start=1):
+            yield number, row
+        return
+    number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            yield number, json.loads(line)
+        except ValueError as exc:
+            yield number, ValidationError(f'Invalid JSON: {exc}')
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return 0
+    with open(path) as fh:
+        return json.load(fh).get('rows', 0)
+
+
+def save_checkpoint(path, rows):
+    # Write then rename so an interrupted run never leaves a torn file
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as fh:
+        json.dump({'rows': rows}, fh)
+    os.replace(temporary, path)
+
+
+class Importer:
+    def __init__(self, kind, user=None, batch_size=5000, dry_run=False,
+                 use_copy=True, checkpoint=None, max_errors=100):
+        self.model = MODELS[kind]
+        self.user = user
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.use_copy = use_copy and connection.vendor == 'postgresql'
+        self.checkpoint = checkpoint
+        self.max_errors = max_errors
+        self.fields = [
+            field for field in self.model._meta.concrete_fields
+            if not field.primary_key and field.name != 'user'
+        ]
+        self._user_ids = {}
+
+    def clean(self, row):
+        """Return a model instance for ``row`` or raise ValidationError"""
+        if isinstance(row, ValidationError):
+            raise row
+        if not isinstance(row, dict):
+            raise ValidationError('Expected an object.')
+        errors = {}
+        values = {}
+        for field in self.fields:
+            raw = row.get(field.name)
+            if raw is None or (raw == '' and field.null):
+                raw = field.get_default()
+            elif isinstance(raw, float):
+                # Avoid binary float artefacts tripping decimal_places
+                raw = str(raw)
+            try:
+                values[field.name] = field.clean(raw, None)
+            except ValidationError as exc:
+                errors[field.name] = exc.messages
+        try:
+            values['user_id'] = self.user_id(row)
+        except ValidationError as exc:
+            errors['user'] = exc.messages
+        if errors:
+            raise ValidationError(errors)
+        return self.model(**values)
+
+    def user_id(self, row):
+        if self.user is not None:
+            return self.user.pk
+        username = row.get('username')
+        if not username:
+            raise ValidationError('This field is required.')
+        if username not in self._user_ids:
+            self._user_ids[username] = User.objects.filter(
+                username=username
+            ).values_list('pk', flat=True).first()
+        if self._user_ids[username] is None:
+            raise ValidationError(f'Unknown user "{username}".')
+        return self._user_ids[username]
+
+    def run(self, stream, file_format, progress=None):
+        """Import every row of ``stream``; returns ImportStats"""
+        stats = ImportStats()
+        resume_from = load_checkpoint(self.checkpoint)
+        batch = []
+        for number, row in read_rows(stream, file_format):
+            if number <= resume_from:
+                stats.skipped += 1
+                continue
+            stats.read += 1
+            try:
+                batch.append(self.clean(row))
+            except ValidationError as exc:
+                stats.errors.append((number, exc.message_dict
+                                     if hasattr(exc, 'error_dict')
+                                     else exc.messages))
+                if len(stats.errors) >= self.max_errors:
+                    break
+            if stats.read % self.batch_size == 0:
+                self.write(batch, number, stats)
+                batch = []
+                if progress:
+                    progress(stats)
+        else:
+            self.write(batch, resume_from + stats.read, stats)
+            if progress:
+                progress(stats)
+        return stats
+
+    def write(self, batch, rows_done, stats):
+        if not self.dry_run and batch:
+            with transaction.atomic():
+                if self.use_copy and not any(i.external_id for i in batch):
+                    self.copy(batch)
+                else:
+                    ingest.upsert(self.model, batch)
+        stats.imported += len(batch)
+        if self.checkpoint and not self.dry_run:
+            save_checkpoint(self.checkpoint, rows_done)
+
+    def copy(self, instances):
+        """Load ``instances`` with PostgreSQL COPY"""
+        fields = [
+            field for field in self.model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for instance in instances:
+            writer.writerow([
+                r'\N' if value is None else value
+                for value in (
+                    getattr(instance, field.attname) for field in fields
+                )
+            ])
+        buffer.seek(0)
+
+        quote = connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in fields)
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {quote(self.model._meta.db_table)} ({columns}) '
+                f"FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer
+            )
+        # COPY bypasses the ORM, so keep the derived data in step here
+        summaries.record(added=instances)
+        for user_id in {instance.user_id for instance in instances}:
+            caching.invalidate(user_id)
@@ -0,0 +1,91 @@
+"""Batched writes of Activity and NutritionEntry rows.
+
+Rows that carry a client ``external_id`` are upserted on the
+(user, external_id) unique constraint with a single
+``INSERT ... ON CONFLICT DO UPDATE`` (supported by both PostgreSQL and
+SQLite), so a device that re-sends a batch updates its earlier rows
+instead of duplicating them.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from . import caching, summaries
+
+BATCH_SIZE = 1000
+
+
+def upsert_fields(model):
+    return [
+        field.name for field in model._meta.concrete_fields
+        if not field.primary_key and field.name not in ('user', 'external_id')
+    ]
+
+
+def upsert(model, instances, batch_size=BATCH_SIZE):
+    """Insert ``instances``, updating rows with the same client key.
+
+    Daily summaries are brought up to date for every affected day.  On
+    return every instance has its primary key set.
+    """
+    plain = [instance for instance in instances if not instance.external_id]
+    # Within one statement a key may only be written once; the last wins
+    keyed = {
+        (instance.user_id, instance.external_id): instance
+        for instance in instances if instance.external_id
+    }
+
+    with transaction.atomic():
+        if plain:
+            model.objects.bulk_create(plain, batch_size=batch_size)
+            summaries.record(added=plain)
+        if keyed:
+            _upsert_keyed(model, keyed, batch_size)
+
+    # bulk_create sends no model signals, so invalidate caches here
+    for user_id in {instance.user_id for instance in instances}:
+        caching.invalidate(user_id)
+
+    # Copy keys onto duplicates that were dropped from the statement
+    for instance in instances:
+        if instance.external_id and instance.pk is None:
+            instance.pk = keyed[(instance.user_id, instance.external_id)].pk
+    return instances
+
+
+def _upsert_keyed(model, keyed, batch_size):
+    external_ids = defaultdict(set)
+    affected = defaultdict(set)
+    for (user_id, external_id), instance in keyed.items():
+        external_ids[user_id].add(external_id)
+        affected[user_id].add(instance.date)
+
+    # Rows about to be overwritten may move to another day
+    for user_id, ids in external_ids.items():
+        affected[user_id].update(
+            model.objects.filter(
+                user_id=user_id, external_id__in=ids
+            ).values_list('date', flat=True)
+        )
+
+    model.objects.bulk_create(
+        keyed.values(),
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['user', 'external_id'],
+        update_fields=upsert_fields(model)
+    )
+
+    # Updated rows don't report their primary keys, so look them up
+    # through the (user, external_id) index.
+    for user_id, ids in external_ids.items():
+        pks = dict(
+            model.objects.filter(
+                user_id=user_id, external_id__in=ids
+            ).values_list('external_id', 'pk')
+        )
+        for external_id in ids:
+            keyed[(user_id, external_id)].pk = pks[external_id]
+
+    for user_id, dates in affected.items():
+        summaries.refresh_days(user_id, dates)
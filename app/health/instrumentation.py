@@ -0,0 +1,340 @@
+"""Per-route request metrics kept in process memory.
+
+:class:`~health.middleware.QueryMetricsMiddleware` records one observation
+per sampled request; :func:`render_prometheus` exposes the totals in the
+Prometheus text format.  Counters live in each worker process, so by
+default every series carries a ``pid`` label and a scrape only sees the
+worker that served it.  With ``HEALTH_METRICS_DIR`` set, each worker
+periodically writes its totals to a file there and a scrape sums every
+worker's file (see :class:`SharedMetrics`), like prometheus_client's
+multiprocess mode.
+"""
+import atexit
+import fcntl
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# Upper bounds (seconds) of the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\(\s*(?:\?\s*,\s*)+\?\s*\)')
+_SPACE = re.compile(r'\s+')
+
+
+def fingerprint_sql(sql):
+    """Normalize ``sql`` so queries differing only in literals compare equal"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('(...)', sql)
+    return _SPACE.sub(' ', sql).strip()
+
+
+def add_execute_wrapper(wrapper, using=None):
+    """Install ``wrapper`` on every connection of this thread (or ``using``)
+
+    Connections are per thread, so under ASGI call this (and
+    :func:`remove_execute_wrapper`) through ``sync_to_async``.
+    """
+    for conn in connections.all() if using is None else using:
+        conn.execute_wrappers.append(wrapper)
+
+
+def remove_execute_wrapper(wrapper, using=None):
+    for conn in connections.all() if using is None else using:
+        conn.execute_wrappers.remove(wrapper)
+
+
+@contextmanager
+def execute_wrapper(wrapper, using=None):
+    """Like ``connection.execute_wrapper``, for every database alias
+
+    Replica reads would otherwise escape the metrics and the detector.
+    """
+    add_execute_wrapper(wrapper, using)
+    try:
+        yield
+    finally:
+        remove_execute_wrapper(wrapper, using)
+
+
+class QueryRecorder:
+    """Execute wrapper that times and fingerprints queries"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = self.clock()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += self.clock() - started
+            self.count += 1
+            self.fingerprints[fingerprint_sql(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Queries repeating an earlier query's fingerprint"""
+        return sum(n - 1 for n in self.fingerprints.values() if n > 1)
+
+
+class RouteStats:
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.db_duration = 0.0
+        self.queries = 0
+        self.duplicates = 0
+        self.response_bytes = 0
+        self.buckets = [0] * len(DURATION_BUCKETS)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, duration, db_duration, queries, duplicates,
+                response_bytes):
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = RouteStats()
+            stats.requests += 1
+            stats.duration += duration
+            stats.db_duration += db_duration
+            stats.queries += queries
+            stats.duplicates += duplicates
+            stats.response_bytes += response_bytes
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if duration <= bound:
+                    stats.buckets[index] += 1
+                    break
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: (
+                    stats.requests, stats.duration, stats.db_duration,
+                    stats.queries, stats.duplicates, stats.response_bytes,
+                    list(stats.buckets),
+                )
+                for route, stats in self._routes.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._routes.clear()
+
+
+registry = MetricsRegistry()
+
+
+def merge_snapshots(total, snapshot):
+    """Add the counters of ``snapshot`` to ``total`` (in place)"""
+    for route, values in snapshot.items():
+        current = total.get(route)
+        if current is None:
+            total[route] = (*values[:6], list(values[6]))
+            continue
+        total[route] = (
+            *(a + b for a, b in zip(current[:6], values[:6])),
+            [a + b for a, b in zip(current[6], values[6])],
+        )
+    return total
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedMetrics:
+    """Totals of every worker on this host, exchanged through a directory
+
+    Each process writes its snapshot to ``<pid>-<id>.json`` at most every
+    ``flush_interval`` seconds.  :meth:`collect` sums all files; those of
+    exited workers are folded into ``archive.json`` so counters never go
+    backwards and the directory does not grow with worker restarts.
+    """
+    ARCHIVE = 'archive.json'
+
+    def __init__(self, directory, flush_interval=5):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pid = None
+        self._path = None
+        self._flushed = 0.0
+
+    def path(self):
+        # Recomputed after a fork: preloaded workers share the module
+        pid = os.getpid()
+        if pid != self._pid:
+            self._pid = pid
+            self._path = os.path.join(
+                self.directory, f'{pid}-{uuid.uuid4().hex[:8]}.json'
+            )
+        return self._path
+
+    def _write(self, path, snapshot):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as handle:
+            json.dump(snapshot, handle)
+        os.replace(temporary, path)
+
+    def _read(self, path):
+        try:
+            with open(path) as handle:
+                return json.load(handle)
+        except (OSError, ValueError):
+            return {}
+
+    def flush(self):
+        snapshot = registry.snapshot()
+        if not snapshot:
+            return
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(self.path(), snapshot)
+            self._flushed = time.monotonic()
+
+    def maybe_flush(self):
+        if time.monotonic() - self._flushed >= self.flush_interval:
+            self.flush()
+
+    def collect(self):
+        """Summed snapshot of every worker, current and exited"""
+        self.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'w') as lock:
+            # Only one scrape at a time may fold files into the archive
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            archive_path = os.path.join(self.directory, self.ARCHIVE)
+            archive = self._read(archive_path)
+            live = {}
+            exited = []
+            for name in os.listdir(self.directory):
+                if not name.endswith('.json') or name == self.ARCHIVE:
+                    continue
+                path = os.path.join(self.directory, name)
+                pid = int(name.split('-', 1)[0])
+                if _alive(pid):
+                    merge_snapshots(live, self._read(path))
+                else:
+                    merge_snapshots(archive, self._read(path))
+                    exited.append(path)
+            if exited:
+                self._write(archive_path, archive)
+                for path in exited:
+                    os.remove(path)
+        return merge_snapshots(live, archive)
+
+
+_shared = None
+
+
+def get_shared():
+    """The SharedMetrics for HEALTH_METRICS_DIR, or None when unset"""
+    global _shared
+    directory = settings.HEALTH_METRICS_DIR
+    if not directory:
+        return None
+    if _shared is None or _shared.directory != directory:
+        _shared = SharedMetrics(directory)
+    return _shared
+
+
+@atexit.register
+def _flush_on_exit():
+    # Keep the counts of a worker's last seconds (e.g. max_requests)
+    shared = get_shared()
+    if shared is not None:
+        shared.flush()
+
+
+# metric name, type, help, index into the snapshot tuple
+_SERIES = [
+    ('health_http_requests_total', 'counter',
+     'Sampled requests.', 0),
+    ('health_http_request_db_seconds_total', 'counter',
+     'Time spent in database queries.', 2),
+    ('health_http_request_queries_total', 'counter',
+     'Database queries executed.', 3),
+    ('health_http_request_duplicate_queries_total', 'counter',
+     'Queries repeating an earlier query of the same request.', 4),
+    ('health_http_response_bytes_total', 'counter',
+     'Response body bytes (non-streaming responses).', 5),
+]
+
+
+def _labels(**labels):
+    return ','.join(
+        '{}="{}"'.format(key, str(value).replace('\\', r'\\')
+                         .replace('"', r'\"'))
+        for key, value in labels.items()
+    )
+
+
+def _route_labels(route, pid):
+    return {'route': route} if pid is None else {'route': route, 'pid': pid}
+
+
+def render_prometheus(snapshot=None, pid=None):
+    """Return the registry in the Prometheus text exposition format
+
+    Series are labelled with ``pid`` unless it is None; by default this
+    process's registry is rendered with its pid, or all workers' summed
+    totals without one when HEALTH_METRICS_DIR is set.
+    """
+    if snapshot is None:
+        shared = get_shared()
+        if shared is None:
+            snapshot, pid = registry.snapshot(), os.getpid()
+        else:
+            snapshot = shared.collect()
+    lines = []
+    for name, kind, description, index in _SERIES:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        for route, values in sorted(snapshot.items()):
+            labels = _labels(**_route_labels(route, pid))
+            lines.append(f'{name}{{{labels}}} {values[index]}')
+
+    name = 'health_http_request_duration_seconds'
+    lines += [
+        f'# HELP {name} Wall time from middleware entry to response.',
+        f'# TYPE {name} histogram',
+    ]
+    for route, values in sorted(snapshot.items()):
+        requests, duration, buckets = values[0], values[1], values[6]
+        cumulative = 0
+        for bound, count in zip(DURATION_BUCKETS, buckets):
+            cumulative += count
+            labels = _labels(**_route_labels(route, pid), le=bound)
+            lines.append(f'{name}_bucket{{{labels}}} {cumulative}')
+        labels = _labels(**_route_labels(route, pid), le='+Inf')
+        lines.append(f'{name}_bucket{{{labels}}} {requests}')
+        labels = _labels(**_route_labels(route, pid))
+        lines.append(f'{name}_sum{{{labels}}} {duration}')
+        lines.append(f'{name}_count{{{labels}}} {requests}')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,391 @@
+"""Database-backed background jobs, with no external broker.
+
+Tasks are plain functions registered with :func:`task` (see
+``health.tasks``) and queued with :func:`enqueue`, typically from a write
+path that should not do the work inside the request.  Jobs become visible
+to workers when the enqueuing transaction commits.
+
+``manage.py run_workers`` runs :func:`run_workers`: a pool of processes,
+each with a pool of threads, polling the Job table.  A job is claimed with
+a conditional ``UPDATE`` (after ``SELECT ... FOR UPDATE SKIP LOCKED`` where
+the database supports it), so a job runs on one worker at a time.  Failed
+attempts are retried with exponential backoff.  A running job's
+``heartbeat_at`` is refreshed every ``HEALTH_JOB_HEARTBEAT`` seconds, and
+jobs whose heartbeat stopped for ``HEALTH_JOB_TIMEOUT`` (their worker died)
+are requeued; a job may run for any length of time as long as its worker
+is alive.  Functions registered with :func:`periodic` (e.g. removing old
+exports) run in one thread of every worker process.
+"""
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import (
+    DatabaseError, IntegrityError, close_old_connections, connection,
+    connections, transaction,
+)
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+# Due jobs looked at per claim attempt
+CLAIM_CANDIDATES = 10
+# Seconds between checks for jobs of dead workers
+RECOVER_INTERVAL = 60
+
+TASKS = {}
+# (function, interval in seconds) pairs run by the workers
+PERIODIC = []
+
+
+class UnknownTask(LookupError):
+    pass
+
+
+def task(name=None, max_attempts=None):
+    """Register a function taking a Job as the task ``name``
+
+    Its return value, which must be JSON serializable, is stored as the
+    job's result.
+    """
+    def register(func):
+        func.task_name = name or func.__name__
+        func.max_attempts = max_attempts
+        TASKS[func.task_name] = func
+        return func
+    return register
+
+
+def periodic(seconds):
+    """Register a function taking no arguments to run every ``seconds``
+
+    It runs in one thread of each worker process, so it must be safe to
+    run concurrently in several processes.
+    """
+    def register(func):
+        PERIODIC.append((func, seconds))
+        return func
+    return register
+
+
+def enqueue(task_name, user=None, payload=None, delay=0, unique=False):
+    """Queue a job running ``task_name``, optionally after ``delay`` seconds
+
+    With ``unique``, an already queued job of the same task for the same
+    user is returned instead of adding another.  A unique constraint on
+    ``Job.unique_key`` settles concurrent calls: the loser returns the
+    winner's job.
+    """
+    func = TASKS.get(task_name)
+    if func is None:
+        raise UnknownTask(task_name)
+    user_id = getattr(user, 'pk', user)
+    job = Job(
+        user_id=user_id,
+        task=task_name,
+        payload=payload or {},
+        run_after=timezone.now() + timedelta(seconds=delay),
+        max_attempts=func.max_attempts or settings.HEALTH_JOB_MAX_ATTEMPTS,
+    )
+    if not unique:
+        job.save()
+        return job
+    job.unique_key = f'{task_name}:{user_id}'
+    while True:
+        queued = Job.objects.filter(
+            unique_key=job.unique_key, status=Job.QUEUED
+        ).first()
+        if queued is not None:
+            return queued
+        try:
+            with transaction.atomic():
+                job.save()
+            return job
+        except IntegrityError:
+            # Queued by someone else since the lookup; return theirs
+            job.pk = None
+
+
+def retry_delay(attempts):
+    """Seconds before retrying after ``attempts`` failed attempts
+
+    Exponential, capped, with jitter so failed jobs don't retry in step.
+    """
+    delay = min(
+        settings.HEALTH_JOB_RETRY_DELAY * 2 ** max(attempts - 1, 0),
+        settings.HEALTH_JOB_MAX_RETRY_DELAY
+    )
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_next(worker):
+    """Mark the next due job as running on ``worker`` and return it"""
+    now = timezone.now()
+    due = Job.objects.filter(
+        status=Job.QUEUED, run_after__lte=now
+    ).order_by('run_after', 'id')
+    if connection.features.has_select_for_update_skip_locked:
+        # Rows locked by other workers are skipped rather than waited on
+        with transaction.atomic():
+            return _claim(due.select_for_update(skip_locked=True), worker, now)
+    # Elsewhere (SQLite) the conditional update alone arbitrates; running
+    # it outside a read transaction avoids lock upgrade deadlocks
+    return _claim(due, worker, now)
+
+
+def _claim(due, worker, now):
+    for pk in due.values_list('pk', flat=True)[:CLAIM_CANDIDATES]:
+        # Only one worker's update can match a queued job
+        # Clearing unique_key lets a new unique job queue while this one
+        # runs, and a retry never clashes with it
+        claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING,
+            unique_key=None,
+            attempts=F('attempts') + 1,
+            started_at=now,
+            heartbeat_at=now,
+            worker=worker,
+        )
+        if claimed:
+            return Job.objects.get(pk=pk)
+    return None
+
+
+def _this_attempt(job):
+    """The job's row, as long as it is still running this attempt
+
+    A job recovered from a worker presumed dead may have been claimed
+    again; the first attempt must not overwrite the new one's state.
+    """
+    return Job.objects.filter(
+        pk=job.pk, status=Job.RUNNING, attempts=job.attempts
+    )
+
+
+class Heartbeat(threading.Thread):
+    """Refresh a running job's ``heartbeat_at`` until the block exits"""
+
+    def __init__(self, job, interval=None):
+        super().__init__(name=f'heartbeat-{job.pk}', daemon=True)
+        self.job = job
+        self.interval = interval or settings.HEALTH_JOB_HEARTBEAT
+        self.stopped = threading.Event()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(self.interval):
+                try:
+                    _this_attempt(self.job).update(
+                        heartbeat_at=timezone.now()
+                    )
+                except DatabaseError:
+                    logger.exception('Heartbeat of job %s failed', self.job.pk)
+                    connection.close()
+        finally:
+            connection.close()
+
+
+def run_job(job):
+    """Run a claimed job and record its outcome"""
+    try:
+        func = TASKS.get(job.task)
+        if func is None:
+            raise UnknownTask(job.task)
+        with Heartbeat(job):
+            result = func(job)
+    except Exception as exc:
+        logger.exception('Job %s (%s) failed', job.pk, job.task)
+        _failed(job, exc)
+        return False
+    recorded = _this_attempt(job).update(
+        status=Job.SUCCEEDED,
+        result=result,
+        error='',
+        finished_at=timezone.now(),
+    )
+    if not recorded:
+        logger.warning('Job %s finished after it was recovered', job.pk)
+    return True
+
+
+def _failed(job, exc):
+    now = timezone.now()
+    error = f'{type(exc).__name__}: {exc}'
+    if job.attempts < job.max_attempts and not isinstance(exc, UnknownTask):
+        _this_attempt(job).update(
+            status=Job.QUEUED,
+            run_after=now + timedelta(seconds=retry_delay(job.attempts)),
+            error=error,
+        )
+    else:
+        _this_attempt(job).update(
+            status=Job.FAILED, error=error, finished_at=now
+        )
+
+
+@periodic(RECOVER_INTERVAL)
+def recover_stale():
+    """Requeue (or fail) running jobs without a heartbeat for too long
+
+    A job is presumed lost when neither its heartbeat nor (for jobs
+    claimed before heartbeats existed) its start is more recent than
+    HEALTH_JOB_TIMEOUT seconds ago.  Returns the number of jobs recovered.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.HEALTH_JOB_TIMEOUT)
+    stale = Job.objects.filter(status=Job.RUNNING).filter(
+        Q(heartbeat_at__lt=cutoff)
+        | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+    error = 'Worker lost or timed out'
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, error=error, finished_at=now
+    )
+    return failed + stale.update(
+        status=Job.QUEUED, run_after=now, error=error
+    )
+
+
+class Worker:
+    """Poll for jobs and run them until ``stop`` is set
+
+    In ``burst`` mode the worker also stops once no job is due.  With
+    ``housekeeping`` it also runs the :func:`periodic` functions.
+    """
+
+    def __init__(self, name, stop, poll_interval=1.0, burst=False,
+                 housekeeping=False):
+        self.name = name
+        self.stop = stop
+        self.poll_interval = poll_interval
+        self.burst = burst
+        self.housekeeping = housekeeping
+        self.processed = 0
+        self.next_runs = {}
+
+    def run_periodic(self):
+        for func, interval in PERIODIC:
+            if time.monotonic() < self.next_runs.get(func, 0):
+                continue
+            self.next_runs[func] = time.monotonic() + interval
+            try:
+                func()
+            except DatabaseError:
+                raise
+            except Exception:
+                logger.exception('Periodic task %s failed', func.__name__)
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    if self.housekeeping:
+                        self.run_periodic()
+                    job = claim_next(self.name)
+                except DatabaseError:
+                    # e.g. the database restarting; keep the worker alive
+                    logger.exception('Worker %s could not poll', self.name)
+                    connection.close()
+                    self.stop.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self.burst:
+                        break
+                    self.stop.wait(self.poll_interval)
+                    continue
+                run_job(job)
+                self.processed += 1
+        finally:
+            connection.close()
+        return self.processed
+
+
+def run_threads(threads, stop, poll_interval=1.0, burst=False, prefix=None):
+    """Run ``threads`` workers in this process; return jobs processed"""
+    prefix = prefix or f'{socket.gethostname()}:{os.getpid()}'
+    workers = [
+        Worker(
+            f'{prefix}:{index}', stop, poll_interval, burst,
+            housekeeping=index == 0
+        )
+        for index in range(max(threads, 1))
+    ]
+    pool = [
+        threading.Thread(target=worker.run, name=worker.name, daemon=True)
+        for worker in workers
+    ]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(worker.processed for worker in workers)
+
+
+def _worker_process(threads, stop, poll_interval, burst):
+    # Connections inherited from the parent must not be shared
+    connections.close_all()
+    signal.signal(signal.SIGINT, lambda *args: stop.set())
+    signal.signal(signal.SIGTERM, lambda *args: stop.set())
+    run_threads(threads, stop, poll_interval, burst)
+
+
+def run_workers(processes=1, threads=1, poll_interval=1.0, burst=False):
+    """Run the worker pool until SIGINT/SIGTERM (or, in burst mode, idle)
+
+    One process runs its threads in place; more fork child processes.
+    """
+    if processes <= 1:
+        stop = threading.Event()
+        handlers = {
+            sig: signal.signal(sig, lambda *args: stop.set())
+            for sig in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            return run_threads(threads, stop, poll_interval, burst)
+        finally:
+            for sig, handler in handlers.items():
+                signal.signal(sig, handler)
+
+    context = multiprocessing.get_context('fork')
+    stop = context.Event()
+    connections.close_all()
+    children = [
+        context.Process(
+            target=_worker_process,
+            args=(threads, stop, poll_interval, burst),
+            name=f'health-worker-{index}',
+        )
+        for index in range(processes)
+    ]
+    handlers = {
+        sig: signal.signal(sig, lambda *args: stop.set())
+        for sig in (signal.SIGINT, signal.SIGTERM)
+    }
+    try:
+        for child in children:
+            child.start()
+        for child in children:
+            child.join()
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+    return None
@@ -0,0 +1,155 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from app.health.benchmarking import (
+    DEFAULT_BUDGETS, METRICS, ROUTES, ClientRunner, HTTPRunner,
+    resolve_routes, run_benchmarks,
+)
+
+
+def parse_budget(value):
+    """Parse ``ROUTE.METRIC=LIMIT``"""
+    try:
+        target, limit = value.split('=')
+        route, metric = target.split('.')
+        limit = float(limit)
+    except ValueError:
+        raise CommandError(f'Invalid budget "{value}"; use ROUTE.METRIC=N.')
+    if route not in ROUTES or metric not in METRICS:
+        raise CommandError(f'Unknown route or metric in budget "{value}".')
+    return route, metric, limit
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the dashboard, list views and API viewsets through the "
+        "test client or against a running server, and fail when a latency "
+        "or query budget is exceeded."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Benchmark as this user (default: first "bench-" user)'
+        )
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server, e.g. http://127.0.0.1:8000; '
+                 'without it requests go through the test client'
+        )
+        parser.add_argument(
+            '--password',
+            default='benchmark',
+            help='Password used to log in with --url (default: benchmark)'
+        )
+        parser.add_argument(
+            '--route',
+            action='append',
+            dest='routes',
+            choices=sorted(ROUTES),
+            help='Only benchmark this route (may be repeated)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50,
+            help='Measured requests per route (default: 50)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=5,
+            help='Unmeasured requests per route first (default: 5)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Parallel clients with --url (default: 1)'
+        )
+        parser.add_argument(
+            '--cold-cache',
+            action='store_true',
+            help='Clear the cache before every test client request'
+        )
+        parser.add_argument(
+            '--budget',
+            action='append',
+            default=[],
+            type=parse_budget,
+            help='Override a budget, e.g. dashboard.p95=80 or '
+                 'api_activity_list.queries=3 (may be repeated)'
+        )
+        parser.add_argument(
+            '--no-budgets',
+            action='store_true',
+            help='Report only; ignore the default budgets'
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        routes = resolve_routes(user, options['routes'])
+        if options['url']:
+            try:
+                runner = HTTPRunner(
+                    options['url'], user.username, options['password'],
+                    concurrency=max(options['concurrency'], 1)
+                )
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot benchmark {options['url']}: {exc}")
+        else:
+            runner = ClientRunner(
+                user,
+                before_request=cache.clear if options['cold_cache'] else None
+            )
+
+        results = run_benchmarks(
+            runner, routes, options['requests'], options['warmup']
+        )
+
+        budgets = {} if options['no_budgets'] else {
+            route: dict(budget) for route, budget in DEFAULT_BUDGETS.items()
+        }
+        for route, metric, limit in options['budget']:
+            budgets.setdefault(route, {})[metric] = limit
+
+        self.stdout.write(
+            f"{'route':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+            f"{'queries':>8} {'rows':>8}"
+        )
+        violations = []
+        for result in results:
+            metrics = result.metrics()
+            self.stdout.write(
+                f'{result.name:<22} '
+                + ' '.join(
+                    f'{self.format(metrics[metric]):>8}'
+                    for metric in METRICS
+                )
+            )
+            violations += result.violations(budgets.get(result.name, {}))
+
+        if violations:
+            for violation in violations:
+                self.stderr.write(self.style.ERROR(violation))
+            raise CommandError(f'{len(violations)} budget(s) exceeded.')
+        self.stdout.write(self.style.SUCCESS('All budgets met.'))
+
+    def get_user(self, username):
+        users = User.objects.order_by('username')
+        user = (
+            users.filter(username=username) if username
+            else users.filter(username__startswith='bench-')
+        ).first()
+        if user is None:
+            raise CommandError(
+                f'Unknown user: {username}' if username else
+                'No benchmark user; run "manage.py seed_health_data" first.'
+            )
+        return user
+
+    def format(self, value):
+        if value is None:
+            return '-'
+        return f'{value:.1f}' if isinstance(value, float) else str(value)
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+from app.health.benchmarking import SERIALIZED, serialization_costs
+from app.health.serializers import requested_fields
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the cost per 1,000 rows of the full ModelSerializer with "
+        "the .values() fast path used by the list and detail endpoints."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Serialize this user\'s rows (default: first "bench-" user)'
+        )
+        parser.add_argument(
+            '--kind',
+            action='append',
+            dest='kinds',
+            choices=sorted(SERIALIZED),
+            help='Only benchmark this kind of entry (may be repeated)'
+        )
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Rows serialized per run (default: 1000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per path; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--fields',
+            help='Sparse fieldset for the fast path, e.g. id,date,calories'
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options['user'])
+        self.stdout.write(
+            f"{'kind':<12} {'path':<18} {'fetch ms':>9} {'serialize ms':>13}"
+            f" {'total ms':>9}   (per 1,000 rows)"
+        )
+        for kind in options['kinds'] or sorted(SERIALIZED):
+            serializer_class = SERIALIZED[kind][1]
+            try:
+                fields = requested_fields(serializer_class, options['fields'])
+            except ValidationError as exc:
+                raise CommandError(f"{kind}: {exc.detail['fields'][0]}")
+            costs = serialization_costs(
+                user, kind, options['rows'], options['repeat'], fields
+            )
+            if costs is None:
+                self.stdout.write(f'{kind:<12} no rows')
+                continue
+            for path, (fetch, serialize) in costs.items():
+                self.stdout.write(
+                    f'{kind:<12} {path:<18} {fetch:>9.2f} {serialize:>13.2f}'
+                    f' {fetch + serialize:>9.2f}'
+                )
+
+    def get_user(self, username):
+        users = User.objects.order_by('username')
+        user = (
+            users.filter(username=username) if username
+            else users.filter(username__startswith='bench-')
+        ).first()
+        if user is None:
+            raise CommandError(
+                f'Unknown user: {username}' if username else
+                'No benchmark user; run "manage.py seed_health_data" first.'
+            )
+        return user
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.health.benchmarking import throttle_costs
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the cost per request of the token bucket throttle against "
+        "DRF's UserRateThrottle, both using the configured cache."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checks',
+            type=int,
+            default=10000,
+            help='Throttle checks per run (default: 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per throttle; the median is reported (default: 5)'
+        )
+        parser.add_argument(
+            '--rate',
+            help='Rate to throttle at, e.g. 600/min (default: the read rate)'
+        )
+
+    def handle(self, *args, **options):
+        if options['checks'] < 1:
+            raise CommandError('--checks must be at least 1.')
+        try:
+            costs = throttle_costs(
+                options['checks'], options['repeat'], options['rate']
+            )
+        except (KeyError, ValueError):
+            raise CommandError(f"Invalid rate \"{options['rate']}\".")
+        self.stdout.write(f"{'throttle':<16} {'us/request':>11}")
+        for name, micros in costs.items():
+            self.stdout.write(f'{name:<16} {micros:>11.1f}')
@@ -0,0 +1,229 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+
+from app.health import urls as health_urls
+from app.health.models import Activity, NutritionEntry, UserGoal
+from app.health.seeding import seed_user
+
+SEQ_SCAN_PATTERNS = [
+    # PostgreSQL
+    re.compile(r'Seq Scan on "?(\w+)"?'),
+    # SQLite ("SCAN t" without "USING ... INDEX")
+    re.compile(r'^SCAN "?(\w+)"?(?!.*USING (?:COVERING )?INDEX)'),
+]
+SORT_PATTERNS = [
+    re.compile(r'^\s*(?:->\s*)?(?:Incremental )?Sort\b'),
+    re.compile(r'USE TEMP B-TREE FOR (?:ORDER BY|GROUP BY)'),
+]
+TABLE_PATTERN = re.compile(r'(?:FROM|JOIN)\s+"?(\w+)"?', re.IGNORECASE)
+
+ADVISOR_USERNAME = 'index-advisor'
+ASYNC_ROUTE_PREFIX = 'api_async_'
+
+# Sample values for URL kwargs other than "pk"
+SAMPLE_KWARGS = {
+    'period': 'week',
+    'kind': 'activities',
+    'file_format': 'csv',
+}
+
+
+def iter_routes(patterns, namespace=''):
+    """Yield (name, url kwarg names) for every named route"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, namespace)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            kwargs = set(pattern.pattern.regex.groupindex)
+            # Format-suffix duplicates of the API routes add nothing
+            if 'format' not in kwargs:
+                yield namespace + pattern.name, kwargs
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the queries behind every route in health/urls.py against "
+        "seeded data, print their EXPLAIN plans and flag sequential scans "
+        "or sorts on large tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Replay as this existing user instead of seeding data'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=730,
+            help='Days of history to seed (default: 730)'
+        )
+        parser.add_argument(
+            '--min-rows',
+            type=int,
+            default=1000,
+            help='Only flag plans on tables with more rows (default: 1000)'
+        )
+        parser.add_argument(
+            '--route',
+            action='append',
+            dest='routes',
+            help='Only replay this route name (may be repeated)'
+        )
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Exit non-zero when any query is flagged'
+        )
+
+    def handle(self, *args, **options):
+        self.min_rows = options['min_rows']
+        self.row_counts = {}
+        flagged = 0
+
+        with transaction.atomic():
+            user = self.get_user(options)
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+            client = Client()
+            pks = self.sample_pks(user)
+            for name, kwarg_names in iter_routes(health_urls.urlpatterns):
+                if options['routes'] and name not in options['routes']:
+                    continue
+                kwargs = self.route_kwargs(name, kwarg_names, pks)
+                if kwargs is None:
+                    self.stdout.write(f'\n== {name}: skipped (no sample row)')
+                    continue
+                flagged += self.replay(client, user, name, kwargs)
+
+            # Never keep the seeded rows or the sessions created above
+            transaction.set_rollback(True)
+
+        summary = f'\n{flagged} flagged quer{"y" if flagged == 1 else "ies"}.'
+        if flagged and options['strict']:
+            raise CommandError(summary.strip())
+        self.stdout.write(summary)
+
+    def get_user(self, options):
+        if options['user']:
+            try:
+                return User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user: {options['user']}")
+
+        user, _ = User.objects.get_or_create(username=ADVISOR_USERNAME)
+        UserGoal.objects.get_or_create(user=user)
+        activities, nutrition = seed_user(user, days=options['days'], seed=0)
+        self.stdout.write(
+            f'Seeded {activities} activities and {nutrition} nutrition '
+            f'entries for {user.username}.'
+        )
+        return user
+
+    def sample_pks(self, user):
+        return {
+            'activity': Activity.objects.filter(user=user)
+            .values_list('pk', flat=True).first(),
+            'nutrition': NutritionEntry.objects.filter(user=user)
+            .values_list('pk', flat=True).first(),
+            'usergoal': UserGoal.objects.filter(user=user)
+            .values_list('pk', flat=True).first(),
+        }
+
+    def route_kwargs(self, name, kwarg_names, pks):
+        kwargs = {
+            key: SAMPLE_KWARGS[key]
+            for key in kwarg_names if key in SAMPLE_KWARGS
+        }
+        if 'pk' in kwarg_names:
+            # "api_async_activity_detail" reads the same rows as "activity-*"
+            model_name = name.removeprefix(ASYNC_ROUTE_PREFIX)
+            kwargs['pk'] = next(
+                (pk for prefix, pk in pks.items()
+                 if model_name.startswith(prefix)),
+                None
+            )
+        if set(kwargs) != kwarg_names or None in kwargs.values():
+            return None
+        return kwargs
+
+    def replay(self, client, user, name, kwargs):
+        url = reverse(name, kwargs=kwargs)
+        # Log in again each time so routes like "logout" can't leak state
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        self.stdout.write(
+            f'\n== {name} GET {url} -> {response.status_code}, '
+            f'{len(captured)} quer{"y" if len(captured) == 1 else "ies"}'
+        )
+        flagged = 0
+        seen = set()
+        for query in captured.captured_queries:
+            sql = query['sql']
+            if not sql.lstrip().upper().startswith('SELECT') or sql in seen:
+                continue
+            seen.add(sql)
+            plan = self.explain(sql)
+            problems = self.problems(sql, plan)
+            self.stdout.write(f'  {sql[:200]}')
+            for line in plan:
+                self.stdout.write(f'    {line}')
+            for problem in problems:
+                self.stdout.write(self.style.WARNING(f'    !! {problem}'))
+            flagged += bool(problems)
+        return flagged
+
+    def explain(self, sql):
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' \
+            else 'EXPLAIN '
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql)
+            rows = cursor.fetchall()
+        if connection.vendor == 'sqlite':
+            # (id, parent, notused, detail)
+            return [row[-1] for row in rows]
+        return [row[0] for row in rows]
+
+    def table_rows(self, table):
+        if table not in self.row_counts:
+            try:
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.execute(
+                        'SELECT COUNT(*) FROM '
+                        + connection.ops.quote_name(table)
+                    )
+                    self.row_counts[table] = cursor.fetchone()[0]
+            except Exception:
+                self.row_counts[table] = 0
+        return self.row_counts[table]
+
+    def problems(self, sql, plan):
+        found = []
+        for line in plan:
+            for pattern in SEQ_SCAN_PATTERNS:
+                match = pattern.search(line.strip())
+                if match and self.table_rows(match.group(1)) > self.min_rows:
+                    found.append(
+                        f'sequential scan on {match.group(1)} '
+                        f'({self.table_rows(match.group(1))} rows)'
+                    )
+            if any(pattern.search(line) for pattern in SORT_PATTERNS):
+                large = sorted(
+                    table for table in set(TABLE_PATTERN.findall(sql))
+                    if self.table_rows(table) > self.min_rows
+                )
+                if large:
+                    found.append(f'sort over {", ".join(large)}')
+        return found
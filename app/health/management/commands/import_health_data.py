@@ -0,0 +1,112 @@
+import os
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from app.health.importing import FORMATS, MODELS, Importer
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream activities or nutrition entries from a CSV or NDJSON file "
+        "into the database in batched transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(MODELS))
+        parser.add_argument('path', help="File to import, or - for stdin")
+        parser.add_argument(
+            '--format',
+            dest='file_format',
+            choices=FORMATS,
+            help='Input format (default: taken from the file extension)'
+        )
+        parser.add_argument(
+            '--user',
+            help="Import every row for this username instead of reading "
+                 "a 'username' column"
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Rows per transaction (default: 5000)'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording progress; an existing checkpoint makes '
+                 'the import resume after the last committed batch'
+        )
+        parser.add_argument(
+            '--max-errors',
+            type=int,
+            default=100,
+            help='Abort after this many invalid rows (default: 100)'
+        )
+        parser.add_argument(
+            '--no-copy',
+            action='store_true',
+            help='Use INSERTs even when PostgreSQL COPY is available'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate rows and report throughput without writing'
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options['verbosity']
+        path = options['path']
+        file_format = options['file_format']
+        if file_format is None:
+            extension = os.path.splitext(path)[1].lstrip('.').lower()
+            if extension not in FORMATS:
+                raise CommandError(
+                    'Cannot tell the format from the file name; '
+                    'pass --format.'
+                )
+            file_format = extension
+
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user: {options['user']}")
+
+        importer = Importer(
+            options['kind'],
+            user=user,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+            use_copy=not options['no_copy'],
+            checkpoint=options['checkpoint'],
+            max_errors=options['max_errors'],
+        )
+
+        if path == '-':
+            stats = importer.run(sys.stdin, file_format, self.report)
+        else:
+            with open(path, newline='', encoding='utf-8') as stream:
+                stats = importer.run(stream, file_format, self.report)
+
+        for number, errors in stats.errors:
+            self.stderr.write(f'row {number}: {errors}')
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        summary = (
+            f'{verb} {stats.imported} of {stats.read} rows in '
+            f'{stats.elapsed:.1f}s ({stats.rate:.0f} rows/s)'
+        )
+        if stats.skipped:
+            summary += f', skipped {stats.skipped} already imported'
+        if len(stats.errors) >= options['max_errors']:
+            raise CommandError(f'Aborted after too many errors. {summary}')
+        self.stdout.write(self.style.SUCCESS(summary + '.'))
+
+    def report(self, stats):
+        if self.verbosity > 1:
+            self.stdout.write(
+                f'{stats.read} rows read, {stats.imported} written '
+                f'({stats.rate:.0f} rows/s)'
+            )
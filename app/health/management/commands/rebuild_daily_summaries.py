@@ -0,0 +1,70 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from app.health import jobs, progress, summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the DailySummary table from Activity and NutritionEntry "
+        "rows, or verify that it matches them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            dest='usernames',
+            help='Limit to this username (may be repeated)'
+        )
+        parser.add_argument(
+            '--background',
+            action='store_true',
+            help='Queue the rebuild for "manage.py run_workers" instead'
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report mismatches; exit non-zero if any are found'
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options['usernames']:
+            users = User.objects.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(
+                users.values_list('username', flat=True)
+            )
+            if missing:
+                raise CommandError(
+                    f"Unknown user(s): {', '.join(sorted(missing))}"
+                )
+
+        if options['verify']:
+            mismatches = summaries.verify(users)
+            for user_id, date, field, expected, stored in mismatches:
+                self.stdout.write(
+                    f"user={user_id} date={date} {field}: "
+                    f"expected {expected}, stored {stored}"
+                )
+            if mismatches:
+                raise CommandError(
+                    f"{len(mismatches)} summary value(s) out of date; "
+                    "run without --verify to rebuild."
+                )
+            self.stdout.write(self.style.SUCCESS('Daily summaries match.'))
+            return
+
+        if options['background']:
+            targets = list(users) if users is not None else [None]
+            for user in targets:
+                job = jobs.enqueue('rebuild_daily_summaries', user)
+                self.stdout.write(f'Queued job {job.pk}.')
+            return
+
+        count = summaries.rebuild(users)
+        # Streaks and adherence are derived from the summaries
+        progress.refresh_users(users)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt {count} daily summary row(s).')
+        )
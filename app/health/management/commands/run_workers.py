@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.health import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs (goal progress refreshes, summary rebuilds, "
+        "exports) from the database queue until interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=1,
+            help='Worker processes (default: 1)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=2,
+            help='Worker threads per process (default: 2)'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait when no job is due (default: 1)'
+        )
+        parser.add_argument(
+            '--burst',
+            action='store_true',
+            help='Exit once no job is due instead of waiting for more'
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] < 1 or options['threads'] < 1:
+            raise CommandError('--processes and --threads must be >= 1.')
+        self.stdout.write(
+            f"Running {options['processes']} process(es) x "
+            f"{options['threads']} thread(s); tasks: "
+            f"{', '.join(sorted(jobs.TASKS))}"
+        )
+        processed = jobs.run_workers(
+            options['processes'],
+            options['threads'],
+            options['poll_interval'],
+            options['burst'],
+        )
+        if processed is not None:
+            self.stdout.write(
+                self.style.SUCCESS(f'Processed {processed} job(s).')
+            )
@@ -0,0 +1,89 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from app.health.models import UserGoal
+from app.health.seeding import seed_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users with realistic activity and nutrition histories for "
+        "benchmarking and load testing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1,
+            help='Number of users to create (default: 1)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Days of history per user (default: 365)'
+        )
+        parser.add_argument(
+            '--activities-per-day',
+            type=int,
+            nargs=2,
+            default=(0, 2),
+            metavar=('MIN', 'MAX'),
+            help='Activities per day (default: 0 2)'
+        )
+        parser.add_argument(
+            '--meals-per-day',
+            type=int,
+            nargs=2,
+            default=(2, 5),
+            metavar=('MIN', 'MAX'),
+            help='Nutrition entries per day (default: 2 5)'
+        )
+        parser.add_argument(
+            '--prefix',
+            default='bench',
+            help='Username prefix (default: bench)'
+        )
+        parser.add_argument(
+            '--password',
+            default='benchmark',
+            help='Password of the created users (default: benchmark)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Random seed, for repeatable data'
+        )
+
+    def handle(self, *args, **options):
+        for low, high in (options['activities_per_day'],
+                          options['meals_per_day']):
+            if low < 0 or high < low:
+                raise CommandError('Per-day ranges must be 0 <= MIN <= MAX.')
+
+        for index in range(1, options['users'] + 1):
+            username = f"{options['prefix']}-{index:04d}"
+            if User.objects.filter(username=username).exists():
+                raise CommandError(
+                    f'User {username} already exists; use another --prefix.'
+                )
+            user = User.objects.create_user(
+                username=username, password=options['password']
+            )
+            UserGoal.objects.create(user=user)
+            seed = None if options['seed'] is None else options['seed'] + index
+            activities, nutrition = seed_user(
+                user,
+                days=options['days'],
+                activities_per_day=options['activities_per_day'],
+                meals_per_day=options['meals_per_day'],
+                seed=seed,
+            )
+            self.stdout.write(
+                f'{username}: {activities} activities, '
+                f'{nutrition} nutrition entries'
+            )
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded {options['users']} user(s).")
+        )
@@ -0,0 +1,219 @@
+import logging
+import random
+import re
+import time
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async,
+)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+from . import throttling
+from .detector import QueryDetector
+from .instrumentation import (
+    QueryRecorder, add_execute_wrapper, execute_wrapper, get_shared,
+    registry, remove_execute_wrapper,
+)
+
+logger = logging.getLogger(__name__)
+
+_accepts_br = re.compile(r'\bbr\b')
+
+UNRESOLVED_ROUTE = '<unresolved>'
+# Not worth recording: scraping would otherwise dominate the numbers
+EXCLUDED_ROUTES = {'metrics'}
+
+
+class HybridMiddleware:
+    """Base for middleware that runs natively in both WSGI and ASGI mode.
+
+    Database connections are per thread, so under ASGI anything touching
+    ``connection`` goes through ``sync_to_async``, which runs on the same
+    thread as the view's ORM calls.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process(request)
+
+
+class QueryMetricsMiddleware(HybridMiddleware):
+    """Record wall time, DB time, query counts and response size per route.
+
+    Only a ``HEALTH_METRICS_SAMPLE_RATE`` fraction of requests is
+    instrumented; the rest pass straight through.  Sampled responses carry
+    a ``Server-Timing`` header when ``HEALTH_SERVER_TIMING`` is set.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = settings.HEALTH_METRICS_SAMPLE_RATE
+        self.server_timing = settings.HEALTH_SERVER_TIMING
+
+    def sampled(self):
+        return self.sample_rate > 0 and (
+            self.sample_rate >= 1 or random.random() < self.sample_rate
+        )
+
+    def process(self, request):
+        if not self.sampled():
+            return self.get_response(request)
+        recorder = QueryRecorder(time.perf_counter)
+        started = time.perf_counter()
+        with execute_wrapper(recorder):
+            response = self.get_response(request)
+        return self.observe(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        recorder = QueryRecorder(time.perf_counter)
+        started = time.perf_counter()
+        await sync_to_async(add_execute_wrapper)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_execute_wrapper)(recorder)
+        return self.observe(request, response, recorder, started)
+
+    def observe(self, request, response, recorder, started):
+        duration = time.perf_counter() - started
+        match = request.resolver_match
+        route = (match.view_name if match else None) or UNRESOLVED_ROUTE
+        if route in EXCLUDED_ROUTES:
+            return response
+        registry.observe(
+            route,
+            duration,
+            recorder.duration,
+            recorder.count,
+            recorder.duplicates,
+            0 if response.streaming else len(response.content),
+        )
+        shared = get_shared()
+        if shared is not None:
+            shared.maybe_flush()
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};'
+                f'desc="{recorder.count} queries", '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        return response
+
+
+class QueryDetectorMiddleware(HybridMiddleware):
+    """Log repeated queries of each request, with the code that ran them.
+
+    Development aid, enabled with ``HEALTH_QUERY_DETECTOR``.  Responses get
+    ``X-Query-Count`` and ``X-Repeated-Queries`` headers.
+    """
+
+    def __init__(self, get_response):
+        if not settings.HEALTH_QUERY_DETECTOR:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process(self, request):
+        with QueryDetector() as detector:
+            response = self.get_response(request)
+        return self.report(request, response, detector)
+
+    async def __acall__(self, request):
+        detector = QueryDetector()
+        await sync_to_async(detector.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(detector.__exit__)(None, None, None)
+        return self.report(request, response, detector)
+
+    def report(self, request, response, detector):
+        repeated = detector.repeated()
+        if repeated:
+            logger.warning(
+                'Repeated queries in %s %s\n%s',
+                request.method, request.path, detector.report()
+            )
+        response['X-Query-Count'] = str(detector.count)
+        response['X-Repeated-Queries'] = str(
+            sum(len(entries) - 1 for entries in repeated.values())
+        )
+        return response
+
+
+class RateLimitHeadersMiddleware(HybridMiddleware):
+    """Add ``X-RateLimit-*`` headers for requests the throttles checked"""
+
+    def process(self, request):
+        return self.annotate(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.annotate(request, await self.get_response(request))
+
+    def annotate(self, request, response):
+        # Set by health.throttling.BucketThrottle: the tightest bucket
+        rate_limit = getattr(request, 'rate_limit', None)
+        if rate_limit is not None:
+            limit, remaining, reset = rate_limit
+            response[throttling.LIMIT_HEADER] = str(limit)
+            response[throttling.REMAINING_HEADER] = str(remaining)
+            response[throttling.RESET_HEADER] = str(reset)
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compress responses of at least ``HEALTH_COMPRESSION_MIN_BYTES``.
+
+    Uses brotli when the client accepts it and the package is installed,
+    except for HTML: only gzip carries Django's BREACH mitigation, and
+    HTML pages embed CSRF tokens.  Everything else is left to Django's
+    GZipMiddleware.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        if len(response.content) < settings.HEALTH_COMPRESSION_MIN_BYTES:
+            return response
+        if brotli is None or not self.wants_brotli(request, response):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(
+            response.content, quality=settings.HEALTH_BROTLI_QUALITY
+        )
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(response.content))
+        # Same ETag handling as GZipMiddleware: the body changed
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
+
+    def wants_brotli(self, request, response):
+        content_type = response.get('Content-Type', '')
+        return (
+            not content_type.startswith('text/html')
+            and _accepts_br.search(request.headers.get('Accept-Encoding', ''))
+        )
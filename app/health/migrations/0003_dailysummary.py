@@ -0,0 +1,78 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:17
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_daily_summaries(apps, schema_editor):
+    Activity = apps.get_model('health', 'Activity')
+    NutritionEntry = apps.get_model('health', 'NutritionEntry')
+    DailySummary = apps.get_model('health', 'DailySummary')
+
+    summaries = {}
+    activity_rows = Activity.objects.order_by().values('user_id', 'date').annotate(
+        total_calories_burned=models.Sum('calories_burned'),
+        total_duration=models.Sum('duration'),
+        total_count=models.Count('id'),
+    )
+    for row in activity_rows:
+        summary = summaries.setdefault(
+            (row['user_id'], row['date']),
+            DailySummary(user_id=row['user_id'], date=row['date']),
+        )
+        summary.calories_burned = row['total_calories_burned'] or 0
+        summary.duration = row['total_duration'] or 0
+        summary.activity_count = row['total_count']
+
+    nutrition_rows = NutritionEntry.objects.order_by().values('user_id', 'date').annotate(
+        total_calories=models.Sum('calories'),
+        total_protein=models.Sum('protein'),
+        total_carbs=models.Sum('carbs'),
+        total_fat=models.Sum('fat'),
+        total_count=models.Count('id'),
+    )
+    for row in nutrition_rows:
+        summary = summaries.setdefault(
+            (row['user_id'], row['date']),
+            DailySummary(user_id=row['user_id'], date=row['date']),
+        )
+        summary.calories_consumed = row['total_calories'] or 0
+        summary.protein = row['total_protein'] or 0
+        summary.carbs = row['total_carbs'] or 0
+        summary.fat = row['total_fat'] or 0
+        summary.nutrition_count = row['total_count']
+
+    DailySummary.objects.bulk_create(summaries.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('health', '0002_usergoal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('calories_burned', models.PositiveIntegerField(default=0)),
+                ('duration', models.PositiveIntegerField(default=0, help_text='Activity duration in minutes')),
+                ('activity_count', models.PositiveIntegerField(default=0)),
+                ('calories_consumed', models.PositiveIntegerField(default=0)),
+                ('protein', models.DecimalField(decimal_places=2, default=0, help_text='Protein in grams', max_digits=8)),
+                ('carbs', models.DecimalField(decimal_places=2, default=0, help_text='Carbs in grams', max_digits=8)),
+                ('fat', models.DecimalField(decimal_places=2, default=0, help_text='Fat in grams', max_digits=8)),
+                ('nutrition_count', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailysummary',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='dailysummary_user_date_uniq'),
+        ),
+        migrations.RunPython(backfill_daily_summaries, migrations.RunPython.noop),
+    ]
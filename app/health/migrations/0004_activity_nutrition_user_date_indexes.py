@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0003_dailysummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', 'date'], name='activity_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nutritionentry',
+            index=models.Index(fields=['user', 'date'], name='nutrition_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0004_activity_nutrition_user_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', 'date', 'id'], name='activity_user_date_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nutritionentry',
+            index=models.Index(fields=['user', 'date', 'id'], name='nutrition_user_date_id_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='activity',
+            name='activity_user_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='nutritionentry',
+            name='nutrition_user_date_idx',
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0005_user_date_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='activity',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Client-supplied ID used to deduplicate syncs', max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='nutritionentry',
+            name='external_id',
+            field=models.CharField(blank=True, help_text='Client-supplied ID used to deduplicate syncs', max_length=100, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='activity',
+            constraint=models.UniqueConstraint(fields=('user', 'external_id'), name='activity_user_external_id_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='nutritionentry',
+            constraint=models.UniqueConstraint(fields=('user', 'external_id'), name='nutrition_user_external_id_uniq'),
+        ),
+    ]
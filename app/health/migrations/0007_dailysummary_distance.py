@@ -0,0 +1,32 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+def backfill_distance(apps, schema_editor):
+    Activity = apps.get_model('health', 'Activity')
+    DailySummary = apps.get_model('health', 'DailySummary')
+
+    rows = Activity.objects.filter(distance__isnull=False).order_by().values(
+        'user_id', 'date'
+    ).annotate(total_distance=models.Sum('distance'))
+    for row in rows:
+        DailySummary.objects.filter(
+            user_id=row['user_id'], date=row['date']
+        ).update(distance=row['total_distance'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0006_external_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailysummary',
+            name='distance',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Distance in km', max_digits=9),
+        ),
+        migrations.RunPython(backfill_distance, migrations.RunPython.noop),
+    ]
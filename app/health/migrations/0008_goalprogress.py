@@ -0,0 +1,34 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('health', '0007_dailysummary_distance'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GoalProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('current_streak', models.PositiveIntegerField(default=0, help_text='Consecutive active days ending on last_active_date')),
+                ('longest_streak', models.PositiveIntegerField(default=0)),
+                ('last_active_date', models.DateField(blank=True, null=True)),
+                ('week_start', models.DateField(blank=True, null=True)),
+                ('week_active_days', models.PositiveIntegerField(default=0)),
+                ('window_days', models.PositiveIntegerField(default=28, help_text='Length of the rolling adherence window in days')),
+                ('burn_adherence', models.DecimalField(decimal_places=2, default=0, help_text='% of days in the window meeting the burn target', max_digits=5)),
+                ('intake_adherence', models.DecimalField(decimal_places=2, default=0, help_text='% of days in the window within the intake target', max_digits=5)),
+                ('protein_adherence', models.DecimalField(decimal_places=2, default=0, help_text='% of days in the window meeting the protein target', max_digits=5)),
+                ('computed_on', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.17 on 2026-10-18 06:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0008_goalprogress'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activity',
+            index=models.Index(fields=['user', 'activity_type', 'date', 'id'], name='activity_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nutritionentry',
+            index=models.Index(fields=['user', 'meal_type', 'date', 'id'], name='nutrition_user_meal_date_idx'),
+        ),
+    ]
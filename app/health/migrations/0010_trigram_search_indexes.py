@@ -0,0 +1,45 @@
+"""Trigram indexes for the ``search``/``prefix`` filters on PostgreSQL.
+
+Django compiles ``icontains``/``istartswith`` to ``UPPER(col) LIKE
+UPPER(%s)`` there, which a GIN index over ``UPPER(col)`` with
+``gin_trgm_ops`` can serve.  Built concurrently so existing tables stay
+writable.  Other databases skip this migration and search the user's rows
+through the (user, date, id) index.
+"""
+from django.db import migrations
+
+TRIGRAM_INDEXES = [
+    ('activity_type_trgm_idx', 'health_activity', 'activity_type'),
+    ('nutrition_food_name_trgm_idx', 'health_nutritionentry', 'food_name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+            f'ON {table} USING gin (UPPER({column}) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _table, _column in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('health', '0009_entry_type_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.2.17 on 2026-10-18 07:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def split_contents(apps, schema_editor):
+    StoredFile = apps.get_model('health', 'StoredFile')
+    StoredFileChunk = apps.get_model('health', 'StoredFileChunk')
+
+    # Existing files become a single chunk each
+    for pk in StoredFile.objects.values_list('pk', flat=True).iterator():
+        content = StoredFile.objects.values_list(
+            'content', flat=True
+        ).get(pk=pk)
+        if content:
+            StoredFileChunk.objects.create(file_id=pk, offset=0, data=content)
+
+
+def join_contents(apps, schema_editor):
+    StoredFile = apps.get_model('health', 'StoredFile')
+    StoredFileChunk = apps.get_model('health', 'StoredFileChunk')
+
+    for pk in StoredFile.objects.values_list('pk', flat=True).iterator():
+        chunks = StoredFileChunk.objects.filter(file_id=pk).order_by(
+            'offset'
+        ).values_list('data', flat=True)
+        StoredFile.objects.filter(pk=pk).update(
+            content=b''.join(bytes(data) for data in chunks)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0014_job_heartbeat_storedfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFileChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('offset', models.PositiveBigIntegerField()),
+                ('data', models.BinaryField()),
+                ('file', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='health.storedfile')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='storedfilechunk',
+            constraint=models.UniqueConstraint(fields=('file', 'offset'), name='storedfilechunk_file_offset_uniq'),
+        ),
+        migrations.RunPython(split_contents, join_contents),
+        # A default lets the column be added back when migrating backwards
+        migrations.AlterField(
+            model_name='storedfile',
+            name='content',
+            field=models.BinaryField(default=b''),
+        ),
+        migrations.RemoveField(
+            model_name='storedfile',
+            name='content',
+        ),
+    ]
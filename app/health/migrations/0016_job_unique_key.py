@@ -0,0 +1,22 @@
+# Generated by Django 4.2.17 on 2026-10-18 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('health', '0015_stored_file_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='unique_key',
+            field=models.CharField(blank=True, editable=False, help_text='Set by enqueue(unique=True): one queued job per key', max_length=150, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued')), fields=('unique_key',), name='job_queued_unique_key_uniq'),
+        ),
+    ]
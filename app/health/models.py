@@ -1,7 +1,31 @@
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.contrib.auth.models import User
 
 
+def validate_time_zone(value):
+    try:
+        ZoneInfo(value)
+    except (ValueError, ZoneInfoNotFoundError):
+        raise ValidationError(f'"{value}" is not a known time zone.')
+
+
+class UserProfile(models.Model):
+    """Per-user preferences"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    time_zone = models.CharField(
+        max_length=64,
+        default='UTC',
+        validators=[validate_time_zone],
+        help_text="IANA time zone that days are counted in, e.g. Europe/Paris"
+    )
+
+    def __str__(self):
+        return f"{self.user.username}'s profile"
+
+
 class UserGoal(models.Model):
     GOAL_TYPES = [
         ('weight_loss', 'Weight Loss'),
@@ -69,6 +93,32 @@ class Activity(models.Model):
     )
     date = models.DateField()
     notes = models.TextField(blank=True)
+    external_id = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        help_text="Client-supplied ID used to deduplicate syncs"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'external_id'],
+                name='activity_user_external_id_uniq'
+            ),
+        ]
+        indexes = [
+            # Serves per-user date filters and keyset pagination
+            models.Index(
+                fields=['user', 'date', 'id'],
+                name='activity_user_date_id_idx'
+            ),
+            # activity_type filters, still in keyset order
+            models.Index(
+                fields=['user', 'activity_type', 'date', 'id'],
+                name='activity_user_type_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.activity_type} on {self.date}"
@@ -114,6 +164,264 @@ class NutritionEntry(models.Model):
             ('snack', 'Snack'),
         ]
     )
+    external_id = models.CharField(
+        max_length=100,
+        null=True,
+        blank=True,
+        help_text="Client-supplied ID used to deduplicate syncs"
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'external_id'],
+                name='nutrition_user_external_id_uniq'
+            ),
+        ]
+        indexes = [
+            # Serves per-user date filters and keyset pagination
+            models.Index(
+                fields=['user', 'date', 'id'],
+                name='nutrition_user_date_id_idx'
+            ),
+            # meal_type filters, still in keyset order
+            models.Index(
+                fields=['user', 'meal_type', 'date', 'id'],
+                name='nutrition_user_meal_date_idx'
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.food_name} on {self.date}"
+
+
+class DailySummary(models.Model):
+    """Per-user daily totals maintained from Activity and NutritionEntry.
+
+    Rows are kept in step with the source tables by the handlers in
+    ``health.signals`` and the helpers in ``health.summaries`` so the
+    dashboards can read a day's totals without aggregating raw entries.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    date = models.DateField()
+    calories_burned = models.PositiveIntegerField(default=0)
+    duration = models.PositiveIntegerField(
+        default=0,
+        help_text="Activity duration in minutes"
+    )
+    distance = models.DecimalField(
+        max_digits=9,
+        decimal_places=2,
+        default=0,
+        help_text="Distance in km"
+    )
+    activity_count = models.PositiveIntegerField(default=0)
+    calories_consumed = models.PositiveIntegerField(default=0)
+    protein = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=0,
+        help_text="Protein in grams"
+    )
+    carbs = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=0,
+        help_text="Carbs in grams"
+    )
+    fat = models.DecimalField(
+        max_digits=8,
+        decimal_places=2,
+        default=0,
+        help_text="Fat in grams"
+    )
+    nutrition_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'date'],
+                name='dailysummary_user_date_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - summary for {self.date}"
+
+
+class GoalProgress(models.Model):
+    """Progress against a user's goals, kept current by ``health.progress``.
+
+    Values are derived from DailySummary rows whenever entries are written,
+    so reading them never requires scanning the user's history.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    current_streak = models.PositiveIntegerField(
+        default=0,
+        help_text="Consecutive active days ending on last_active_date"
+    )
+    longest_streak = models.PositiveIntegerField(default=0)
+    last_active_date = models.DateField(null=True, blank=True)
+    week_start = models.DateField(null=True, blank=True)
+    week_active_days = models.PositiveIntegerField(default=0)
+    window_days = models.PositiveIntegerField(
+        default=28,
+        help_text="Length of the rolling adherence window in days"
+    )
+    burn_adherence = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0,
+        help_text="% of days in the window meeting the burn target"
+    )
+    intake_adherence = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0,
+        help_text="% of days in the window within the intake target"
+    )
+    protein_adherence = models.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        default=0,
+        help_text="% of days in the window meeting the protein target"
+    )
+    computed_on = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s goal progress"
+
+
+class Job(models.Model):
+    """A unit of background work, run by ``manage.py run_workers``.
+
+    Jobs are claimed with an atomic status update, so any number of worker
+    processes can poll the table without an external broker.  Failed
+    attempts are retried with exponential backoff up to ``max_attempts``.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUSES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, null=True, blank=True
+    )
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    run_after = models.DateTimeField(
+        help_text="Not picked up before this time (retry backoff)"
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="Last sign of life from the worker running the job"
+    )
+    finished_at = models.DateTimeField(null=True, blank=True)
+    unique_key = models.CharField(
+        max_length=150,
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Set by enqueue(unique=True): one queued job per key"
+    )
+
+    class Meta:
+        constraints = [
+            # Makes unique enqueues safe against concurrent writers; the key
+            # is cleared when a worker claims the job
+            models.UniqueConstraint(
+                fields=['unique_key'],
+                condition=models.Q(status='queued'),
+                name='job_queued_unique_key_uniq'
+            ),
+        ]
+        indexes = [
+            # Serves the workers' "next due job" poll
+            models.Index(
+                fields=['status', 'run_after'],
+                name='job_status_run_after_idx'
+            ),
+            models.Index(
+                fields=['user', 'created_at'],
+                name='job_user_created_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class ApiToken(models.Model):
+    """A bearer token for API clients (see ``health.authentication``).
+
+    Only the SHA-256 digest of the token is stored; the token itself is
+    shown once, when it is issued.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(
+        max_length=100,
+        blank=True,
+        help_text="Label chosen by the user, e.g. the device"
+    )
+    prefix = models.CharField(
+        max_length=8,
+        help_text="First characters of the token, to tell tokens apart"
+    )
+    digest = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user.username}'s token {self.prefix}..."
+
+
+class StoredFile(models.Model):
+    """A file kept in the database (see ``health.storage``).
+
+    Lets web and job worker instances without a common disk hand each
+    other files such as exports.  The contents are split into
+    ``StoredFileChunk`` rows.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.name
+
+
+class StoredFileChunk(models.Model):
+    """The bytes of a StoredFile starting at ``offset``"""
+    file = models.ForeignKey(
+        StoredFile, on_delete=models.CASCADE, related_name='chunks'
+    )
+    offset = models.PositiveBigIntegerField()
+    data = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['file', 'offset'],
+                name='storedfilechunk_file_offset_uniq'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.file.name} @ {self.offset}"
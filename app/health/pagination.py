@@ -0,0 +1,183 @@
+"""Keyset (cursor) pagination over (date, id), newest first.
+
+Each page is fetched with ``WHERE (date, id) < (cursor)`` plus a LIMIT, so
+the cost of a page does not grow with how far back the user has scrolled,
+unlike OFFSET based pagination.
+"""
+import base64
+import binascii
+from datetime import date as date_cls
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(date, pk, reverse=False):
+    raw = f'{date.isoformat()}|{pk}|{int(reverse)}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return ``(date, pk, reverse)`` or raise InvalidCursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        date, pk, reverse = raw.split('|')
+        return date_cls.fromisoformat(date), int(pk), reverse == '1'
+    except (ValueError, TypeError, binascii.Error, UnicodeDecodeError):
+        raise InvalidCursor(cursor)
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor=None, previous_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_other_pages(self):
+        return bool(self.next_cursor or self.previous_cursor)
+
+
+def _position(item):
+    """``(date, pk)`` of a model instance or a ``.values()`` row"""
+    if isinstance(item, dict):
+        return item['date'], item['id']
+    return item.date, item.pk
+
+
+def keyset_queryset(queryset, cursor=None, page_size=20):
+    """Return ``(queryset, reverse)`` fetching one page plus one row.
+
+    Raises InvalidCursor for a malformed cursor.
+    """
+    reverse = False
+    if cursor:
+        date, pk, reverse = decode_cursor(cursor)
+        # The redundant date bound keeps the range scan on the
+        # (user, date, id) index tight on every backend.
+        if reverse:
+            queryset = queryset.filter(date__gte=date).filter(
+                Q(date__gt=date) | Q(pk__gt=pk)
+            ).order_by('date', 'id')
+        else:
+            queryset = queryset.filter(date__lte=date).filter(
+                Q(date__lt=date) | Q(pk__lt=pk)
+            ).order_by('-date', '-id')
+    else:
+        queryset = queryset.order_by('-date', '-id')
+    return queryset[:page_size + 1], reverse
+
+
+def keyset_page(items, cursor, reverse, page_size):
+    """Build a KeysetPage from the rows fetched by keyset_queryset()
+
+    Rows may be model instances or ``.values()`` dicts including ``date``
+    and ``id``.
+    """
+    has_more = len(items) > page_size
+    items = items[:page_size]
+    if reverse:
+        items.reverse()
+    if not items:
+        return KeysetPage(items)
+
+    first, last = items[0], items[-1]
+    if reverse:
+        newer, older = has_more, True
+    else:
+        newer, older = bool(cursor), has_more
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor(*_position(last)) if older else None,
+        previous_cursor=(
+            encode_cursor(*_position(first), reverse=True)
+            if newer else None
+        ),
+    )
+
+
+def paginate_keyset(queryset, cursor=None, page_size=20):
+    """Return one KeysetPage of ``queryset`` ordered by -date, -id.
+
+    ``next_cursor`` points at older rows and ``previous_cursor`` at newer
+    ones.  Raises InvalidCursor for a malformed cursor.
+    """
+    queryset, reverse = keyset_queryset(queryset, cursor, page_size)
+    return keyset_page(list(queryset), cursor, reverse, page_size)
+
+
+async def apaginate_keyset(queryset, cursor=None, page_size=20):
+    """Async version of :func:`paginate_keyset`"""
+    queryset, reverse = keyset_queryset(queryset, cursor, page_size)
+    items = [item async for item in queryset]
+    return keyset_page(items, cursor, reverse, page_size)
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination class built on :func:`paginate_keyset`"""
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.base_url = request.build_absolute_uri()
+        try:
+            self.page = paginate_keyset(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request)
+            )
+        except InvalidCursor:
+            raise NotFound(self.invalid_cursor_message)
+        return self.page.items
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, cursor
+        )
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_link(self.page.next_cursor),
+            'previous': self.get_link(self.page.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
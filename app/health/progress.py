@@ -0,0 +1,175 @@
+"""Goal progress: activity streaks, weekly active days and adherence.
+
+GoalProgress rows are refreshed from DailySummary whenever a user's
+summaries change, so reading progress is a single-row lookup.  Refreshes
+only look at a bounded window: the current week and the rolling adherence
+window (one aggregate query) plus the days of the current streak.  A write
+that only touches today extends or shortens the stored streak without any
+scan.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Q
+
+from . import routers
+from .models import DailySummary, GoalProgress, UserGoal
+from .timezones import local_today
+
+ADHERENCE_WINDOW_DAYS = 28
+STREAK_CHUNK_SIZE = 100
+
+
+def week_start(day):
+    """Monday of the week containing ``day``"""
+    return day - timedelta(days=day.weekday())
+
+
+def _percent(days, window):
+    return (Decimal(100) * days / window).quantize(Decimal('0.01'))
+
+
+def _scan_streak(user_id, today):
+    """Return (streak, last active date) by walking back from ``today``"""
+    dates = DailySummary.objects.filter(
+        user_id=user_id, activity_count__gt=0, date__lte=today
+    ).order_by('-date').values_list('date', flat=True)
+
+    streak, last_active, expected = 0, None, None
+    for date in dates.iterator(chunk_size=STREAK_CHUNK_SIZE):
+        if last_active is None:
+            last_active, streak = date, 1
+        elif date == expected:
+            streak += 1
+        else:
+            break
+        expected = date - timedelta(days=1)
+    return streak, last_active
+
+
+def _update_streak(progress, today, changed_dates, today_active):
+    yesterday = today - timedelta(days=1)
+    current = progress.computed_on == today
+    if current and changed_dates == {today}:
+        last = progress.last_active_date
+        if today_active and last == today:
+            return
+        if today_active and last == yesterday:
+            progress.current_streak += 1
+            progress.last_active_date = today
+            return
+        if not today_active and last == yesterday:
+            return
+        if not today_active and last == today and progress.current_streak > 1:
+            progress.current_streak -= 1
+            progress.last_active_date = yesterday
+            return
+    progress.current_streak, progress.last_active_date = _scan_streak(
+        progress.user_id, today
+    )
+
+
+def refresh(user_id, changed_dates=None, today=None):
+    """Bring the GoalProgress row of ``user_id`` up to date.
+
+    ``changed_dates`` are the days whose summaries changed; ``None`` means
+    unknown and forces a full streak scan.  Always reads from the primary
+    database, since the result is stored.
+    """
+    with routers.use_replica(False):
+        return _refresh(user_id, changed_dates, today)
+
+
+def refresh_users(users=None):
+    """Fully refresh the progress of everyone with summaries, or ``users``"""
+    user_ids = DailySummary.objects.values_list('user_id', flat=True)
+    if users is not None:
+        user_ids = user_ids.filter(user__in=users)
+    for user_id in user_ids.order_by().distinct():
+        refresh(user_id)
+
+
+def _refresh(user_id, changed_dates, today):
+    today = today or local_today(user_id)
+    progress, _ = GoalProgress.objects.get_or_create(user_id=user_id)
+    goal = UserGoal.objects.filter(user_id=user_id).first()
+
+    window = progress.window_days or ADHERENCE_WINDOW_DAYS
+    window_start = today - timedelta(days=window - 1)
+    this_week = week_start(today)
+    counts = {
+        'week_active_days': Count(
+            'id', filter=Q(date__gte=this_week, activity_count__gt=0)
+        ),
+        'today_active': Count(
+            'id', filter=Q(date=today, activity_count__gt=0)
+        ),
+    }
+    if goal is not None:
+        counts.update({
+            'burn_days': Count('id', filter=Q(
+                calories_burned__gte=goal.target_calories_burn
+            )),
+            'intake_days': Count('id', filter=Q(
+                nutrition_count__gt=0,
+                calories_consumed__lte=goal.target_calories_consume
+            )),
+            'protein_days': Count('id', filter=Q(
+                protein__gte=goal.target_protein
+            )),
+        })
+    # The adherence window always covers the current week
+    totals = DailySummary.objects.filter(
+        user_id=user_id,
+        date__gte=min(window_start, this_week),
+        date__lte=today
+    ).aggregate(**counts)
+
+    _update_streak(
+        progress,
+        today,
+        set(changed_dates) if changed_dates is not None else None,
+        bool(totals['today_active'])
+    )
+    progress.longest_streak = max(
+        progress.longest_streak, progress.current_streak
+    )
+    progress.week_start = this_week
+    progress.week_active_days = totals['week_active_days']
+    progress.window_days = window
+    progress.burn_adherence = _percent(totals.get('burn_days', 0), window)
+    progress.intake_adherence = _percent(totals.get('intake_days', 0), window)
+    progress.protein_adherence = _percent(
+        totals.get('protein_days', 0), window
+    )
+    progress.computed_on = today
+    progress.save()
+    return progress
+
+
+def ensure_current(progress, user_id, today):
+    """Return ``progress`` (or a new row when None) as computed on ``today``"""
+    if progress is None or progress.computed_on != today:
+        return refresh(user_id, today=today)
+    return progress
+
+
+def as_dict(progress, goal, today):
+    """Serialize progress for the dashboard API"""
+    yesterday = today - timedelta(days=1)
+    last = progress.last_active_date
+    return {
+        'current_streak': (
+            progress.current_streak if last and last >= yesterday else 0
+        ),
+        'longest_streak': progress.longest_streak,
+        'last_active_date': last,
+        'week_active_days': progress.week_active_days,
+        'target_activity_days': goal.target_activity_days if goal else None,
+        'adherence': {
+            'window_days': progress.window_days,
+            'calories_burn': progress.burn_adherence,
+            'calories_consume': progress.intake_adherence,
+            'protein': progress.protein_adherence,
+        } if goal else None,
+    }
@@ -0,0 +1,121 @@
+"""Route eligible reads to an optional read replica.
+
+Reads only go to the ``replica`` database inside :func:`use_replica`
+(or views wrapped with :func:`replica_reads` / :class:`ReplicaReadMixin`),
+and only for users who have not written anything in the last
+``HEALTH_REPLICA_STICKY_SECONDS``, so people always read their own
+writes.  Everything else, including every write, uses ``default``.
+Without a ``replica`` entry in ``DATABASES``, or without a cache shared
+by every process to hold the "recently wrote" markers, this is a no-op.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+
+from .checks import cache_is_shared
+
+REPLICA = 'replica'
+# Apps whose reads may be served by the replica.  Everything else (sessions,
+# database cache entries, content types) stays on the primary: a lagging
+# copy of a session or a cached data version would undo recent writes.
+REPLICA_APP_LABELS = {'health', 'auth'}
+
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+
+def replica_configured():
+    # Stickiness is only seen by every process through a shared cache;
+    # without one, reads stay on the primary (see check health.E002)
+    return REPLICA in settings.DATABASES and cache_is_shared()
+
+
+def _sticky_key(user_id):
+    return f'health:read-primary:{user_id}'
+
+
+def stick_to_primary(user_id):
+    """Send ``user_id``'s reads to the primary for the sticky window"""
+    if replica_configured():
+        caches[settings.HEALTH_CACHE_ALIAS].set(
+            _sticky_key(user_id), True, settings.HEALTH_REPLICA_STICKY_SECONDS
+        )
+
+
+def is_sticky(user_id):
+    cache = caches[settings.HEALTH_CACHE_ALIAS]
+    return cache.get(_sticky_key(user_id)) is not None
+
+
+@contextmanager
+def use_replica(enabled=True):
+    """Route reads in this block to the replica when one is configured"""
+    token = _reading_from_replica.set(enabled and replica_configured())
+    try:
+        yield
+    finally:
+        _reading_from_replica.reset(token)
+
+
+def read_alias():
+    """Database that reads in the current context are routed to"""
+    return REPLICA if _reading_from_replica.get() else 'default'
+
+
+def replica_allowed(request):
+    """Whether ``request`` may read from the replica"""
+    if not replica_configured() or request.method not in ('GET', 'HEAD'):
+        return False
+    # Imported here as it needs the models, unlike the rest of this module
+    from .authentication import request_token_user
+    user = request.user
+    if not user.is_authenticated:
+        # API clients may send a token instead of a session cookie
+        user = request_token_user(request) or user
+    return not (user.is_authenticated and is_sticky(user.pk))
+
+
+def replica_reads(view):
+    """Decorator routing a view's reads to the replica when allowed"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            allowed = await sync_to_async(replica_allowed)(request)
+            with use_replica(allowed):
+                return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        with use_replica(replica_allowed(request)):
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class ReplicaReadMixin:
+    """Viewset mixin routing safe requests' reads to the replica"""
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_replica(replica_allowed(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICA_APP_LABELS:
+            return read_alias()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both databases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica receives its schema through replication
+        return db != REPLICA
@@ -0,0 +1,83 @@
+"""Generate realistic activity and nutrition histories for load testing."""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from . import summaries
+from .models import Activity, NutritionEntry
+from .timezones import local_today
+
+# activity type, calories burned per minute, km per minute (or None)
+ACTIVITY_TYPES = [
+    ('running', 11, Decimal('0.17')),
+    ('walking', 5, Decimal('0.08')),
+    ('cycling', 9, Decimal('0.40')),
+    ('swimming', 10, Decimal('0.05')),
+    ('yoga', 4, None),
+    ('strength training', 6, None),
+    ('rowing', 8, Decimal('0.20')),
+]
+
+# food name, calories, protein, carbs, fat, meal type
+FOODS = [
+    ('Oatmeal', 150, '5.00', '27.00', '3.00', 'breakfast'),
+    ('Greek yogurt', 130, '11.00', '9.00', '5.00', 'breakfast'),
+    ('Scrambled eggs', 200, '13.00', '2.00', '15.00', 'breakfast'),
+    ('Chicken salad', 350, '30.00', '12.00', '18.00', 'lunch'),
+    ('Turkey sandwich', 420, '25.00', '45.00', '14.00', 'lunch'),
+    ('Lentil soup', 280, '18.00', '40.00', '4.00', 'lunch'),
+    ('Salmon with rice', 600, '38.00', '55.00', '22.00', 'dinner'),
+    ('Pasta bolognese', 700, '32.00', '85.00', '22.00', 'dinner'),
+    ('Stir-fried tofu', 450, '24.00', '35.00', '20.00', 'dinner'),
+    ('Apple', 95, '0.50', '25.00', '0.30', 'snack'),
+    ('Protein bar', 210, '20.00', '22.00', '7.00', 'snack'),
+    ('Almonds', 170, '6.00', '6.00', '15.00', 'snack'),
+]
+
+
+def seed_user(user, days=365, activities_per_day=(0, 2),
+              meals_per_day=(2, 5), end=None, seed=None, batch_size=1000):
+    """Insert ``days`` of history for ``user`` ending on ``end``.
+
+    Rows are written with ``bulk_create`` and the user's daily summaries
+    are rebuilt afterwards.  Returns ``(activities, nutrition_entries)``
+    counts.
+    """
+    rng = random.Random(seed)
+    end = end or local_today(user.pk)
+
+    activities = []
+    nutrition = []
+    for offset in range(days):
+        date = end - timedelta(days=offset)
+        for _ in range(rng.randint(*activities_per_day)):
+            activity_type, rate, speed = rng.choice(ACTIVITY_TYPES)
+            duration = rng.randint(10, 120)
+            activities.append(Activity(
+                user=user,
+                activity_type=activity_type,
+                duration=duration,
+                distance=min(speed * duration, Decimal('999.99'))
+                if speed else None,
+                calories_burned=rate * duration,
+                date=date,
+                notes=rng.choice(['', '', 'Felt good', 'Tough session']),
+            ))
+        for _ in range(rng.randint(*meals_per_day)):
+            name, calories, protein, carbs, fat, meal_type = rng.choice(FOODS)
+            nutrition.append(NutritionEntry(
+                user=user,
+                food_name=name,
+                calories=calories,
+                protein=Decimal(protein),
+                carbs=Decimal(carbs),
+                fat=Decimal(fat),
+                quantity=Decimal(rng.choice(['1.00', '1.50', '2.00'])),
+                date=date,
+                meal_type=meal_type,
+            ))
+
+    Activity.objects.bulk_create(activities, batch_size=batch_size)
+    NutritionEntry.objects.bulk_create(nutrition, batch_size=batch_size)
+    summaries.rebuild(users=[user])
+    return len(activities), len(nutrition)
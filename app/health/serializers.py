@@ -1,23 +1,149 @@
-from rest_framework import serializers
-from .models import Activity, NutritionEntry, UserGoal
+from datetime import date, timedelta
+from functools import lru_cache
 
+from django.contrib.auth import authenticate
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from . import analytics, ingest
+from .models import (
+    Activity, ApiToken, Job, NutritionEntry, UserGoal, UserProfile,
+)
 
-class ActivitySerializer(serializers.ModelSerializer):
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """Create or upsert all validated items with batched INSERTs"""
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        return ingest.upsert(
+            model, [model(**attrs) for attrs in validated_data]
+        )
+
+
+# external_ids derived from an Idempotency-Key header start with this, so a
+# header key can never match an external_id chosen by the client
+IDEMPOTENCY_KEY_PREFIX = 'ik:'
+
+
+class ExternalIdMixin:
+    def validate_external_id(self, value):
+        # Blank keys are stored as NULL so they never collide
+        if not value:
+            return None
+        if value.startswith(IDEMPOTENCY_KEY_PREFIX):
+            raise serializers.ValidationError(
+                f'"{IDEMPOTENCY_KEY_PREFIX}" is reserved for keys derived '
+                f'from the Idempotency-Key header.'
+            )
+        # Creates with a known key are upserts, but an update must not
+        # take the key of another of the user's entries
+        if self.instance is not None:
+            taken = self.Meta.model.objects.filter(
+                user_id=self.instance.user_id, external_id=value
+            ).exclude(pk=self.instance.pk)
+            if taken.exists():
+                raise serializers.ValidationError(
+                    'Another entry already has this external_id.'
+                )
+        return value
+
+
+def requested_fields(serializer_class, value):
+    """Parse a ``?fields=a,b`` sparse fieldset against ``serializer_class``
+
+    Returns None when no fields were requested.
+    """
+    if not value:
+        return None
+    names = list(dict.fromkeys(
+        name.strip() for name in value.split(',') if name.strip()
+    ))
+    unknown = [
+        name for name in names if name not in serializer_class.Meta.fields
+    ]
+    if unknown:
+        raise serializers.ValidationError(
+            {'fields': [f"Unknown field(s): {', '.join(unknown)}."]}
+        )
+    return names or None
+
+
+def _fast_to_representation(field):
+    """Cheaper equivalent of ``field.to_representation`` for DB values"""
+    if isinstance(field, serializers.DecimalField):
+        coerce_to_string = getattr(
+            field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING
+        )
+        if coerce_to_string and not (field.localize or field.normalize_output):
+            # Database values already carry the column's decimal places
+            return lambda value: format(value, 'f')
+    elif isinstance(field, serializers.DateField):
+        output_format = getattr(field, 'format', api_settings.DATE_FORMAT)
+        if output_format and output_format.lower() == ISO_8601:
+            return date.isoformat
+    elif isinstance(field, (serializers.CharField, serializers.IntegerField)):
+        return None
+    return field.to_representation
+
+
+@lru_cache(maxsize=None)
+def _declared_fields(serializer_class):
+    # Building a ModelSerializer's fields is costly; they're only read here
+    return serializer_class().fields
+
+
+class ValuesSerializer:
+    """Read-only fast path of a ModelSerializer over ``.values()`` rows.
+
+    Produces the same output as ``serializer_class`` for its plain model
+    fields, but skips model instances, bound fields and per-field
+    attribute lookups.  ``fields`` narrows both the output and
+    :attr:`columns`, the columns to select.
+    """
+
+    def __init__(self, serializer_class, fields=None):
+        declared = _declared_fields(serializer_class)
+        names = fields or list(declared)
+        self.columns = [declared[name].source for name in names]
+        self.fields = [
+            (name, declared[name].source,
+             _fast_to_representation(declared[name]))
+            for name in names
+        ]
+
+    def to_representation(self, row):
+        data = {}
+        for name, column, convert in self.fields:
+            value = row[column]
+            if value is not None and convert is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    def many(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class ActivitySerializer(ExternalIdMixin, serializers.ModelSerializer):
     class Meta:
         model = Activity
+        list_serializer_class = BulkCreateListSerializer
         fields = [
             'id', 'activity_type', 'duration', 'distance',
-            'calories_burned', 'date', 'notes'
+            'calories_burned', 'date', 'notes', 'external_id'
         ]
         read_only_fields = ['id']
 
 
-class NutritionEntrySerializer(serializers.ModelSerializer):
+class NutritionEntrySerializer(
+    ExternalIdMixin, serializers.ModelSerializer
+):
     class Meta:
         model = NutritionEntry
+        list_serializer_class = BulkCreateListSerializer
         fields = [
             'id', 'food_name', 'calories', 'protein', 'carbs',
-            'fat', 'quantity', 'date', 'meal_type'
+            'fat', 'quantity', 'date', 'meal_type', 'external_id'
         ]
         read_only_fields = ['id']
 
@@ -31,3 +157,177 @@ class UserGoalSerializer(serializers.ModelSerializer):
             'target_activity_days'
         ]
         read_only_fields = ['id']
+
+
+class UserProfileSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UserProfile
+        fields = ['time_zone']
+
+
+class ApiTokenSerializer(serializers.ModelSerializer):
+    expires_in_days = serializers.IntegerField(
+        write_only=True, required=False, min_value=1, max_value=3650
+    )
+
+    class Meta:
+        model = ApiToken
+        fields = [
+            'id', 'name', 'prefix', 'created_at', 'last_used_at',
+            'expires_at', 'expires_in_days'
+        ]
+        read_only_fields = [
+            'id', 'prefix', 'created_at', 'last_used_at', 'expires_at'
+        ]
+
+
+class TokenLoginSerializer(ApiTokenSerializer):
+    """Credentials exchanged for a new token by API clients"""
+    username = serializers.CharField(write_only=True)
+    password = serializers.CharField(
+        write_only=True,
+        style={'input_type': 'password'},
+        trim_whitespace=False
+    )
+
+    class Meta(ApiTokenSerializer.Meta):
+        fields = ApiTokenSerializer.Meta.fields + ['username', 'password']
+
+    def validate(self, attrs):
+        user = authenticate(
+            self.context.get('request'),
+            username=attrs['username'],
+            password=attrs['password'],
+        )
+        if user is None:
+            raise serializers.ValidationError(
+                'Unable to log in with the provided credentials.'
+            )
+        attrs['user'] = user
+        return attrs
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = [
+            'id', 'task', 'status', 'attempts', 'max_attempts', 'run_after',
+            'result', 'error', 'created_at', 'started_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+
+class AnalyticsQuerySerializer(serializers.Serializer):
+    """Query parameters of the analytics endpoint"""
+    DEFAULT_SPANS = {
+        'day': timedelta(days=29),
+        'week': timedelta(weeks=11),
+        'month': timedelta(days=364),
+    }
+    MAX_SPAN = timedelta(days=3660)
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    source = serializers.ChoiceField(
+        choices=analytics.SOURCES,
+        default='rollup'
+    )
+
+    def validate(self, attrs):
+        end = attrs.get('end') or self.context['today']
+        start = attrs.get('start') or (
+            end - self.DEFAULT_SPANS[self.context['period']]
+        )
+        if start > end:
+            raise serializers.ValidationError(
+                {'start': ['Must not be after end.']}
+            )
+        if end - start > self.MAX_SPAN:
+            raise serializers.ValidationError(
+                {'start': ['Date range may span at most ten years.']}
+            )
+        attrs['start'], attrs['end'] = start, end
+        return attrs
+
+
+class ExportQuerySerializer(serializers.Serializer):
+    """Query parameters of the export endpoints"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start, end = attrs.get('start'), attrs.get('end')
+        if start and end and start > end:
+            raise serializers.ValidationError(
+                {'start': ['Must not be after end.']}
+            )
+        return attrs
+
+
+class EntryFilterSerializer(serializers.Serializer):
+    """Query parameters filtering the activity and nutrition lists"""
+    # Set by subclasses: the model's calories column, the field searched
+    # by ``search``/``prefix`` and parameters matched exactly
+    calories_field = None
+    search_field = None
+    exact_fields = ()
+
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    min_calories = serializers.IntegerField(required=False, min_value=0)
+    max_calories = serializers.IntegerField(required=False, min_value=0)
+    search = serializers.CharField(
+        required=False, allow_blank=True, max_length=100
+    )
+    prefix = serializers.CharField(
+        required=False, allow_blank=True, max_length=100
+    )
+
+    def validate(self, attrs):
+        start, end = attrs.get('start'), attrs.get('end')
+        if start and end and start > end:
+            raise serializers.ValidationError(
+                {'start': ['Must not be after end.']}
+            )
+        low, high = attrs.get('min_calories'), attrs.get('max_calories')
+        if low is not None and high is not None and low > high:
+            raise serializers.ValidationError(
+                {'min_calories': ['Must not be above max_calories.']}
+            )
+        return attrs
+
+    def filter(self, queryset):
+        """Apply the validated parameters to ``queryset``"""
+        data = self.validated_data
+        lookups = {
+            'date__gte': data.get('start'),
+            'date__lte': data.get('end'),
+            f'{self.calories_field}__gte': data.get('min_calories'),
+            f'{self.calories_field}__lte': data.get('max_calories'),
+            f'{self.search_field}__icontains': data.get('search'),
+            f'{self.search_field}__istartswith': data.get('prefix'),
+        }
+        lookups.update({field: data.get(field) for field in self.exact_fields})
+        return queryset.filter(**{
+            lookup: value for lookup, value in lookups.items()
+            if value not in (None, '')
+        })
+
+
+class ActivityFilterSerializer(EntryFilterSerializer):
+    calories_field = 'calories_burned'
+    search_field = 'activity_type'
+    exact_fields = ('activity_type',)
+
+    activity_type = serializers.CharField(required=False, max_length=100)
+
+
+class NutritionFilterSerializer(EntryFilterSerializer):
+    calories_field = 'calories'
+    search_field = 'food_name'
+    exact_fields = ('meal_type',)
+
+    meal_type = serializers.ChoiceField(
+        choices=NutritionEntry._meta.get_field('meal_type').choices,
+        required=False
+    )
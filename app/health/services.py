@@ -0,0 +1,131 @@
+"""Data behind the HTML dashboard and the dashboard APIs."""
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import FilteredRelation, Q
+from django.utils.functional import cached_property
+
+from . import progress
+from .models import Activity, DailySummary, NutritionEntry
+from .serializers import (
+    ActivitySerializer, NutritionEntrySerializer, UserGoalSerializer,
+)
+
+RECENT_DAYS = 7
+
+
+def _related(instance, name):
+    """A select_related() reverse one-to-one, or None when there is none"""
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+class DashboardService:
+    """Totals, recent entries and goal data for one user on one day.
+
+    ``day`` is the user's today; callers pick the time zone.  The day's
+    summary, the goal and the goal progress are joined onto the user row
+    in a single query, and the recent activities and nutrition entries
+    take one query each.  Each part is loaded on first use, so a template
+    serving a panel from its fragment cache skips that panel's query.
+    """
+
+    def __init__(self, user, day, recent_limit=5):
+        self.user = user
+        self.day = day
+        self.recent_limit = recent_limit
+
+    def overview_queryset(self):
+        return User.objects.filter(pk=self.user.pk).annotate(
+            day_summary=FilteredRelation(
+                'dailysummary', condition=Q(dailysummary__date=self.day)
+            )
+        ).select_related('usergoal', 'goalprogress', 'day_summary')
+
+    def recent_queryset(self, model):
+        """Up to ``recent_limit`` entries from the last week, newest first"""
+        return model.objects.filter(
+            user=self.user,
+            date__gte=self.day - timedelta(days=RECENT_DAYS)
+        ).order_by('-date', '-id')[:self.recent_limit]
+
+    @cached_property
+    def overview(self):
+        return self.overview_queryset().get()
+
+    @cached_property
+    def recent_activities(self):
+        return list(self.recent_queryset(Activity))
+
+    @cached_property
+    def recent_nutrition(self):
+        return list(self.recent_queryset(NutritionEntry))
+
+    async def aload(self):
+        """Run the dashboard's queries ahead of first use
+
+        The async ORM runs every query on the one thread that owns the
+        connection, so they are awaited in turn: nothing would be gained by
+        issuing them together.
+        """
+        self.overview = await self.overview_queryset().aget()
+        self.recent_activities = await _all(self.recent_queryset(Activity))
+        self.recent_nutrition = await _all(
+            self.recent_queryset(NutritionEntry)
+        )
+        # May refresh (and so write) the progress row
+        await sync_to_async(lambda: self.goal_progress)()
+
+    @cached_property
+    def summary(self):
+        # Left unset by select_related() when the day has no summary row
+        summary = getattr(self.overview, 'day_summary', None)
+        if summary is None:
+            summary = DailySummary(user=self.user, date=self.day)
+        return summary
+
+    @cached_property
+    def user_goal(self):
+        return _related(self.overview, 'usergoal')
+
+    @cached_property
+    def goal_progress(self):
+        """Streaks and adherence, refreshed at most once a day"""
+        return progress.ensure_current(
+            _related(self.overview, 'goalprogress'), self.user.pk, self.day
+        )
+
+    def progress_dict(self):
+        return progress.as_dict(self.goal_progress, self.user_goal, self.day)
+
+    def payload(self):
+        """The ``/api/dashboard/`` response body"""
+        summary, user_goal = self.summary, self.user_goal
+        return {
+            'today_stats': {
+                'calories_burned': summary.calories_burned,
+                'duration': summary.duration,
+                'calories_consumed': summary.calories_consumed,
+                'protein': summary.protein,
+                'carbs': summary.carbs,
+                'fat': summary.fat,
+            },
+            'recent_activities': ActivitySerializer(
+                self.recent_activities, many=True
+            ).data,
+            'recent_nutrition': NutritionEntrySerializer(
+                self.recent_nutrition, many=True
+            ).data,
+            'user_goal': (
+                UserGoalSerializer(user_goal).data if user_goal else None
+            ),
+            'goal_progress': self.progress_dict(),
+        }
+
+
+async def _all(queryset):
+    return [item async for item in queryset]
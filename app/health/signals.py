@@ -0,0 +1,125 @@
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import caching, jobs, progress, summaries, tasks, timezones
+from .authentication import token_cache
+from .models import (
+    Activity, ApiToken, Job, NutritionEntry, UserGoal, UserProfile,
+)
+
+
+def _is_cascade(sender, origin):
+    """True when the delete was started by another model (e.g. a User)"""
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not sender
+
+
+def _refresh_progress(user_id, dates=None):
+    if settings.HEALTH_DEFER_GOAL_PROGRESS:
+        # The job does a full refresh, so one queued job covers all dates
+        jobs.enqueue('refresh_goal_progress', user_id, unique=True)
+    else:
+        progress.refresh(user_id, dates)
+
+
+@receiver(pre_save, sender=Activity)
+@receiver(pre_save, sender=NutritionEntry)
+def remember_previous_entry(sender, instance, raw=False, **kwargs):
+    """Keep the stored version of an entry so its old totals can be undone"""
+    instance._summary_previous = None
+    if raw or instance.pk is None:
+        return
+    instance._summary_previous = sender.objects.filter(
+        pk=instance.pk
+    ).first()
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_save, sender=NutritionEntry)
+def update_summary_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_summary_previous', None)
+    summaries.record(
+        added=[instance],
+        removed=[previous] if previous is not None else []
+    )
+    instance._summary_previous = None
+
+
+@receiver(post_delete, sender=Activity)
+@receiver(post_delete, sender=NutritionEntry)
+def update_summary_on_delete(sender, instance, origin=None, **kwargs):
+    # Summaries of a deleted user go away through their own cascade
+    if _is_cascade(sender, origin):
+        return
+    summaries.record(removed=[instance])
+
+
+@receiver(post_save, sender=Activity)
+@receiver(post_save, sender=NutritionEntry)
+@receiver(post_save, sender=UserGoal)
+@receiver(post_delete, sender=Activity)
+@receiver(post_delete, sender=NutritionEntry)
+@receiver(post_delete, sender=UserGoal)
+def invalidate_cached_data(sender, instance, raw=False, **kwargs):
+    if not raw:
+        caching.invalidate(instance.user_id)
+
+
+@receiver(summaries.summaries_changed)
+def refresh_goal_progress(sender, user_id, dates, **kwargs):
+    _refresh_progress(user_id, dates)
+
+
+@receiver(post_save, sender=UserGoal)
+@receiver(post_delete, sender=UserGoal)
+def refresh_goal_progress_on_goal_change(sender, instance, raw=False,
+                                         origin=None, **kwargs):
+    # Adherence depends on the goal's targets
+    if raw or _is_cascade(sender, origin):
+        return
+    _refresh_progress(instance.user_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def time_zone_changed(sender, instance, raw=False, **kwargs):
+    """A new zone can move "today", so recompute everything derived"""
+    if raw:
+        return
+    timezones.forget(instance.user_id)
+    caching.invalidate(instance.user_id)
+
+
+@receiver(post_delete, sender=ApiToken)
+def token_revoked(sender, instance, **kwargs):
+    # Other processes drop it when their cache entry expires
+    transaction.on_commit(partial(token_cache.discard, instance.digest))
+
+
+@receiver(post_delete, sender=Job)
+def delete_export_file(sender, instance, **kwargs):
+    """Exports go with their job (and so with a deleted user)"""
+    result = instance.result or {}
+    if instance.task == tasks.export_data.task_name and result.get('file'):
+        transaction.on_commit(
+            partial(tasks.export_storage().delete, result['file'])
+        )
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, raw=False, **kwargs):
+    """Deactivated users must not keep authenticating from the cache"""
+    if not raw:
+        transaction.on_commit(
+            partial(token_cache.discard_user, instance.pk)
+        )
@@ -0,0 +1,123 @@
+"""A file storage backend keeping files in the database.
+
+Web and job worker instances seldom share a disk (each Render service has
+its own), but they do share the database, so an export written by a worker
+can be downloaded through any web instance.  Files are split into rows of
+at most ``CHUNK_SIZE`` bytes; saving and reading stream them one row at a
+time, so neither holds more than a chunk of a large export in memory.
+"""
+import io
+
+from django.core.files.base import File
+from django.core.files.storage import Storage
+from django.db import transaction
+from django.utils.deconstruct import deconstructible
+
+from .models import StoredFile, StoredFileChunk
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class ChunkReader(io.RawIOBase):
+    """Seekable reader over the chunks of a StoredFile, fetched as needed"""
+
+    def __init__(self, file_id, size):
+        self.file_id = file_id
+        self.size = size
+        self.position = 0
+        # The chunk last fetched: its offset and bytes
+        self._start = 0
+        self._data = b''
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {
+            io.SEEK_SET: 0, io.SEEK_CUR: self.position, io.SEEK_END: self.size
+        }[whence]
+        self.position = max(base + offset, 0)
+        return self.position
+
+    def readinto(self, buffer):
+        if self.position >= self.size:
+            return 0
+        end = self._start + len(self._data)
+        if not self._start <= self.position < end:
+            self._start, data = StoredFileChunk.objects.filter(
+                file_id=self.file_id, offset__lte=self.position
+            ).order_by('-offset').values_list('offset', 'data').first()
+            self._data = bytes(data)
+        skip = self.position - self._start
+        piece = self._data[skip:skip + len(buffer)]
+        buffer[:len(piece)] = piece
+        self.position += len(piece)
+        return len(piece)
+
+
+@deconstructible
+class DatabaseStorage(Storage):
+    """Storage of ``StoredFile`` rows; files cannot be changed once saved"""
+
+    def _open(self, name, mode='rb'):
+        if any(flag in mode for flag in 'wa+'):
+            raise ValueError('Stored files are read-only.')
+        stored = StoredFile.objects.filter(name=name).values_list(
+            'pk', 'size'
+        ).first()
+        if stored is None:
+            raise FileNotFoundError(name)
+        return File(io.BufferedReader(ChunkReader(*stored)), name=name)
+
+    def _save(self, name, content):
+        with transaction.atomic():
+            stored = StoredFile.objects.create(name=name, size=0)
+            for data in content.chunks(CHUNK_SIZE):
+                StoredFileChunk.objects.create(
+                    file=stored, offset=stored.size, data=data
+                )
+                stored.size += len(data)
+            stored.save(update_fields=['size'])
+        return name
+
+    def delete(self, name):
+        StoredFile.objects.filter(name=name).delete()
+
+    def exists(self, name):
+        return StoredFile.objects.filter(name=name).exists()
+
+    def listdir(self, path):
+        prefix = f"{path.rstrip('/')}/" if path else ''
+        directories, files = set(), []
+        names = StoredFile.objects.filter(
+            name__startswith=prefix
+        ).values_list('name', flat=True)
+        for name in names:
+            head, _sep, tail = name[len(prefix):].partition('/')
+            if tail:
+                directories.add(head)
+            else:
+                files.append(head)
+        return sorted(directories), sorted(files)
+
+    def size(self, name):
+        size = StoredFile.objects.filter(name=name).values_list(
+            'size', flat=True
+        ).first()
+        if size is None:
+            raise FileNotFoundError(name)
+        return size
+
+    def get_created_time(self, name):
+        created = StoredFile.objects.filter(name=name).values_list(
+            'created_at', flat=True
+        ).first()
+        if created is None:
+            raise FileNotFoundError(name)
+        return created
@@ -0,0 +1,238 @@
+"""Maintenance of the DailySummary rollup table.
+
+Single-row writes are applied as deltas (see ``health.signals``); bulk
+paths that bypass model signals call :func:`record` or :func:`refresh_days`
+themselves.  :func:`rebuild` and :func:`verify` recompute everything from
+the raw Activity and NutritionEntry rows.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Sum, Value
+from django.db.models.functions import Greatest
+from django.dispatch import Signal
+
+from .models import Activity, DailySummary, NutritionEntry
+
+# Summary field -> aggregate over the source table
+ACTIVITY_TOTALS = {
+    'calories_burned': Sum('calories_burned'),
+    'duration': Sum('duration'),
+    'distance': Sum('distance'),
+    'activity_count': Count('id'),
+}
+NUTRITION_TOTALS = {
+    'calories_consumed': Sum('calories'),
+    'protein': Sum('protein'),
+    'carbs': Sum('carbs'),
+    'fat': Sum('fat'),
+    'nutrition_count': Count('id'),
+}
+SUMMARY_FIELDS = list(ACTIVITY_TOTALS) + list(NUTRITION_TOTALS)
+
+# Sent with ``user_id`` and ``dates`` after a user's summaries change
+summaries_changed = Signal()
+
+
+def _field_value(instance, name):
+    """``instance.name`` as the field stores it (e.g. "5.5" -> Decimal)
+
+    Saving does not convert the attributes of the instance, so a value
+    assigned as a string is still one when the signals see it.
+    """
+    value = instance._meta.get_field(name).to_python(getattr(instance, name))
+    return 0 if value is None else value
+
+
+def contribution(instance):
+    """Return the amounts a single entry adds to its day's summary"""
+    if isinstance(instance, Activity):
+        return {
+            'calories_burned': _field_value(instance, 'calories_burned'),
+            'duration': _field_value(instance, 'duration'),
+            'distance': _field_value(instance, 'distance'),
+            'activity_count': 1,
+        }
+    return {
+        'calories_consumed': _field_value(instance, 'calories'),
+        'protein': _field_value(instance, 'protein'),
+        'carbs': _field_value(instance, 'carbs'),
+        'fat': _field_value(instance, 'fat'),
+        'nutrition_count': 1,
+    }
+
+
+def _increments(delta):
+    updates = {}
+    for field, value in delta.items():
+        expression = F(field) + value
+        if value < 0:
+            # Never let a drifted row go below zero and trip the
+            # PositiveIntegerField check constraint.
+            expression = Greatest(
+                expression,
+                Value(0),
+                output_field=DailySummary._meta.get_field(field)
+            )
+        updates[field] = expression
+    return updates
+
+
+def apply_delta(user_id, date, delta):
+    """Add ``delta`` to the summary row for ``user_id`` on ``date``"""
+    delta = {field: value for field, value in delta.items() if value}
+    if not delta:
+        return
+    rows = DailySummary.objects.filter(user_id=user_id, date=date)
+    if rows.update(**_increments(delta)):
+        return
+    _, created = DailySummary.objects.get_or_create(
+        user_id=user_id,
+        date=date,
+        defaults={
+            field: max(value, 0) for field, value in delta.items()
+        }
+    )
+    if not created:
+        # Another request created the row between our UPDATE and INSERT
+        rows.update(**_increments(delta))
+
+
+def record(added=(), removed=()):
+    """Apply the contributions of added and removed entries.
+
+    Entries are grouped by (user, date) so each affected summary row is
+    written once no matter how many entries touch it.
+    """
+    totals = defaultdict(lambda: defaultdict(int))
+    for sign, instances in ((1, added), (-1, removed)):
+        for instance in instances:
+            key = (instance.user_id, _field_value(instance, 'date'))
+            for field, value in contribution(instance).items():
+                totals[key][field] += sign * value
+    changed = defaultdict(set)
+    for (user_id, date), delta in totals.items():
+        apply_delta(user_id, date, delta)
+        changed[user_id].add(date)
+    for user_id, dates in changed.items():
+        summaries_changed.send(
+            sender=DailySummary, user_id=user_id, dates=dates
+        )
+
+
+def compute(activities=None, nutrition=None):
+    """Aggregate raw entries into {(user_id, date): totals}"""
+    if activities is None:
+        activities = Activity.objects.all()
+    if nutrition is None:
+        nutrition = NutritionEntry.objects.all()
+
+    totals = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+    for queryset, aggregates in (
+        (activities, ACTIVITY_TOTALS),
+        (nutrition, NUTRITION_TOTALS),
+    ):
+        rows = queryset.order_by().values('user_id', 'date').annotate(**{
+            f'summary_{field}': aggregate
+            for field, aggregate in aggregates.items()
+        })
+        for row in rows:
+            day = totals[(row['user_id'], row['date'])]
+            for field in aggregates:
+                day[field] = row[f'summary_{field}'] or 0
+    return totals
+
+
+def _replace(summaries, totals):
+    with transaction.atomic():
+        summaries.delete()
+        DailySummary.objects.bulk_create(
+            [
+                DailySummary(user_id=user_id, date=date, **values)
+                for (user_id, date), values in totals.items()
+            ],
+            batch_size=1000
+        )
+
+
+def refresh_days(user_id, dates):
+    """Recompute the summaries for ``user_id`` on ``dates`` from raw rows.
+
+    Rows are upserted rather than deleted and re-inserted so concurrent
+    refreshes of the same day cannot collide on the (user, date) key.
+    """
+    dates = set(dates)
+    if not dates:
+        return
+    totals = compute(
+        Activity.objects.filter(user_id=user_id, date__in=dates),
+        NutritionEntry.objects.filter(user_id=user_id, date__in=dates),
+    )
+    with transaction.atomic():
+        DailySummary.objects.filter(
+            user_id=user_id,
+            date__in=dates - {date for _, date in totals}
+        ).delete()
+        DailySummary.objects.bulk_create(
+            [
+                DailySummary(user_id=user_id, date=date, **values)
+                for (_, date), values in totals.items()
+            ],
+            update_conflicts=True,
+            unique_fields=['user', 'date'],
+            update_fields=SUMMARY_FIELDS
+        )
+    summaries_changed.send(sender=DailySummary, user_id=user_id, dates=dates)
+
+
+def rebuild(users=None):
+    """Recompute all summaries, optionally limited to ``users``"""
+    activities = Activity.objects.all()
+    nutrition = NutritionEntry.objects.all()
+    summaries = DailySummary.objects.all()
+    if users is not None:
+        activities = activities.filter(user__in=users)
+        nutrition = nutrition.filter(user__in=users)
+        summaries = summaries.filter(user__in=users)
+    totals = compute(activities, nutrition)
+    _replace(summaries, totals)
+    return len(totals)
+
+
+def verify(users=None):
+    """Compare stored summaries with raw rows.
+
+    Returns a list of ``(user_id, date, field, expected, stored)`` tuples.
+    A missing row is treated the same as a row of zeros.
+    """
+    activities = Activity.objects.all()
+    nutrition = NutritionEntry.objects.all()
+    summaries = DailySummary.objects.all()
+    if users is not None:
+        activities = activities.filter(user__in=users)
+        nutrition = nutrition.filter(user__in=users)
+        summaries = summaries.filter(user__in=users)
+    expected = compute(activities, nutrition)
+    stored = {
+        (row['user_id'], row['date']): row
+        for row in summaries.values('user_id', 'date', *SUMMARY_FIELDS)
+    }
+
+    mismatches = []
+    for key in sorted(set(expected) | set(stored), key=str):
+        want = expected.get(key, {})
+        have = stored.get(key, {})
+        for field in SUMMARY_FIELDS:
+            # SQLite sums decimals as floats; compare at the stored precision
+            value = want.get(field, 0)
+            places = getattr(
+                DailySummary._meta.get_field(field), 'decimal_places', None
+            )
+            if places is not None:
+                value = round(Decimal(value), places)
+            if value != have.get(field, 0):
+                mismatches.append(
+                    (key[0], key[1], field, value, have.get(field, 0))
+                )
+    return mismatches
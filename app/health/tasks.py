@@ -0,0 +1,96 @@
+"""Background tasks run by ``manage.py run_workers`` (see ``health.jobs``)."""
+import tempfile
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import storages
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from . import caching, exports, progress, summaries
+from .jobs import periodic, task
+from .models import Job
+
+# Seconds between sweeps for expired exports
+PURGE_INTERVAL = 3600
+
+
+@task()
+def refresh_goal_progress(job):
+    """Recompute a user's streaks and adherence from their summaries"""
+    goal_progress = progress.refresh(job.user_id)
+    caching.invalidate(job.user_id)
+    return {'computed_on': goal_progress.computed_on.isoformat()}
+
+
+@task()
+def rebuild_daily_summaries(job):
+    """Rebuild DailySummary rows (one user's, or everyone's) and progress"""
+    users = None
+    if job.user_id is not None:
+        users = User.objects.filter(pk=job.user_id)
+    count = summaries.rebuild(users)
+    progress.refresh_users(users)
+    if job.user_id is not None:
+        caching.invalidate(job.user_id)
+    return {'rows': count}
+
+
+def export_storage():
+    """Storage shared by the web and job workers for export files"""
+    return storages['exports']
+
+
+def export_path(job):
+    kind, file_format = job.payload['kind'], job.payload['file_format']
+    return f'exports/{job.user_id}/{job.pk}-{kind}.{file_format}'
+
+
+@task()
+def export_data(job):
+    """Write an export to storage for download through the jobs API"""
+    payload = job.payload
+    pieces = exports.stream_export(
+        job.user,
+        payload['kind'],
+        payload['file_format'],
+        parse_date(payload['start']) if payload.get('start') else None,
+        parse_date(payload['end']) if payload.get('end') else None,
+    )
+    with tempfile.TemporaryFile() as spool:
+        for piece in pieces:
+            spool.write(piece.encode())
+        size = spool.tell()
+        spool.seek(0)
+        name = export_storage().save(export_path(job), File(spool))
+    return {'file': name, 'size': size}
+
+
+@periodic(PURGE_INTERVAL)
+def purge_exports():
+    """Delete export files older than HEALTH_EXPORT_RETENTION_DAYS
+
+    The jobs are kept, with ``expired`` in place of ``file`` in their
+    result.  Returns the number of files deleted.
+    """
+    cutoff = timezone.now() - timedelta(
+        days=settings.HEALTH_EXPORT_RETENTION_DAYS
+    )
+    expired = Job.objects.filter(
+        task=export_data.task_name,
+        status=Job.SUCCEEDED,
+        finished_at__lt=cutoff,
+        result__has_key='file',
+    )
+    storage = export_storage()
+    count = 0
+    for job in expired.iterator():
+        result = dict(job.result)
+        storage.delete(result.pop('file'))
+        Job.objects.filter(pk=job.pk).update(
+            result={**result, 'expired': True}
+        )
+        count += 1
+    return count
@@ -0,0 +1,45 @@
+"""Tests for the health app, one ``test_*`` module per feature.
+
+Imports are absolute: ``manage.py test`` discovers this package as
+``health.tests`` while the app itself is installed as ``app.health``.
+Helpers shared by the modules live here.
+"""
+from decimal import Decimal
+
+from app.health.models import Activity, NutritionEntry
+
+ACTIVITY = {
+    'activity_type': 'run',
+    'duration': 10,
+    'calories_burned': 100,
+    'date': '2026-01-01',
+}
+MEAL = {
+    'food_name': 'Oats',
+    'calories': 5,
+    'quantity': '1',
+    'date': '2026-01-02',
+    'meal_type': 'lunch',
+}
+
+
+def add_activity(user, day, calories=300):
+    return Activity.objects.create(
+        user=user,
+        activity_type='run',
+        duration=30,
+        calories_burned=calories,
+        date=day,
+    )
+
+
+def add_meal(user, day, calories=500):
+    return NutritionEntry.objects.create(
+        user=user,
+        food_name='Oats',
+        calories=calories,
+        protein=Decimal('20.5'),
+        quantity=1,
+        date=day,
+        meal_type='lunch',
+    )
@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import analytics, caching
+from app.health.seeding import seed_user
+from app.health.tests import add_activity, add_meal
+
+
+class BucketTotalsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('analytics', password='x')
+        add_activity(cls.user, date(2026, 1, 5), calories=300)  # a Monday
+        add_activity(cls.user, date(2026, 1, 7), calories=200)
+        add_activity(cls.user, date(2026, 2, 2), calories=100)
+        add_meal(cls.user, date(2026, 1, 6), calories=500)
+
+    def totals(self, start, end, period, source='rollup'):
+        return [
+            (bucket['start'], bucket['calories_burned'],
+             bucket['calories_consumed'])
+            for bucket in analytics.bucket_totals(
+                self.user, start, end, period, source
+            )
+        ]
+
+    def test_days_include_empty_buckets(self):
+        self.assertEqual(
+            self.totals(date(2026, 1, 5), date(2026, 1, 8), 'day'),
+            [
+                (date(2026, 1, 5), 300, 0),
+                (date(2026, 1, 6), 0, 500),
+                (date(2026, 1, 7), 200, 0),
+                (date(2026, 1, 8), 0, 0),
+            ]
+        )
+
+    def test_weeks_and_months(self):
+        self.assertEqual(
+            self.totals(date(2026, 1, 7), date(2026, 1, 14), 'week'),
+            [(date(2026, 1, 5), 200, 0), (date(2026, 1, 12), 0, 0)]
+        )
+        self.assertEqual(
+            self.totals(date(2026, 1, 1), date(2026, 2, 28), 'month'),
+            [(date(2026, 1, 1), 500, 500), (date(2026, 2, 1), 100, 0)]
+        )
+
+    def test_one_query_per_source_table(self):
+        with self.assertNumQueries(1):
+            analytics.bucket_totals(
+                self.user, date(2026, 1, 1), date(2026, 3, 1), 'week'
+            )
+        with self.assertNumQueries(2):
+            analytics.bucket_totals(
+                self.user, date(2026, 1, 1), date(2026, 3, 1), 'week', 'raw'
+            )
+
+    def test_rollup_matches_raw(self):
+        seed_user(self.user, days=100, end=date(2026, 3, 31), seed=3)
+        for period in analytics.PERIODS:
+            with self.subTest(period=period):
+                start, end = date(2026, 1, 1), date(2026, 3, 31)
+                self.assertEqual(
+                    analytics.bucket_totals(self.user, start, end, period),
+                    analytics.bucket_totals(
+                        self.user, start, end, period, 'raw'
+                    )
+                )
+
+
+class AnalyticsApiTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('analytics-api', password='x')
+        self.client.force_login(self.user)
+
+    def test_buckets(self):
+        add_activity(self.user, date(2026, 1, 5), calories=300)
+        response = self.client.get(
+            '/api/analytics/week/',
+            {'start': '2026-01-01', 'end': '2026-01-31'}
+        )
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual((body['period'], body['source']), ('week', 'rollup'))
+        self.assertEqual(
+            [bucket['start'] for bucket in body['buckets']],
+            ['2025-12-29', '2026-01-05', '2026-01-12', '2026-01-19',
+             '2026-01-26']
+        )
+        self.assertEqual(body['buckets'][1]['calories_burned'], 300)
+
+    def test_default_window(self):
+        body = self.client.get('/api/analytics/day/').json()
+        self.assertEqual(len(body['buckets']), 30)
+        start, end = map(date.fromisoformat, [body['start'], body['end']])
+        self.assertEqual(end - start, timedelta(days=29))
+
+    def test_invalid_queries(self):
+        self.assertEqual(
+            self.client.get('/api/analytics/year/').status_code, 404
+        )
+        for query in [
+            {'start': '2026-02-01', 'end': '2026-01-01'},
+            {'start': '2000-01-01', 'end': '2026-01-01'},
+            {'source': 'guess'},
+        ]:
+            with self.subTest(query=query):
+                response = self.client.get('/api/analytics/day/', query)
+                self.assertEqual(response.status_code, 400)
+
+    def test_cached_until_data_changes(self):
+        query = {'start': '2026-01-01', 'end': '2026-01-10'}
+        self.client.get('/api/analytics/day/', query)
+        with self.assertNumQueries(2):  # session and user
+            self.client.get('/api/analytics/day/', query)
+        with self.captureOnCommitCallbacks(execute=True):
+            add_activity(self.user, date(2026, 1, 2), calories=50)
+        body = self.client.get('/api/analytics/day/', query).json()
+        self.assertEqual(body['buckets'][1]['calories_burned'], 50)
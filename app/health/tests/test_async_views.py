@@ -0,0 +1,116 @@
+from io import StringIO
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from app.health import caching
+from app.health.models import UserGoal
+from app.health.seeding import seed_user
+from app.health.services import DashboardService
+from app.health.timezones import local_today
+
+
+class AsyncApiTests(TestCase):
+    """The ``/api/async/`` endpoints answer like their DRF counterparts"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('async', password='x')
+        UserGoal.objects.create(user=cls.user)
+        seed_user(cls.user, days=20, seed=1)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_login(self.user)
+
+    async def get_both(self, path):
+        """The async endpoint's response and the DRF one's, as JSON"""
+        response = await self.async_client.get(path)
+        expected = await sync_to_async(self.client.get)(
+            path.replace('/async/', '/')
+        )
+        self.assertEqual(response.status_code, expected.status_code)
+        data = response.json()
+        if isinstance(data, dict):
+            for link in ('next', 'previous'):
+                if data.get(link):
+                    data[link] = data[link].replace('/async/', '/')
+        return data, expected.json()
+
+    async def test_dashboard(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get('/api/async/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        expected = await sync_to_async(self.client.get)('/api/dashboard/')
+        self.assertEqual(response.json(), expected.json())
+        self.assertEqual(response['ETag'], expected['ETag'])
+        response = await self.async_client.get(
+            '/api/async/dashboard/',
+            headers={'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    async def test_lists_and_details(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        for path in ['/api/async/activities/',
+                     '/api/async/nutrition/?page_size=7&fields=id,calories']:
+            with self.subTest(path=path):
+                data, expected = await self.get_both(path)
+                self.assertEqual(data, expected)
+                next_page = (await self.async_client.get(path)).json()['next']
+                data, expected = await self.get_both(next_page)
+                self.assertEqual(data, expected)
+                pk = data['results'][0]['id']
+                base = path.split('?')[0]
+                data, expected = await self.get_both(f'{base}{pk}/')
+                self.assertEqual(data, expected)
+
+    async def test_errors(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        for path, status in [('/api/async/activities/999999/', 404),
+                             ('/api/async/activities/?cursor=zz', 404),
+                             ('/api/async/activities/?fields=nope', 400),
+                             ('/api/async/nutrition/?meal_type=x', 400)]:
+            with self.subTest(path=path):
+                response = await self.async_client.get(path)
+                self.assertEqual(response.status_code, status)
+        response = await self.async_client.post('/api/async/activities/')
+        self.assertEqual(response.status_code, 405)
+        await sync_to_async(self.async_client.logout)()
+        response = await self.async_client.get('/api/async/activities/')
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(HEALTH_METRICS_SAMPLE_RATE=1, HEALTH_SERVER_TIMING=True)
+    async def test_queries_are_measured(self):
+        await sync_to_async(self.async_client.force_login)(self.user)
+        response = await self.async_client.get('/api/async/activities/')
+        self.assertNotIn('desc="0 queries"', response['Server-Timing'])
+
+    async def test_aload_matches_load(self):
+        day = await sync_to_async(local_today)(self.user.pk)
+        service = DashboardService(self.user, day)
+        await service.aload()
+        expected = await sync_to_async(
+            lambda: DashboardService(self.user, day).payload()
+        )()
+        self.assertEqual(service.payload(), expected)
+
+
+class ExplainQueriesTests(TestCase):
+    def test_async_detail_routes_are_replayed(self):
+        stdout = StringIO()
+        call_command(
+            'explain_queries', '--days', '2',
+            '--route', 'api_async_activity_detail',
+            '--route', 'api_async_nutrition_detail',
+            stdout=stdout
+        )
+        output = stdout.getvalue()
+        self.assertNotIn('skipped', output)
+        self.assertRegex(
+            output, r'== api_async_activity_detail GET '
+                    r'/api/async/activities/\d+/ -> 200'
+        )
+        self.assertIn('== api_async_nutrition_detail GET', output)
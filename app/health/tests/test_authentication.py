@@ -0,0 +1,86 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app.health import caching
+from app.health.authentication import issue_token, token_cache
+from app.health.models import ApiToken
+from app.health.tests import add_activity
+
+
+class TokenAuthTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        token_cache.clear()
+        self.user = User.objects.create_user('token', password='pw-123456')
+        add_activity(self.user, date(2024, 1, 1))
+
+    def bearer(self, key):
+        return {'HTTP_AUTHORIZATION': f'Bearer {key}'}
+
+    def test_login_issues_token(self):
+        response = self.client.post(
+            '/api/auth/token/', {'username': 'token', 'password': 'bad'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            '/api/auth/token/',
+            {'username': 'token', 'password': 'pw-123456', 'name': 'phone'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        key = response.json()['token']
+        self.assertNotEqual(ApiToken.objects.get().digest, key)
+        response = self.client.get('/api/activities/', **self.bearer(key))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+
+    def test_cached_token_skips_database(self):
+        _token, key = issue_token(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.get('/api/activities/', **self.bearer(key))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/activities/', **self.bearer(key))
+        self.assertEqual(response.status_code, 200)
+        tables = ['health_apitoken', 'auth_user', 'django_session']
+        self.assertFalse([
+            query['sql'] for query in queries
+            if any(table in query['sql'] for table in tables)
+        ])
+
+    def test_invalid_and_expired_tokens(self):
+        response = self.client.get('/api/activities/', **self.bearer('nope'))
+        self.assertEqual(response.status_code, 403)
+        token, key = issue_token(self.user, expires_in=timedelta(days=1))
+        ApiToken.objects.filter(pk=token.pk).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.client.get('/api/activities/', **self.bearer(key))
+        self.assertEqual(response.status_code, 403)
+
+    def test_revocation(self):
+        token, key = issue_token(self.user)
+        self.assertEqual(
+            self.client.get('/api/tokens/', **self.bearer(key)).status_code,
+            200
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/tokens/{token.pk}/',
+                                          **self.bearer(key))
+        self.assertEqual(response.status_code, 204)
+        response = self.client.get('/api/activities/', **self.bearer(key))
+        self.assertEqual(response.status_code, 403)
+
+    def test_deactivated_user(self):
+        _token, key = issue_token(self.user)
+        self.client.get('/api/activities/', **self.bearer(key))
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get('/api/activities/', **self.bearer(key))
+        self.assertEqual(response.status_code, 403)
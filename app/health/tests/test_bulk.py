@@ -0,0 +1,87 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from app.health import caching, summaries
+from app.health.models import Activity, NutritionEntry
+from app.health.tests import ACTIVITY, MEAL
+from app.health.timezones import local_today
+
+
+class BulkTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('bulk', password='x')
+        self.client.force_login(self.user)
+
+    def post(self, path, data, **extra):
+        return self.client.post(
+            path, json.dumps(data), content_type='application/json', **extra
+        )
+
+    def test_bulk_json(self):
+        items = [
+            {**ACTIVITY, 'duration': 10 + index,
+             'date': f'2026-01-{1 + index % 28:02d}'}
+            for index in range(60)
+        ]
+        response = self.post('/api/activities/bulk/', items)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()['created'], 60)
+        self.assertEqual(len(response.json()['ids']), 60)
+        self.assertEqual(summaries.verify(), [])
+
+    def test_bulk_ndjson(self):
+        body = '\n'.join(json.dumps(MEAL) for _ in range(20))
+        response = self.client.post(
+            '/api/nutrition/bulk/', body, content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(NutritionEntry.objects.count(), 20)
+        self.assertEqual(summaries.verify(), [])
+
+    def test_bulk_is_all_or_nothing(self):
+        items = [MEAL, {**MEAL, 'meal_type': 'brunch'}]
+        response = self.post('/api/nutrition/bulk/', items)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in
+                          response.json()['errors']], [1])
+        self.assertFalse(NutritionEntry.objects.exists())
+
+    def test_bulk_rejects_bad_bodies(self):
+        self.assertEqual(
+            self.post('/api/nutrition/bulk/', {'a': 1}).status_code, 400
+        )
+        response = self.client.post(
+            '/api/nutrition/bulk/', 'nope\n',
+            content_type='application/x-ndjson'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_limits(self):
+        with override_settings(HEALTH_BULK_MAX_ITEMS=2):
+            response = self.post('/api/activities/bulk/', [ACTIVITY] * 3)
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(
+                '/api/activities/bulk/',
+                '\n'.join(json.dumps(ACTIVITY) for _ in range(3)),
+                content_type='application/x-ndjson'
+            )
+            self.assertEqual(response.status_code, 400)
+        with override_settings(HEALTH_BULK_MAX_BYTES=10):
+            response = self.post('/api/activities/bulk/', [ACTIVITY])
+            self.assertEqual(response.status_code, 413)
+        self.assertFalse(Activity.objects.exists())
+
+    def test_bulk_refreshes_dashboard(self):
+        self.client.get('/api/dashboard/')
+        today = local_today(self.user.pk).isoformat()
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post('/api/activities/bulk/', [
+                {**ACTIVITY, 'date': today},
+                {**ACTIVITY, 'date': today},
+            ])
+        self.assertEqual(response.status_code, 201, response.content)
+        stats = self.client.get('/api/dashboard/').json()['today_stats']
+        self.assertEqual(stats['calories_burned'], 200)
@@ -0,0 +1,86 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from app.health import caching
+from app.health.models import UserGoal
+from app.health.tests import add_activity
+from app.health.timezones import local_today
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+
+    def test_bump_changes_version(self):
+        version = caching.data_version(1)
+        self.assertEqual(caching.data_version(1), version)
+        caching.bump_data_version(1)
+        self.assertNotEqual(caching.data_version(1), version)
+        self.assertNotEqual(caching.data_version(2), caching.data_version(1))
+
+    def test_invalidate_waits_for_commit(self):
+        version = caching.data_version(1)
+        with self.captureOnCommitCallbacks() as callbacks:
+            caching.invalidate(1)
+        self.assertEqual(caching.data_version(1), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(caching.data_version(1), version)
+
+    def test_lost_version_is_not_reused(self):
+        version = caching.data_version(1)
+        caching.get_cache().clear()
+        self.assertGreater(caching.data_version(1), version)
+
+    def test_versions_expire_only_in_per_process_caches(self):
+        with override_settings(HEALTH_DASHBOARD_CACHE_TIMEOUT=60):
+            self.assertEqual(caching._version_timeout(), 60)
+        shared = {
+            'default': {
+                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                'LOCATION': 'health_cache',
+            },
+        }
+        with override_settings(CACHES=shared):
+            self.assertIsNone(caching._version_timeout())
+
+
+class DashboardETagTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('etag', password='x')
+        self.client.force_login(self.user)
+        self.today = local_today(self.user.pk)
+
+    def test_not_modified_until_data_changes(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/dashboard/',
+                                       HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertFalse(any('health_' in query['sql'] for query in queries))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            add_activity(self.user, self.today)
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()['today_stats']['calories_burned'],
+                         300)
+
+    def test_goal_change_invalidates(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            UserGoal.objects.create(user=self.user)
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(response.json()['user_goal'])
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get('/api/dashboard/')['ETag']
+        other = User.objects.create_user('etag2', password='x')
+        self.client.force_login(other)
+        response = self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
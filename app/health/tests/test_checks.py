@@ -0,0 +1,32 @@
+from django.test import SimpleTestCase, override_settings
+
+from app.health import checks
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+}}
+DATABASE = {'default': {
+    'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+    'LOCATION': 'health_cache',
+}}
+
+
+class SharedCacheCheckTests(SimpleTestCase):
+    def ids(self, check):
+        return [message.id for message in check(None)]
+
+    @override_settings(HEALTH_REQUIRE_SHARED_CACHE=True, CACHES=LOCMEM)
+    def test_per_process_cache_is_an_error(self):
+        self.assertEqual(self.ids(checks.check_shared_cache), ['health.E001'])
+        self.assertEqual(self.ids(checks.check_database_cache), [])
+
+    @override_settings(HEALTH_REQUIRE_SHARED_CACHE=True, CACHES=DATABASE)
+    def test_database_cache_is_reported(self):
+        self.assertEqual(self.ids(checks.check_shared_cache), [])
+        self.assertEqual(
+            self.ids(checks.check_database_cache), ['health.W002']
+        )
+
+    @override_settings(HEALTH_REQUIRE_SHARED_CACHE=False, CACHES=DATABASE)
+    def test_not_required(self):
+        self.assertEqual(self.ids(checks.check_database_cache), [])
@@ -0,0 +1,95 @@
+import datetime
+import gzip
+import unittest
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from app.health.middleware import brotli
+from app.health.renderers import FastJSONRenderer
+from app.health.seeding import seed_user
+
+LIST = '/api/activities/?page_size=50'
+
+
+@override_settings(HEALTH_COMPRESSION_MIN_BYTES=1024)
+class CompressionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('compress', password='x')
+        seed_user(cls.user, days=30, seed=1)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_gzip(self):
+        plain = self.client.get(LIST)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        response = self.client.get(LIST, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli(self):
+        plain = self.client.get(LIST)
+        response = self.client.get(LIST, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.content), plain.content)
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content)
+        )
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+    def test_html_stays_on_gzip(self):
+        response = self.client.get(
+            '/activities/', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+
+    def test_small_responses_are_not_compressed(self):
+        response = self.client.get(
+            '/api/goals/', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        self.assertLess(len(response.content), 1024)
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+    def test_etags_still_match(self):
+        response = self.client.get(
+            '/api/dashboard/', HTTP_ACCEPT_ENCODING='gzip, br'
+        )
+        response = self.client.get(
+            '/api/dashboard/', HTTP_ACCEPT_ENCODING='gzip, br',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def assertRendersLikeDRF(self, data, **kwargs):
+        self.assertEqual(
+            FastJSONRenderer().render(data, **kwargs),
+            JSONRenderer().render(data, **kwargs)
+        )
+
+    def test_output_matches_drf(self):
+        self.assertRendersLikeDRF({
+            'decimal': Decimal('5.50'),
+            'date': datetime.date(2026, 1, 2),
+            'datetime': datetime.datetime(
+                2026, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc
+            ),
+            'lazy': gettext_lazy('Activity'),
+            'text': 'caf\u00e9 \u2028 \u2029',
+            'big': 2 ** 70,
+            'nested': [{'a': None, 'b': 1.5, 'c': True}],
+        })
+
+    def test_indented_output_is_left_to_drf(self):
+        self.assertRendersLikeDRF(
+            {'a': [1, 2]}, accepted_media_type='application/json; indent=2'
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b'')
@@ -0,0 +1,76 @@
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import benchmarking, caching, progress
+from app.health.detector import (
+    QueryBudgetExceeded, QueryDetector, assert_max_queries,
+)
+from app.health.models import Activity
+from app.health.seeding import seed_user
+
+
+class QueryDetectorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('detector', password='x')
+        seed_user(cls.user, days=3, activities_per_day=(1, 1), seed=1)
+
+    def test_reports_repeated_queries(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, 'repeated'):
+            with QueryDetector(fail_on_repeats=True):
+                for activity in Activity.objects.filter(user=self.user):
+                    # One user query per activity
+                    activity.user.username
+
+    def test_budget(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, '2 queries'):
+            with assert_max_queries(1):
+                list(Activity.objects.all())
+                list(User.objects.all())
+        with assert_max_queries(1) as detector:
+            list(Activity.objects.select_related('user'))
+        self.assertEqual(detector.count, 1)
+
+
+class QueryBudgetTests(TestCase):
+    """The pages and API endpoints stay within their benchmark budgets"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('budget', password='x')
+        seed_user(cls.user, days=30, seed=1)
+        progress.refresh(cls.user.pk)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def test_routes_within_budget(self):
+        # A repeated fingerprint is the mark of an N+1 query
+        for name, url in benchmarking.resolve_routes(self.user):
+            budget = benchmarking.DEFAULT_BUDGETS[name]['queries']
+            with self.subTest(route=name):
+                # Budgets are for warm requests, as in the benchmark
+                self.client.get(url)
+                with assert_max_queries(budget, fail_on_repeats=True):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_cold_queries_independent_of_history(self):
+        names = ['dashboard', 'api_dashboard_stats', 'api_activity_list',
+                 'api_nutrition_list', 'api_goal_list']
+        routes = benchmarking.resolve_routes(self.user, names)
+        before = self.cold_counts(routes)
+        seed_user(self.user, days=90, seed=2)
+        # Bulk inserts skip the signals that keep goal progress current
+        progress.refresh(self.user.pk)
+        self.assertEqual(self.cold_counts(routes), before)
+
+    def cold_counts(self, routes):
+        counts = {}
+        for name, url in routes:
+            caching.get_cache().clear()
+            with QueryDetector() as detector:
+                self.client.get(url)
+            counts[name] = detector.count
+        return counts
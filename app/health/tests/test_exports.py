@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import caching, exports
+from app.health.models import UserGoal
+from app.health.tests import add_activity, add_meal
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exports', password='x')
+        cls.activities = [
+            add_activity(cls.user, date(2026, 1, day), calories=100 * day)
+            for day in [3, 1, 2]
+        ]
+        add_meal(cls.user, date(2026, 1, 1))
+        other = User.objects.create_user('exports2', password='x')
+        add_activity(other, date(2026, 1, 1))
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def download(self, path, query=None):
+        response = self.client.get(path, query or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_csv(self):
+        response, body = self.download('/api/export/activities.csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertIn('filename="activities.csv"',
+                      response['Content-Disposition'])
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(
+            [(row['date'], row['calories_burned']) for row in rows],
+            [('2026-01-01', '100'), ('2026-01-02', '200'),
+             ('2026-01-03', '300')]
+        )
+
+    def test_ndjson_with_range(self):
+        _response, body = self.download(
+            '/api/export/activities.ndjson',
+            {'start': '2026-01-02', 'end': '2026-01-02'}
+        )
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(
+            (rows[0]['date'], rows[0]['calories_burned']), ('2026-01-02', 200)
+        )
+        self.assertEqual(set(rows[0]), set(exports.EXPORTS['activities'][1]))
+
+    def test_nutrition_and_goals(self):
+        UserGoal.objects.create(user=self.user)
+        _response, body = self.download('/api/export/nutrition.csv')
+        self.assertEqual(len(body.splitlines()), 2)
+        _response, body = self.download('/api/export/goals.ndjson')
+        self.assertEqual(len(body.splitlines()), 1)
+
+    def test_invalid_requests(self):
+        response = self.client.get(
+            '/api/export/activities.csv',
+            {'start': '2026-02-01', 'end': '2026-01-01'}
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            self.client.get('/api/export/weights.csv').status_code, 404
+        )
+        self.client.logout()
+        self.assertEqual(
+            self.client.get('/api/export/activities.csv').status_code, 403
+        )
+
+    def test_rows_are_read_lazily(self):
+        with self.assertNumQueries(0):
+            pieces = exports.stream_export(self.user, 'activities', 'csv')
+        with self.assertNumQueries(1):
+            body = ''.join(pieces)
+        self.assertEqual(len(body.splitlines()), 4)
+
+    def test_buffered(self):
+        pieces = list(exports.buffered(['ab', 'cd', 'e'], size=3))
+        self.assertEqual(pieces, ['abcd', 'e'])
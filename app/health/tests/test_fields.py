@@ -0,0 +1,116 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app.health.models import Activity, NutritionEntry
+from app.health.serializers import (
+    ActivitySerializer, NutritionEntrySerializer, ValuesSerializer,
+)
+
+LISTS = [
+    ('activities', Activity, ActivitySerializer),
+    ('nutrition', NutritionEntry, NutritionEntrySerializer),
+]
+
+
+class ValuesReadTests(TestCase):
+    """Lists and details are read from ``.values()`` rows"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fields', password='x')
+        for i in range(12):
+            day = date(2026, 1, 1 + i % 5)
+            Activity.objects.create(
+                user=cls.user, activity_type='run', duration=10,
+                calories_burned=None if i % 4 == 0 else i,
+                distance=Decimal('1.5') if i % 2 else None,
+                notes='x' * 500, date=day
+            )
+            NutritionEntry.objects.create(
+                user=cls.user, food_name='Oats', calories=i,
+                protein=Decimal('3.10'), quantity=Decimal('100'), date=day,
+                meal_type='lunch'
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_output_matches_the_model_serializer(self):
+        for base in ('/api/', '/api/async/'):
+            for kind, model, serializer_class in LISTS:
+                with self.subTest(url=base + kind):
+                    rows, url = [], f'{base}{kind}/?page_size=5'
+                    while url:
+                        page = self.client.get(url).json()
+                        rows += page['results']
+                        url = page['next']
+                    expected = serializer_class(
+                        model.objects.filter(user=self.user)
+                        .order_by('-date', '-id'),
+                        many=True
+                    ).data
+                    self.assertEqual(rows, json.loads(json.dumps(expected)))
+                    detail = self.client.get(f"{base}{kind}/{rows[3]['id']}/")
+                    self.assertEqual(detail.json(), rows[3])
+
+    def test_sparse_fieldset(self):
+        for base in ('/api/', '/api/async/'):
+            with self.subTest(base=base):
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(
+                        base + 'activities/?fields=id,calories_burned'
+                        '&page_size=2'
+                    )
+                row = response.json()['results'][0]
+                self.assertEqual(list(row), ['id', 'calories_burned'])
+                sql = next(
+                    query['sql'] for query in captured.captured_queries
+                    if 'health_activity' in query['sql']
+                )
+                self.assertNotIn('notes', sql)
+
+                activity = Activity.objects.first()
+                response = self.client.get(
+                    f'{base}activities/{activity.pk}/?fields=date'
+                )
+                self.assertEqual(
+                    response.json(), {'date': activity.date.isoformat()}
+                )
+
+    def test_unknown_fields(self):
+        for base in ('/api/', '/api/async/'):
+            with self.subTest(base=base):
+                response = self.client.get(
+                    base + 'activities/?fields=id,bogus'
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(
+                    response.json(), {'fields': ['Unknown field(s): bogus.']}
+                )
+
+    def test_writes_return_every_field(self):
+        response = self.client.post(
+            '/api/activities/?fields=id',
+            {'activity_type': 'swim', 'duration': 1, 'date': '2026-01-01'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('notes', response.json())
+
+    def test_values_serializer(self):
+        serializer = ValuesSerializer(
+            NutritionEntrySerializer, ['protein', 'date']
+        )
+        self.assertEqual(serializer.columns, ['protein', 'date'])
+        self.assertEqual(
+            serializer.to_representation(
+                {'protein': Decimal('3.10'), 'date': date(2026, 1, 2)}
+            ),
+            {'protein': '3.10', 'date': '2026-01-02'}
+        )
@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health.models import Activity, NutritionEntry
+
+
+class EntryFilterTests(TestCase):
+    """``/api/`` and ``/api/async/`` lists filter and search alike"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('filters', password='x')
+        for i in range(10):
+            day = date(2026, 1, i + 1)
+            Activity.objects.create(
+                user=cls.user, activity_type='running' if i % 2 else 'Cycling',
+                duration=10, calories_burned=i * 100, date=day
+            )
+            NutritionEntry.objects.create(
+                user=cls.user,
+                food_name=f'Apple pie {i}' if i % 3 else 'banana',
+                calories=i * 50, quantity=1, date=day,
+                meal_type='lunch' if i % 2 else 'snack'
+            )
+        other = User.objects.create_user('other', password='x')
+        Activity.objects.create(
+            user=other, activity_type='running', duration=1,
+            date=date(2026, 1, 2)
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def results(self, path, field):
+        for base in ('/api/', '/api/async/'):
+            with self.subTest(base=base):
+                response = self.client.get(base + path)
+                self.assertEqual(response.status_code, 200, response.content)
+                yield [row[field] for row in response.json()['results']]
+
+    def test_exact_range_and_calories(self):
+        for dates in self.results(
+            'activities/?activity_type=running&min_calories=300'
+            '&end=2026-01-08', 'date'
+        ):
+            self.assertEqual(dates, ['2026-01-08', '2026-01-06', '2026-01-04'])
+
+    def test_search_is_case_insensitive_and_paginated(self):
+        for base in ('/api/', '/api/async/'):
+            with self.subTest(base=base):
+                page = self.client.get(
+                    base + 'activities/?search=YCL&page_size=2'
+                ).json()
+                self.assertEqual(len(page['results']), 2)
+                self.assertIn('search=YCL', page['next'])
+                rest = self.client.get(page['next']).json()['results']
+                self.assertEqual(
+                    {row['activity_type'] for row in rest}, {'Cycling'}
+                )
+
+    def test_prefix_and_choice(self):
+        for calories in self.results(
+            'nutrition/?prefix=apple&meal_type=lunch&max_calories=300',
+            'calories'
+        ):
+            self.assertEqual(sorted(calories), [50, 250])
+
+    def test_invalid_parameters(self):
+        for path in ['nutrition/?meal_type=brunch',
+                     'activities/?start=2026-02-01&end=2026-01-01',
+                     'activities/?min_calories=5&max_calories=1',
+                     'activities/?start=yesterday']:
+            for base in ('/api/', '/api/async/'):
+                with self.subTest(path=base + path):
+                    response = self.client.get(base + path)
+                    self.assertEqual(response.status_code, 400)
+
+    def test_detail_ignores_filters(self):
+        activity = Activity.objects.filter(
+            user=self.user, activity_type='running'
+        ).first()
+        response = self.client.get(
+            f'/api/activities/{activity.pk}/?activity_type=Cycling'
+        )
+        self.assertEqual(response.status_code, 200)
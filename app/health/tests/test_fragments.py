@@ -0,0 +1,58 @@
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from app.health import caching
+from app.health.models import UserGoal
+from app.health.seeding import seed_user
+from app.health.tests import add_activity
+from app.health.timezones import local_today
+
+
+class FragmentCacheTests(TestCase):
+    """Dashboard panels and list bodies are cached per data version"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('fragments', password='x')
+        UserGoal.objects.create(user=cls.user)
+        seed_user(cls.user, days=10, seed=1)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_login(self.user)
+
+    def test_warm_pages_skip_queries(self):
+        for path in ['/dashboard/', '/activities/', '/nutrition/']:
+            with self.subTest(path=path):
+                with CaptureQueriesContext(connection) as cold:
+                    first = self.client.get(path)
+                with CaptureQueriesContext(connection) as warm:
+                    second = self.client.get(path)
+                self.assertEqual(first.content, second.content)
+                self.assertLess(len(warm), len(cold))
+
+    def test_writes_show_up(self):
+        self.client.get('/dashboard/')
+        self.client.get('/activities/')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_zumba(self.user)
+        self.assertContains(self.client.get('/dashboard/'), 'Zumba')
+        self.assertContains(self.client.get('/activities/'), 'Zumba')
+
+    def test_users_do_not_share_fragments(self):
+        other = User.objects.create_user('other', password='x')
+        self.add_zumba(other)
+        self.assertNotContains(self.client.get('/activities/'), 'Zumba')
+        self.client.force_login(other)
+        self.assertContains(self.client.get('/activities/'), 'Zumba')
+
+    def add_zumba(self, user):
+        activity = add_activity(user, local_today(user.pk))
+        activity.activity_type = 'zumba'
+        activity.save()
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/activities/?cursor=zz')
+        self.assertEqual(response.status_code, 404)
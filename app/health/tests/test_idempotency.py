@@ -0,0 +1,92 @@
+import json
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import caching, summaries
+from app.health.models import Activity, NutritionEntry
+from app.health.tests import ACTIVITY, MEAL
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('bulk', password='x')
+        self.client.force_login(self.user)
+
+    def post(self, path, data, **extra):
+        return self.client.post(
+            path, json.dumps(data), content_type='application/json', **extra
+        )
+
+    def test_bulk_upserts_by_external_id(self):
+        self.post('/api/activities/bulk/', [{**ACTIVITY, 'external_id': 'a'}])
+        response = self.post('/api/activities/bulk/', [
+            {**ACTIVITY, 'external_id': 'a', 'duration': 50,
+             'date': '2026-01-05'},
+        ])
+        self.assertEqual(response.status_code, 201, response.content)
+        activity = Activity.objects.get()
+        self.assertEqual((activity.duration, activity.date),
+                         (50, date(2026, 1, 5)))
+        self.assertEqual(summaries.verify(), [])
+
+    def test_idempotency_key_replays_create(self):
+        first = self.post('/api/activities/', ACTIVITY,
+                          HTTP_IDEMPOTENCY_KEY='k1')
+        again = self.post('/api/activities/', {**ACTIVITY, 'duration': 20},
+                          HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(first.status_code, 201, first.content)
+        self.assertEqual(first.json()['id'], again.json()['id'])
+        self.assertEqual(Activity.objects.get().duration, 20)
+        self.assertEqual(Activity.objects.get().external_id, 'ik:k1')
+
+        other = User.objects.create_user('bulk2', password='x')
+        self.client.force_login(other)
+        self.post('/api/activities/', ACTIVITY, HTTP_IDEMPOTENCY_KEY='k1')
+        self.assertEqual(Activity.objects.count(), 2)
+
+    def test_idempotency_key_replays_bulk(self):
+        items = [ACTIVITY, {**ACTIVITY, 'date': '2026-01-02'}]
+        for _ in range(2):
+            response = self.post('/api/activities/bulk/', items,
+                                 HTTP_IDEMPOTENCY_KEY='batch')
+            self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(
+            sorted(Activity.objects.values_list('external_id', flat=True)),
+            ['ik:batch:0', 'ik:batch:1']
+        )
+        self.assertEqual(summaries.verify(), [])
+
+    def test_external_id_validation(self):
+        response = self.post('/api/activities/',
+                             {**ACTIVITY, 'external_id': 'ik:mine'})
+        self.assertEqual(response.status_code, 400)
+        first = self.post('/api/activities/', {**ACTIVITY, 'external_id': 'a'})
+        second = self.post('/api/activities/',
+                           {**ACTIVITY, 'external_id': 'b'})
+        url = f"/api/activities/{second.json()['id']}/"
+        response = self.client.patch(url, {'external_id': 'a'},
+                                     content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.put(url, {**ACTIVITY, 'external_id': 'b'},
+                                   content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(first.status_code, 201)
+
+    def test_nutrition_upsert_by_external_id(self):
+        for calories in [100, 250]:
+            response = self.post(
+                '/api/nutrition/',
+                {**MEAL, 'calories': calories, 'external_id': 'meal-1'}
+            )
+            self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(NutritionEntry.objects.get().calories, 250)
+        self.assertEqual(summaries.verify(), [])
+
+    def test_idempotency_key_too_long(self):
+        response = self.post('/api/activities/', ACTIVITY,
+                             HTTP_IDEMPOTENCY_KEY='k' * 91)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Activity.objects.exists())
@@ -0,0 +1,109 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from app.health import summaries
+from app.health.importing import save_checkpoint
+from app.health.models import Activity, NutritionEntry
+
+ACTIVITY_CSV = '''username,activity_type,duration,distance,calories_burned,date
+importer,run,30,5.25,300,2026-01-01
+importer,walk,20,,100,2026-01-01
+importer,swim,45,1.5,400,2026-01-02
+'''
+
+
+class ImportCommandTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('importer', password='x')
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as fh:
+            fh.write(content)
+        return path
+
+    def call(self, *args):
+        stdout, stderr = StringIO(), StringIO()
+        call_command('import_health_data', *args, stdout=stdout,
+                     stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_csv(self):
+        stdout, _stderr = self.call(
+            'activities', self.write('a.csv', ACTIVITY_CSV)
+        )
+        self.assertIn('Imported 3 of 3 rows', stdout)
+        self.assertEqual(
+            sorted(Activity.objects.values_list('activity_type', flat=True)),
+            ['run', 'swim', 'walk']
+        )
+        self.assertEqual(summaries.verify(), [])
+
+    def test_ndjson_with_invalid_rows(self):
+        rows = [
+            {'food_name': 'Oats', 'calories': 300, 'quantity': 1,
+             'date': '2026-01-01', 'meal_type': 'breakfast'},
+            {'food_name': 'Soup', 'calories': 200, 'quantity': 1,
+             'date': '2026-01-01', 'meal_type': 'brunch'},
+        ]
+        path = self.write(
+            'n.ndjson',
+            '\n'.join(json.dumps(row) for row in rows) + '\nnot json\n'
+        )
+        stdout, stderr = self.call('nutrition', path, '--user', 'importer')
+        self.assertIn('Imported 1 of 3 rows', stdout)
+        self.assertIn('row 2:', stderr)
+        self.assertIn('row 3: ', stderr)
+        self.assertEqual(NutritionEntry.objects.get().food_name, 'Oats')
+        self.assertEqual(summaries.verify(), [])
+
+    def test_external_ids_make_reimports_idempotent(self):
+        path = self.write('a.csv', ACTIVITY_CSV.replace(
+            'date\n', 'date,external_id\n'
+        ).replace('-01\n', '-01,a\n', 1))
+        self.call('activities', path)
+        self.call('activities', path)
+        self.assertEqual(Activity.objects.filter(external_id='a').count(), 1)
+        self.assertEqual(Activity.objects.count(), 5)
+
+    def test_resume_from_checkpoint(self):
+        checkpoint = os.path.join(self.directory, 'import.checkpoint')
+        save_checkpoint(checkpoint, 2)
+        stdout, _stderr = self.call(
+            'activities', self.write('a.csv', ACTIVITY_CSV),
+            '--checkpoint', checkpoint, '--batch-size', '1'
+        )
+        self.assertIn('skipped 2 already imported', stdout)
+        self.assertEqual(Activity.objects.get().activity_type, 'swim')
+        with open(checkpoint) as fh:
+            self.assertEqual(json.load(fh), {'rows': 3})
+
+    def test_dry_run(self):
+        stdout, _stderr = self.call(
+            'activities', self.write('a.csv', ACTIVITY_CSV), '--dry-run'
+        )
+        self.assertIn('Validated 3 of 3 rows', stdout)
+        self.assertFalse(Activity.objects.exists())
+
+    def test_errors(self):
+        with self.assertRaisesMessage(CommandError, 'too many errors'):
+            self.call(
+                'activities',
+                self.write('a.csv',
+                           ACTIVITY_CSV.replace('importer', 'nobody')),
+                '--max-errors', '2'
+            )
+        with self.assertRaisesMessage(CommandError, '--format'):
+            self.call('activities', self.write('a.txt', ACTIVITY_CSV))
+        with self.assertRaisesMessage(CommandError, 'Unknown user'):
+            self.call('activities', self.write('b.csv', ACTIVITY_CSV),
+                      '--user', 'nobody')
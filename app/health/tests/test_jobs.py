@@ -0,0 +1,209 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from app.health import caching, jobs, tasks
+from app.health.models import Job, StoredFile
+from app.health.tests import add_activity
+from app.health.timezones import local_today
+
+# Exports kept in the database, so tests leave MEDIA_ROOT alone
+DATABASE_EXPORTS = {
+    **settings.STORAGES,
+    'exports': {'BACKEND': 'app.health.storage.DatabaseStorage'},
+}
+
+
+@jobs.task(name='tests_always_fails', max_attempts=2)
+def always_fails(job):
+    raise RuntimeError('boom')
+
+
+class JobTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('jobs', password='x')
+
+    def test_claim(self):
+        job = jobs.enqueue('refresh_goal_progress', self.user)
+        jobs.enqueue('refresh_goal_progress', self.user, delay=60)
+        claimed = jobs.claim_next('w1')
+        self.assertEqual(
+            (claimed.pk, claimed.status, claimed.attempts, claimed.worker),
+            (job.pk, Job.RUNNING, 1, 'w1')
+        )
+        self.assertIsNotNone(claimed.heartbeat_at)
+        # The other job is not due yet
+        self.assertIsNone(jobs.claim_next('w2'))
+
+    def test_unique_enqueue(self):
+        first = jobs.enqueue('refresh_goal_progress', self.user, unique=True)
+        again = jobs.enqueue('refresh_goal_progress', self.user, unique=True)
+        self.assertEqual(first.pk, again.pk)
+        with self.assertRaises(jobs.UnknownTask):
+            jobs.enqueue('no_such_task')
+
+    def test_unique_enqueue_race(self):
+        winner = jobs.enqueue('refresh_goal_progress', self.user, unique=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Job.objects.create(
+                task=winner.task, run_after=winner.run_after,
+                unique_key=winner.unique_key
+            )
+        # A concurrent enqueue that looked before the winner committed
+        lookups = []
+        first = QuerySet.first
+
+        def missed_first(queryset):
+            lookups.append(queryset)
+            return None if len(lookups) == 1 else first(queryset)
+
+        with mock.patch.object(QuerySet, 'first', missed_first):
+            loser = jobs.enqueue(
+                'refresh_goal_progress', self.user, unique=True
+            )
+        self.assertEqual(loser.pk, winner.pk)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_unique_job_can_queue_while_one_runs(self):
+        first = jobs.enqueue('refresh_goal_progress', self.user, unique=True)
+        claimed = jobs.claim_next('w')
+        self.assertEqual(claimed.pk, first.pk)
+        self.assertIsNone(claimed.unique_key)
+        second = jobs.enqueue('refresh_goal_progress', self.user, unique=True)
+        self.assertNotEqual(second.pk, first.pk)
+        # A retry of the running job does not clash with the queued one
+        Job.objects.filter(pk=first.pk).update(status=Job.QUEUED)
+
+    def test_success_records_result(self):
+        job = jobs.enqueue('refresh_goal_progress', self.user)
+        self.assertTrue(jobs.run_job(jobs.claim_next('w')))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+        self.assertEqual(job.result['computed_on'],
+                         local_today(self.user.pk).isoformat())
+
+    def test_retry_then_fail(self):
+        job = jobs.enqueue('tests_always_fails')
+        with self.assertLogs('app.health.jobs', 'ERROR'):
+            self.assertFalse(jobs.run_job(jobs.claim_next('w')))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.error),
+                         (Job.QUEUED, 'RuntimeError: boom'))
+        self.assertGreater(job.run_after, timezone.now())
+
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with self.assertLogs('app.health.jobs', 'ERROR'):
+            jobs.run_job(jobs.claim_next('w'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 2))
+        self.assertIsNotNone(job.finished_at)
+
+    def test_unknown_task_fails_at_once(self):
+        job = Job.objects.create(task='removed', run_after=timezone.now())
+        with self.assertLogs('app.health.jobs', 'ERROR'):
+            jobs.run_job(jobs.claim_next('w'))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.FAILED, 1))
+
+    def test_recover_stale_follows_heartbeat(self):
+        now = timezone.now()
+        long_ago = now - timedelta(hours=2)
+        alive = Job.objects.create(
+            task='refresh_goal_progress', status=Job.RUNNING, attempts=1,
+            run_after=long_ago, started_at=long_ago, heartbeat_at=now,
+        )
+        lost = Job.objects.create(
+            task='refresh_goal_progress', status=Job.RUNNING, attempts=1,
+            run_after=long_ago, started_at=long_ago, heartbeat_at=long_ago,
+        )
+        spent = Job.objects.create(
+            task='refresh_goal_progress', status=Job.RUNNING, attempts=3,
+            run_after=long_ago, started_at=long_ago, heartbeat_at=long_ago,
+        )
+        self.assertEqual(jobs.recover_stale(), 2)
+        statuses = dict(Job.objects.values_list('pk', 'status'))
+        self.assertEqual(
+            [statuses[job.pk] for job in (alive, lost, spent)],
+            [Job.RUNNING, Job.QUEUED, Job.FAILED]
+        )
+
+    def test_recovered_attempt_keeps_retry_state(self):
+        job = jobs.enqueue('refresh_goal_progress', self.user)
+        first = jobs.claim_next('w1')
+        # Presumed lost, requeued and claimed again
+        Job.objects.filter(pk=job.pk).update(status=Job.QUEUED)
+        second = jobs.claim_next('w2')
+        with self.assertLogs('app.health.jobs', 'WARNING'):
+            jobs.run_job(first)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.worker), (Job.RUNNING, 'w2'))
+        jobs.run_job(second)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.SUCCEEDED)
+
+    def test_worker_burst(self):
+        jobs.enqueue('refresh_goal_progress', self.user)
+        jobs.enqueue('tests_always_fails')
+        worker = jobs.Worker('w', threading.Event(), burst=True)
+        with override_settings(HEALTH_JOB_RETRY_DELAY=0), \
+                self.assertLogs('app.health.jobs', 'ERROR'):
+            self.assertEqual(worker.run(), 3)
+        self.assertEqual(
+            sorted(Job.objects.values_list('status', flat=True)),
+            [Job.FAILED, Job.SUCCEEDED]
+        )
+
+
+@override_settings(STORAGES=DATABASE_EXPORTS)
+class ExportJobTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('export', password='x')
+        self.client.force_login(self.user)
+        add_activity(self.user, local_today(self.user.pk))
+
+    def run_export(self):
+        response = self.client.post('/api/export/activities.csv')
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(response.json()['status'], Job.QUEUED)
+        jobs.run_job(jobs.claim_next('w'))
+        return Job.objects.get(pk=response.json()['id'])
+
+    def test_download(self):
+        job = self.run_export()
+        self.assertEqual(job.status, Job.SUCCEEDED, job.error)
+        response = self.client.get(f'/api/jobs/{job.pk}/download/')
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content).decode()
+        self.assertEqual(len(body.splitlines()), 2)
+
+        other = User.objects.create_user('export2', password='x')
+        self.client.force_login(other)
+        response = self.client.get(f'/api/jobs/{job.pk}/download/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_purge_expired_exports(self):
+        job = self.run_export()
+        self.assertEqual(tasks.purge_exports(), 0)
+        Job.objects.filter(pk=job.pk).update(
+            finished_at=timezone.now() - timedelta(days=8)
+        )
+        self.assertEqual(tasks.purge_exports(), 1)
+        self.assertFalse(StoredFile.objects.exists())
+        self.assertTrue(Job.objects.get(pk=job.pk).result['expired'])
+        response = self.client.get(f'/api/jobs/{job.pk}/download/')
+        self.assertEqual(response.status_code, 404)
+
+    def test_file_deleted_with_job(self):
+        job = self.run_export()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.delete()
+        self.assertFalse(Job.objects.filter(pk=job.pk).exists())
+        self.assertFalse(StoredFile.objects.exists())
@@ -0,0 +1,122 @@
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from app.health.instrumentation import (
+    fingerprint_sql, registry, render_prometheus,
+)
+
+
+class FingerprintTests(TestCase):
+    def test_literals_are_replaced(self):
+        self.assertEqual(
+            fingerprint_sql(
+                "SELECT *  FROM t WHERE id IN (1, 2, 3) AND n = 'x''y'"
+            ),
+            'SELECT * FROM t WHERE id IN (...) AND n = ?'
+        )
+        self.assertEqual(
+            fingerprint_sql('SELECT * FROM t WHERE id = %s LIMIT 21'),
+            'SELECT * FROM t WHERE id = ? LIMIT ?'
+        )
+
+
+@override_settings(HEALTH_METRICS_SAMPLE_RATE=1, HEALTH_METRICS_DIR=None)
+class QueryMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.user = User.objects.create_user('metrics', password='x')
+        self.client.force_login(self.user)
+
+    def test_requests_are_recorded_per_route(self):
+        self.client.get('/dashboard/')
+        self.client.get('/api/activities/')
+        self.client.get('/api/activities/')
+        self.client.get('/nope/')
+        snapshot = registry.snapshot()
+        self.assertEqual(
+            set(snapshot), {'dashboard', 'activity-list', '<unresolved>'}
+        )
+        requests, _duration, _db, queries, _dupes, size, buckets = (
+            snapshot['activity-list']
+        )
+        self.assertEqual(requests, 2)
+        self.assertGreater(queries, 0)
+        self.assertGreater(size, 0)
+        self.assertLessEqual(sum(buckets), requests)
+
+    def test_metrics_view(self):
+        self.client.get('/dashboard/')
+        self.assertEqual(self.client.get('/metrics').status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.content.decode()
+        self.assertIn(
+            f'health_http_requests_total{{route="dashboard",'
+            f'pid="{os.getpid()}"}} 1',
+            text
+        )
+        self.assertIn('# TYPE health_http_request_duration_seconds '
+                      'histogram', text)
+        self.assertNotIn('route="metrics"', text)
+
+    @override_settings(HEALTH_METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.client.logout()
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer wrong'
+        )
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get(
+            '/metrics', HTTP_AUTHORIZATION='Bearer secret'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(HEALTH_SERVER_TIMING=True)
+    def test_server_timing(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$'
+        )
+
+    @override_settings(HEALTH_METRICS_SAMPLE_RATE=0)
+    def test_sampling_off(self):
+        response = self.client.get('/api/dashboard/')
+        self.assertEqual(registry.snapshot(), {})
+        self.assertNotIn('Server-Timing', response)
+
+
+class SharedMetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def test_workers_are_summed(self):
+        registry.observe('a', 0.01, 0.001, 2, 0, 10)
+        # Left behind by a worker that has exited
+        dead = os.path.join(self.directory, '999999999-dead.json')
+        with open(dead, 'w') as handle:
+            handle.write(
+                '{"a": [3, 0.3, 0.03, 6, 0, 30, [0, 3, 0, 0, 0, 0, 0, 0, 0, '
+                '0]]}'
+            )
+        with override_settings(HEALTH_METRICS_DIR=self.directory):
+            text = render_prometheus()
+            self.assertIn('health_http_requests_total{route="a"} 4', text)
+            self.assertFalse(os.path.exists(dead))
+            registry.observe('a', 0.01, 0.001, 2, 0, 10)
+            # The exited worker's counts survive in the archive
+            self.assertIn(
+                'health_http_requests_total{route="a"} 5',
+                render_prometheus()
+            )
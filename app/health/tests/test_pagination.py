@@ -0,0 +1,103 @@
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import caching
+from app.health.models import Activity
+from app.health.pagination import (
+    InvalidCursor, decode_cursor, encode_cursor, paginate_keyset,
+)
+from app.health.seeding import seed_user
+from app.health.tests import add_activity
+from app.health.timezones import local_today
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('pages', password='x')
+        seed_user(cls.user, days=20, activities_per_day=(1, 3), seed=1)
+
+    def setUp(self):
+        caching.get_cache().clear()
+        self.client.force_login(self.user)
+        self.expected = list(
+            Activity.objects.filter(user=self.user).order_by(
+                '-date', '-id'
+            ).values_list('id', flat=True)
+        )
+
+    def test_cursor_round_trip(self):
+        day = date(2026, 1, 31)
+        self.assertEqual(decode_cursor(encode_cursor(day, 42)),
+                         (day, 42, False))
+        self.assertEqual(decode_cursor(encode_cursor(day, 42, True)),
+                         (day, 42, True))
+
+    def test_walk_forward_and_back(self):
+        pages, url = [], '/api/activities/?page_size=7'
+        while url:
+            pages.append(self.client.get(url).json())
+            url = pages[-1]['next']
+        self.assertGreater(len(pages), 2)
+        self.assertEqual(
+            [row['id'] for page in pages for row in page['results']],
+            self.expected
+        )
+        self.assertIsNone(pages[0]['previous'])
+
+        seen, url = [], pages[-1]['previous']
+        while url:
+            page = self.client.get(url).json()
+            seen = [row['id'] for row in page['results']] + seen
+            url = page['previous']
+        seen += [row['id'] for row in pages[-1]['results']]
+        self.assertEqual(seen, self.expected)
+
+    def test_pages_unaffected_by_new_entries(self):
+        first = self.client.get('/api/activities/?page_size=5').json()
+        add_activity(self.user, local_today(self.user.pk))
+        second = self.client.get(first['next']).json()
+        self.assertEqual([row['id'] for row in second['results']],
+                         self.expected[5:10])
+
+    def test_malformed_cursors(self):
+        cursors = [
+            'zzz',
+            'not-base64!',
+            encode_cursor(date(2026, 1, 1), 1)[:-3],
+            'MjAyNi0wMS0wMXwx',  # "2026-01-01|1", one field short
+            'bm90LWEtZGF0ZXwxfDA',  # "not-a-date|1|0"
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    decode_cursor(cursor)
+                for path in ['/api/activities/', '/api/nutrition/',
+                             '/activities/']:
+                    response = self.client.get(path, {'cursor': cursor})
+                    self.assertEqual(response.status_code, 404)
+
+    def test_paginate_keyset(self):
+        queryset = Activity.objects.filter(user=self.user)
+        seen, cursor = [], None
+        while True:
+            page = paginate_keyset(queryset, cursor, page_size=6)
+            seen += [activity.pk for activity in page]
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_html_list_links_next_page(self):
+        row = Activity.objects.get(pk=self.expected[24])
+        response = self.client.get('/activities/')
+        self.assertContains(
+            response, f'?cursor={encode_cursor(row.date, row.pk)}'
+        )
+        response = self.client.get(
+            '/activities/', {'cursor': encode_cursor(row.date, row.pk)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Newer')
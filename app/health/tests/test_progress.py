@@ -0,0 +1,84 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import progress
+from app.health.models import Activity, GoalProgress, UserGoal
+from app.health.tests import add_activity, add_meal
+from app.health.timezones import local_today
+
+
+class GoalProgressTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('streak', password='x')
+        UserGoal.objects.create(user=self.user, target_calories_burn=400)
+        self.today = local_today(self.user.pk)
+
+    def days_ago(self, days):
+        return self.today - timedelta(days=days)
+
+    def progress(self):
+        return GoalProgress.objects.get(user=self.user)
+
+    def test_streak_follows_entries(self):
+        for days in range(5, 0, -1):
+            add_activity(self.user, self.days_ago(days))
+        current = self.progress()
+        self.assertEqual((current.current_streak, current.last_active_date),
+                         (5, self.days_ago(1)))
+
+        activity = add_activity(self.user, self.today)
+        self.assertEqual(self.progress().current_streak, 6)
+        activity.delete()
+        current = self.progress()
+        self.assertEqual((current.current_streak, current.last_active_date),
+                         (5, self.days_ago(1)))
+
+    def test_gap_breaks_streak(self):
+        for days in range(6, -1, -1):
+            add_activity(self.user, self.days_ago(days))
+        Activity.objects.filter(date=self.days_ago(3)).delete()
+        current = self.progress()
+        self.assertEqual((current.current_streak, current.longest_streak),
+                         (3, 7))
+
+    def test_matches_full_refresh(self):
+        for days in [9, 8, 6, 2, 1, 0]:
+            add_activity(self.user, self.days_ago(days), calories=500)
+        incremental = self.progress()
+        refreshed = progress.refresh(self.user.pk)
+        for field in ['current_streak', 'longest_streak', 'last_active_date',
+                      'week_active_days', 'burn_adherence']:
+            self.assertEqual(getattr(incremental, field),
+                             getattr(refreshed, field), field)
+
+    def test_adherence(self):
+        for days in [0, 1, 2]:
+            add_activity(self.user, self.days_ago(days), calories=500)
+        add_activity(self.user, self.days_ago(3), calories=100)
+        add_meal(self.user, self.days_ago(1), calories=1500)
+        current = self.progress()
+        window = progress.ADHERENCE_WINDOW_DAYS
+        self.assertEqual(current.window_days, window)
+        self.assertEqual(current.burn_adherence,
+                         progress._percent(3, window))
+        self.assertEqual(current.intake_adherence,
+                         progress._percent(1, window))
+
+    def test_goal_change_refreshes_adherence(self):
+        add_activity(self.user, self.today, calories=300)
+        self.assertEqual(self.progress().burn_adherence, Decimal('0.00'))
+        goal = UserGoal.objects.get(user=self.user)
+        goal.target_calories_burn = 200
+        goal.save()
+        self.assertGreater(self.progress().burn_adherence, 0)
+
+    def test_old_streak_shows_as_zero(self):
+        add_activity(self.user, self.days_ago(5))
+        current = progress.as_dict(self.progress(), None, self.today)
+        self.assertEqual(
+            (current['current_streak'], current['longest_streak']), (0, 1)
+        )
+        self.assertIsNone(current['adherence'])
@@ -0,0 +1,74 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import connections
+from django.test import RequestFactory, TestCase
+
+from app.health import routers
+from app.health.detector import QueryDetector
+from app.health.instrumentation import execute_wrapper
+from app.health.models import Activity
+
+
+@mock.patch.object(routers, 'replica_configured', return_value=True)
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_in_replica_blocks(self, configured):
+        self.assertEqual(self.router.db_for_read(Activity), 'default')
+        with routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Activity), 'replica')
+            self.assertEqual(self.router.db_for_read(User), 'replica')
+            self.assertEqual(self.router.db_for_write(Activity), 'default')
+        with routers.use_replica(False):
+            self.assertEqual(self.router.db_for_read(Activity), 'default')
+
+    def test_other_apps_stay_on_primary(self, configured):
+        cache_entry = DatabaseCache('health_cache', {}).cache_model_class
+        with routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Session), 'default')
+            self.assertEqual(self.router.db_for_read(cache_entry), 'default')
+
+    def test_without_replica(self, configured):
+        configured.return_value = False
+        with routers.use_replica():
+            self.assertEqual(self.router.db_for_read(Activity), 'default')
+
+    def test_recent_writers_read_from_primary(self, configured):
+        user = User.objects.create_user('sticky', password='x')
+        request = RequestFactory().get('/api/activities/')
+        request.user = user
+        self.assertTrue(routers.replica_allowed(request))
+        routers.stick_to_primary(user.pk)
+        self.addCleanup(caches['default'].clear)
+        self.assertFalse(routers.replica_allowed(request))
+        request = RequestFactory().post('/api/activities/')
+        request.user = User.objects.create_user('writer', password='x')
+        self.assertFalse(routers.replica_allowed(request))
+
+    def test_migrations_skip_the_replica(self, configured):
+        self.assertFalse(self.router.allow_migrate('replica', 'health'))
+        self.assertTrue(self.router.allow_migrate('default', 'health'))
+
+
+class ExecuteWrapperTests(TestCase):
+    def test_every_alias_is_wrapped(self):
+        def wrapper(execute, sql, params, many, context):
+            return execute(sql, params, many, context)
+
+        with execute_wrapper(wrapper):
+            for conn in connections.all():
+                self.assertIn(wrapper, conn.execute_wrappers)
+        for conn in connections.all():
+            self.assertNotIn(wrapper, conn.execute_wrappers)
+
+    def test_detector_watches_every_alias(self):
+        with QueryDetector() as detector:
+            for conn in connections.all():
+                self.assertIn(detector._record, conn.execute_wrappers)
+            list(Activity.objects.all())
+        self.assertEqual(detector.count, 1)
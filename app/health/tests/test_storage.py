@@ -0,0 +1,76 @@
+import io
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.http import FileResponse
+from django.test import TestCase
+
+from app.health import storage
+from app.health.models import StoredFile, StoredFileChunk
+
+CONTENT = b'0123456789abcdefghij'
+
+
+@mock.patch.object(storage, 'CHUNK_SIZE', 8)
+class DatabaseStorageTests(TestCase):
+    def setUp(self):
+        self.storage = storage.DatabaseStorage()
+
+    def test_files_are_split_into_chunks(self):
+        name = self.storage.save('exports/1/a.csv', ContentFile(CONTENT))
+        self.assertEqual(self.storage.size(name), len(CONTENT))
+        self.assertEqual(
+            list(StoredFileChunk.objects.order_by('offset').values_list(
+                'offset', flat=True
+            )),
+            [0, 8, 16]
+        )
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), CONTENT)
+
+    def test_chunks_are_read_as_needed(self):
+        name = self.storage.save('a.csv', ContentFile(CONTENT))
+        with self.assertNumQueries(1):
+            stored = self.storage.open(name)
+        with self.assertNumQueries(1):
+            self.assertEqual(stored.read(3), b'012')
+        with self.assertNumQueries(0):
+            self.assertEqual(stored.read(3), b'345')
+        stored.seek(-3, io.SEEK_END)
+        with self.assertNumQueries(1):
+            self.assertEqual(stored.read(), b'hij')
+        stored.seek(6)
+        self.assertEqual(stored.read(4), b'6789')
+        stored.close()
+
+    def test_file_response(self):
+        name = self.storage.save('a.csv', ContentFile(CONTENT))
+        response = FileResponse(self.storage.open(name))
+        self.assertEqual(response['Content-Length'], str(len(CONTENT)))
+        self.assertEqual(b''.join(response.streaming_content), CONTENT)
+        response.close()
+
+    def test_empty_file(self):
+        name = self.storage.save('empty.csv', ContentFile(b''))
+        self.assertFalse(StoredFileChunk.objects.exists())
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'')
+
+    def test_missing_and_read_only(self):
+        with self.assertRaises(FileNotFoundError):
+            self.storage.open('missing.csv')
+        name = self.storage.save('a.csv', ContentFile(CONTENT))
+        with self.assertRaisesMessage(ValueError, 'read-only'):
+            self.storage.open(name, 'wb')
+
+    def test_delete_and_listdir(self):
+        self.storage.save('exports/1/a.csv', ContentFile(CONTENT))
+        self.storage.save('exports/2/b.csv', ContentFile(CONTENT))
+        self.storage.save('exports/c.csv', ContentFile(CONTENT))
+        self.assertEqual(
+            self.storage.listdir('exports'), (['1', '2'], ['c.csv'])
+        )
+        self.storage.delete('exports/1/a.csv')
+        self.assertFalse(self.storage.exists('exports/1/a.csv'))
+        self.assertEqual(StoredFile.objects.count(), 2)
+        self.assertEqual(StoredFileChunk.objects.count(), 6)
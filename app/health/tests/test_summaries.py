@@ -0,0 +1,105 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from app.health import summaries
+from app.health.models import Activity, DailySummary, NutritionEntry
+from app.health.tests import add_activity, add_meal
+from app.health.timezones import local_today
+
+
+class DailySummaryTests(TestCase):
+    """Signals keep DailySummary rows equal to the raw entries"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('summary', password='x')
+        self.today = local_today(self.user.pk)
+
+    def summary(self, day=None):
+        return DailySummary.objects.get(user=self.user, date=day or self.today)
+
+    def test_entries_update_summary(self):
+        activity = add_activity(self.user, self.today)
+        add_meal(self.user, self.today)
+        summary = self.summary()
+        self.assertEqual(
+            (summary.calories_burned, summary.duration,
+             summary.activity_count, summary.calories_consumed,
+             summary.protein),
+            (300, 30, 1, 500, Decimal('20.5'))
+        )
+        activity.calories_burned = 100
+        activity.save()
+        self.assertEqual(self.summary().calories_burned, 100)
+        self.assertEqual(summaries.verify(), [])
+
+    def test_string_values(self):
+        # Valid for the model fields, so the rollup must accept them too
+        activity = Activity.objects.create(
+            user=self.user,
+            activity_type='run',
+            duration='30',
+            distance='5.5',
+            calories_burned='300',
+            date=self.today.isoformat(),
+        )
+        NutritionEntry.objects.create(
+            user=self.user,
+            food_name='Oats',
+            calories='500',
+            protein='20.5',
+            quantity='1',
+            date=self.today.isoformat(),
+            meal_type='lunch',
+        )
+        summary = self.summary()
+        self.assertEqual(
+            (summary.calories_burned, summary.distance, summary.protein),
+            (300, Decimal('5.5'), Decimal('20.5'))
+        )
+        activity.distance = '1.25'
+        activity.save()
+        self.assertEqual(self.summary().distance, Decimal('1.25'))
+        self.assertEqual(summaries.verify(), [])
+
+    def test_moving_entry_between_days(self):
+        yesterday = self.today - timedelta(days=1)
+        activity = add_activity(self.user, self.today)
+        activity.date = yesterday
+        activity.save()
+        self.assertEqual(self.summary().activity_count, 0)
+        self.assertEqual(self.summary(yesterday).calories_burned, 300)
+        self.assertEqual(summaries.verify(), [])
+
+    def test_deletes(self):
+        add_activity(self.user, self.today)
+        add_activity(self.user, self.today)
+        add_meal(self.user, self.today)
+        Activity.objects.filter(user=self.user).delete()
+        self.assertEqual(summaries.verify(), [])
+        self.user.delete()
+        self.assertFalse(DailySummary.objects.exists())
+
+    def test_verify_reports_drift_until_rebuilt(self):
+        add_activity(self.user, self.today)
+        DailySummary.objects.filter(user=self.user).update(calories_burned=1)
+        self.assertEqual(
+            summaries.verify(),
+            [(self.user.pk, self.today, 'calories_burned', 300, 1)]
+        )
+        summaries.rebuild()
+        self.assertEqual(summaries.verify(), [])
+
+    def test_rebuild_command(self):
+        add_activity(self.user, self.today)
+        DailySummary.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('rebuild_daily_summaries', '--verify',
+                         stdout=StringIO())
+        call_command('rebuild_daily_summaries', stdout=StringIO())
+        self.assertEqual(self.summary().calories_burned, 300)
+        call_command('rebuild_daily_summaries', '--verify', stdout=StringIO())
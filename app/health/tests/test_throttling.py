@@ -0,0 +1,63 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import caching
+from app.health.tests import ACTIVITY
+from app.health.throttling import RequestKindThrottle
+
+
+@mock.patch.object(RequestKindThrottle, 'THROTTLE_RATES',
+                   {'read': '3/min', 'write': '2/min', 'bulk': '1/min'})
+class ThrottleTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('throttle', password='x')
+        self.client.force_login(self.user)
+
+    def test_read_bucket(self):
+        for remaining in [2, 1, 0]:
+            response = self.client.get('/api/activities/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-RateLimit-Remaining'],
+                             str(remaining))
+        response = self.client.get('/api/nutrition/')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '20')
+        # Writes have a bucket of their own
+        response = self.client.post('/api/activities/', ACTIVITY,
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+    def test_bulk_bucket(self):
+        response = self.client.post('/api/activities/bulk/', [ACTIVITY],
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        response = self.client.post('/api/activities/bulk/', [ACTIVITY],
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+
+    def test_buckets_are_per_user(self):
+        for _ in range(4):
+            self.client.get('/api/activities/')
+        other = User.objects.create_user('throttle2', password='x')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get('/api/activities/').status_code, 200)
+
+    def test_refill(self):
+        clock = mock.Mock(return_value=1000.0)
+        with mock.patch.object(RequestKindThrottle, 'timer', clock):
+            for _ in range(3):
+                self.client.get('/api/activities/')
+            self.assertEqual(
+                self.client.get('/api/activities/').status_code, 429
+            )
+            # One request's worth of tokens after 20 seconds
+            clock.return_value = 1020.5
+            self.assertEqual(
+                self.client.get('/api/activities/').status_code, 200
+            )
+            self.assertEqual(
+                self.client.get('/api/activities/').status_code, 429
+            )
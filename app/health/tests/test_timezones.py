@@ -0,0 +1,83 @@
+from datetime import date, datetime, timezone as dt_timezone
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app.health import caching
+from app.health.models import Activity, GoalProgress, UserProfile
+from app.health.timezones import local_today
+
+# 2026-03-01 in UTC and west of it, already 2026-03-02 in Kiritimati (+14)
+NOW = datetime(2026, 3, 1, 23, 30, tzinfo=dt_timezone.utc)
+
+
+@mock.patch('django.utils.timezone.now', return_value=NOW)
+class TimeZoneTests(TestCase):
+    def setUp(self):
+        caching.get_cache().clear()
+        self.user = User.objects.create_user('zoned', password='x')
+        self.client.force_login(self.user)
+
+    def set_zone(self, name):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                '/api/profile/', {'time_zone': name},
+                content_type='application/json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'time_zone': name})
+
+    def test_local_today(self, now):
+        self.assertEqual(local_today(self.user.pk), date(2026, 3, 1))
+        self.set_zone('Pacific/Kiritimati')
+        self.assertEqual(local_today(self.user.pk), date(2026, 3, 2))
+        # Cached until the profile changes
+        with self.assertNumQueries(0):
+            local_today(self.user.pk)
+        self.set_zone('Etc/GMT+12')
+        self.assertEqual(local_today(self.user.pk), date(2026, 3, 1))
+
+    def test_dashboards_use_the_local_day(self, now):
+        self.set_zone('Pacific/Kiritimati')
+        with self.captureOnCommitCallbacks(execute=True):
+            Activity.objects.create(
+                user=self.user, activity_type='run', duration=5,
+                calories_burned=77, date=date(2026, 3, 2)
+            )
+        for url in ['/api/dashboard/', '/api/async/dashboard/']:
+            with self.subTest(url=url):
+                stats = self.client.get(url).json()['today_stats']
+                self.assertEqual(stats['calories_burned'], 77)
+        self.assertEqual(
+            GoalProgress.objects.get(user=self.user).computed_on,
+            date(2026, 3, 2)
+        )
+        response = self.client.get('/api/analytics/day/')
+        self.assertEqual(response.json()['end'], '2026-03-02')
+
+    def test_invalid_zone(self, now):
+        response = self.client.put(
+            '/api/profile/', {'time_zone': 'Mars/Olympus'},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('time_zone', response.json())
+
+    def test_goal_settings_form(self, now):
+        self.assertContains(self.client.get('/goals/'), 'Europe/Paris')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/goals/', {
+                'goal_type': 'maintain_weight',
+                'target_calories_burn': 1,
+                'target_calories_consume': 1,
+                'target_protein': 1,
+                'target_activity_days': 1,
+                'time_zone': 'Pacific/Kiritimati',
+            })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            UserProfile.objects.get(user=self.user).time_zone,
+            'Pacific/Kiritimati'
+        )
+        self.assertEqual(local_today(self.user.pk), date(2026, 3, 2))
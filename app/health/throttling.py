@@ -0,0 +1,113 @@
+"""Per-user token bucket throttles kept in the ``HEALTH_CACHE_ALIAS`` cache.
+
+Buckets are shared between workers only when that cache is (Redis, or the
+database cache of the production settings).  With a per-process cache each
+process enforces the rates on its own, so the effective limit becomes the
+rate times the number of processes: production refuses such a cache
+(health.E001, and gunicorn with more than one worker), other non-DEBUG
+setups get the health.W001 warning.
+
+The bucket is implemented as GCRA (the generic cell rate algorithm): a
+bucket holding ``num`` requests and refilled at ``num`` per period is fully
+described by one timestamp, the theoretical arrival time (TAT) of the next
+request.  Each check is one cache read and one write of a float, where
+DRF's own throttles store (and rewrite) the timestamp of every request in
+the window.
+
+The read and the write are not atomic, so concurrent requests of one user
+can overshoot the limit by the number in flight at once.
+"""
+import math
+
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import SimpleRateThrottle
+
+from . import caching
+
+# Headers describing the caller's bucket (see RateLimitHeadersMiddleware)
+LIMIT_HEADER = 'X-RateLimit-Limit'
+REMAINING_HEADER = 'X-RateLimit-Remaining'
+RESET_HEADER = 'X-RateLimit-Reset'
+
+
+class BucketThrottle(SimpleRateThrottle):
+    """SimpleRateThrottle with a token bucket in place of a request log
+
+    ``rate`` uses DRF's format (``"120/min"``): up to 120 requests at once,
+    then one more every half second.
+    """
+    cache_format = 'health:throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        # The scope (and so the rate) can depend on the request
+        pass
+
+    @property
+    def cache(self):
+        return caching.get_cache()
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def allow_request(self, request, view):
+        self.scope = self.get_scope(request, view)
+        self.rate = self.get_rate()
+        if self.rate is None:
+            return True
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        interval = self.duration / self.num_requests
+        # An empty bucket has TAT <= now; a full one TAT == now + duration
+        tat = max(self.cache.get(self.key, now), now)
+        if tat + interval - now > self.duration:
+            self.wait_seconds = tat + interval - now - self.duration
+            self.record(request, 0, tat - now)
+            return False
+        tat += interval
+        self.cache.set(self.key, tat, math.ceil(tat - now))
+        remaining = int((self.duration - (tat - now)) / interval)
+        self.record(request, remaining, tat - now)
+        return True
+
+    def record(self, request, remaining, reset):
+        """Keep the tightest bucket seen so far for the response headers"""
+        # Stored on the HttpRequest, which middleware sees
+        request = getattr(request, '_request', request)
+        current = getattr(request, 'rate_limit', None)
+        if current is None or remaining < current[1]:
+            request.rate_limit = (
+                self.num_requests, remaining, math.ceil(reset)
+            )
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class RequestKindThrottle(BucketThrottle):
+    """Separate buckets for reads, writes and bulk uploads
+
+    The scope is the view's ``throttle_scope`` if it sets one, else
+    ``bulk`` for ``bulk/`` actions, ``write`` for other unsafe methods and
+    ``read`` otherwise; rates come from ``DEFAULT_THROTTLE_RATES``.
+    """
+
+    def get_scope(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        if scope:
+            return scope
+        if getattr(view, 'action', None) == 'bulk':
+            return 'bulk'
+        if request.method not in SAFE_METHODS:
+            return 'write'
+        return 'read'
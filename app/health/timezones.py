@@ -0,0 +1,48 @@
+"""Per-user time zones: which calendar day is "today" for a user.
+
+Entries carry the user's local ``date``, so daily, weekly and monthly
+buckets are already computed in SQL on plain date columns (and their
+indexes); only the current day depends on the user's zone.  Zones are
+cached so resolving "today" costs no query on the request path.
+"""
+from functools import partial
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import caching
+from .models import UserProfile
+
+# Bounds how long a zone can stay stale if a write races a cache fill
+TIME_ZONE_CACHE_TIMEOUT = 3600
+
+
+def _time_zone_key(user_id):
+    return f'health:time-zone:{user_id}'
+
+
+def user_timezone(user_id):
+    """The user's ZoneInfo, defaulting to ``settings.TIME_ZONE``"""
+    cache = caching.get_cache()
+    key = _time_zone_key(user_id)
+    name = cache.get(key)
+    if name is None:
+        name = UserProfile.objects.filter(user_id=user_id).values_list(
+            'time_zone', flat=True
+        ).first() or settings.TIME_ZONE
+        cache.set(key, name, TIME_ZONE_CACHE_TIMEOUT)
+    return ZoneInfo(name)
+
+
+def local_today(user_id):
+    """The current date in the user's time zone"""
+    return timezone.localdate(timezone=user_timezone(user_id))
+
+
+def forget(user_id):
+    """Drop the cached zone once the current transaction commits"""
+    transaction.on_commit(
+        partial(caching.get_cache().delete, _time_zone_key(user_id))
+    )
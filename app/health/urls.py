@@ -1,12 +1,14 @@
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
-from . import views, api_views
+from . import views, api_views, async_views
 
 # Create a router for API viewsets
 router = DefaultRouter()
 router.register(r'activities', api_views.ActivityViewSet)
 router.register(r'nutrition', api_views.NutritionEntryViewSet)
 router.register(r'goals', api_views.UserGoalViewSet)
+router.register(r'jobs', api_views.JobViewSet)
+router.register(r'tokens', api_views.ApiTokenViewSet)
 
 urlpatterns = [
     # Traditional Django views (for backward compatibility)
@@ -16,6 +18,7 @@ urlpatterns = [
     path('logout/', views.user_logout, name='logout'),
     path('dashboard/', views.dashboard, name='dashboard'),
     path('goals/', views.goal_settings, name='goal_settings'),
+    path('metrics', views.metrics, name='metrics'),
     path('activities/', views.activity_list, name='activity_list'),
     path(
         'activities/create/',
@@ -56,4 +59,52 @@ urlpatterns = [
         api_views.dashboard_stats,
         name='api_dashboard_stats'
     ),
+    path(
+        'api/auth/token/',
+        api_views.obtain_api_token,
+        name='api_obtain_token'
+    ),
+    path(
+        'api/profile/',
+        api_views.user_profile,
+        name='api_profile'
+    ),
+    path(
+        'api/analytics/<str:period>/',
+        api_views.analytics_buckets,
+        name='api_analytics'
+    ),
+
+    # Async (ASGI) versions of the read-heavy endpoints
+    path(
+        'api/async/dashboard/',
+        async_views.dashboard_stats,
+        name='api_async_dashboard_stats'
+    ),
+    path(
+        'api/async/activities/',
+        async_views.activity_list,
+        name='api_async_activity_list'
+    ),
+    path(
+        'api/async/activities/<int:pk>/',
+        async_views.activity_detail,
+        name='api_async_activity_detail'
+    ),
+    path(
+        'api/async/nutrition/',
+        async_views.nutrition_list,
+        name='api_async_nutrition_list'
+    ),
+    path(
+        'api/async/nutrition/<int:pk>/',
+        async_views.nutrition_detail,
+        name='api_async_nutrition_detail'
+    ),
+    re_path(
+        r'^api/export/(?P<kind>activities|nutrition|goals)'
+        r'\.(?P<file_format>csv|ndjson)$',
+        api_views.export_data,
+        name='api_export'
+    ),
 ]
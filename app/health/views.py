@@ -3,11 +3,43 @@ from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Sum
-from django.utils import timezone
-from datetime import timedelta
-from .models import Activity, NutritionEntry, UserGoal
-from .forms import ActivityForm, NutritionEntryForm, UserGoalForm
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+from django.utils.functional import SimpleLazyObject
+import hmac
+from .models import Activity, NutritionEntry, UserGoal, UserProfile
+from . import caching
+from .routers import replica_reads
+from .instrumentation import render_prometheus
+from .forms import (
+    ActivityForm, NutritionEntryForm, UserGoalForm, UserProfileForm,
+)
+from .pagination import InvalidCursor, decode_cursor, paginate_keyset
+from .services import DashboardService
+from .timezones import local_today
+
+LIST_PAGE_SIZE = 25
+
+
+def _fragment_cache_context(user):
+    """Context for {% cache %} fragments keyed on the user's data version"""
+    return {
+        'data_version': caching.data_version(user.pk),
+        'fragment_cache_timeout': settings.HEALTH_DASHBOARD_CACHE_TIMEOUT,
+    }
+
+
+def _lazy_page(queryset, cursor):
+    """Validate ``cursor`` now, but only fetch the page when it's rendered"""
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except InvalidCursor:
+            raise Http404('Invalid cursor')
+    return SimpleLazyObject(
+        lambda: paginate_keyset(queryset, cursor, LIST_PAGE_SIZE)
+    )
 
 
 def home(request):
@@ -56,88 +88,60 @@ def user_logout(request):
 
 
 @login_required
+@replica_reads
 def dashboard(request):
-    # Get today's date
-    today = timezone.now().date()
-
-    # Get recent activities (last 7 days)
-    week_ago = today - timedelta(days=7)
-    recent_activities = Activity.objects.filter(
-        user=request.user,
-        date__gte=week_ago
-    ).order_by('-date')[:10]
-
-    # Get recent nutrition entries (last 7 days)
-    recent_nutrition = NutritionEntry.objects.filter(
-        user=request.user,
-        date__gte=week_ago
-    ).order_by('-date')[:10]
-
-    # Calculate today's totals
-    today_activities = Activity.objects.filter(
-        user=request.user, date=today
-    )
-    today_calories_burned = today_activities.aggregate(
-        Sum('calories_burned')
-    )['calories_burned__sum'] or 0
-    today_duration = today_activities.aggregate(
-        Sum('duration')
-    )['duration__sum'] or 0
-
-    today_nutrition = NutritionEntry.objects.filter(
-        user=request.user, date=today
-    )
-    today_calories_consumed = today_nutrition.aggregate(
-        Sum('calories')
-    )['calories__sum'] or 0
-    today_protein = today_nutrition.aggregate(
-        Sum('protein')
-    )['protein__sum'] or 0
-    today_carbs = today_nutrition.aggregate(
-        Sum('carbs')
-    )['carbs__sum'] or 0
-    today_fat = today_nutrition.aggregate(
-        Sum('fat')
-    )['fat__sum'] or 0
-
-    # Get user goal
-    try:
-        user_goal = UserGoal.objects.get(user=request.user)
-    except UserGoal.DoesNotExist:
-        user_goal = None
+    today = local_today(request.user.pk)
+    service = DashboardService(request.user, today, recent_limit=10)
 
+    # The panels below are cached as template fragments keyed on the
+    # user's data version; their queries only run on a cache miss.
+    # Today's totals come from the pre-aggregated daily summary.
+    summary = service.summary
     context = {
-        'recent_activities': recent_activities,
-        'recent_nutrition': recent_nutrition,
-        'today_calories_burned': today_calories_burned,
-        'today_duration': today_duration,
-        'today_calories_consumed': today_calories_consumed,
-        'today_protein': today_protein,
-        'today_carbs': today_carbs,
-        'today_fat': today_fat,
-        'user_goal': user_goal,
+        'recent_activities': SimpleLazyObject(
+            lambda: service.recent_activities
+        ),
+        'recent_nutrition': SimpleLazyObject(
+            lambda: service.recent_nutrition
+        ),
+        'today_calories_burned': summary.calories_burned,
+        'today_duration': summary.duration,
+        'today_calories_consumed': summary.calories_consumed,
+        'today_protein': summary.protein,
+        'today_carbs': summary.carbs,
+        'today_fat': summary.fat,
+        'user_goal': service.user_goal,
+        'goal_progress': SimpleLazyObject(service.progress_dict),
+        'today': today,
+        **_fragment_cache_context(request.user),
     }
     return render(request, 'health/dashboard.html', context)
 
 
 @login_required
 def goal_settings(request):
-    """Manage user goals"""
+    """Manage user goals and the time zone days are counted in"""
     try:
         goal = UserGoal.objects.get(user=request.user)
     except UserGoal.DoesNotExist:
         goal = None
+    profile = UserProfile.objects.filter(user=request.user).first() or (
+        UserProfile(user=request.user)
+    )
 
     if request.method == 'POST':
         if goal:
             form = UserGoalForm(request.POST, instance=goal)
         else:
             form = UserGoalForm(request.POST)
+        profile_form = UserProfileForm(request.POST, instance=profile)
 
-        if form.is_valid():
+        if form.is_valid() and profile_form.is_valid():
             goal = form.save(commit=False)
             goal.user = request.user
             goal.save()
+            if profile_form.has_changed():
+                profile_form.save()
             messages.success(
                 request, 'Your goals have been updated successfully!'
             )
@@ -147,23 +151,30 @@ def goal_settings(request):
             form = UserGoalForm(instance=goal)
         else:
             form = UserGoalForm()
+        profile_form = UserProfileForm(instance=profile)
 
     return render(
         request,
         'health/goal_settings.html',
-        {'form': form, 'goal': goal}
+        {'form': form, 'profile_form': profile_form, 'goal': goal}
     )
 
 
 @login_required
+@replica_reads
 def activity_list(request):
-    activities = Activity.objects.filter(
-        user=request.user
-    ).order_by('-date')
+    page = _lazy_page(
+        Activity.objects.filter(user=request.user),
+        request.GET.get('cursor')
+    )
     return render(
         request,
         'health/activity_list.html',
-        {'activities': activities}
+        {
+            'activities': SimpleLazyObject(lambda: page.items),
+            'page': page,
+            **_fragment_cache_context(request.user),
+        }
     )
 
 
@@ -219,14 +230,20 @@ def activity_delete(request, pk):
 
 
 @login_required
+@replica_reads
 def nutrition_list(request):
-    nutrition_entries = NutritionEntry.objects.filter(
-        user=request.user
-    ).order_by('-date')
+    page = _lazy_page(
+        NutritionEntry.objects.filter(user=request.user),
+        request.GET.get('cursor')
+    )
     return render(
         request,
         'health/nutrition_list.html',
-        {'nutrition_entries': nutrition_entries}
+        {
+            'nutrition_entries': SimpleLazyObject(lambda: page.items),
+            'page': page,
+            **_fragment_cache_context(request.user),
+        }
     )
 
 
@@ -279,3 +296,29 @@ def nutrition_delete(request, pk):
         'health/nutrition_confirm_delete.html',
         {'nutrition': nutrition}
     )
+
+
+def _may_read_metrics(request):
+    token = settings.HEALTH_METRICS_TOKEN
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if hmac.compare_digest(supplied, f'Bearer {token}'):
+            return True
+    return settings.DEBUG or request.user.is_staff
+
+
+@require_GET
+def metrics(request):
+    """Per-route request metrics in the Prometheus text format
+
+    Requires ``HEALTH_METRICS_TOKEN`` as a bearer token, or a staff
+    session, unless DEBUG is on.
+    """
+    if not _may_read_metrics(request):
+        return HttpResponse(
+            status=401 if settings.HEALTH_METRICS_TOKEN else 403
+        )
+    return HttpResponse(
+        render_prometheus(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -51,13 +51,23 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Outermost, so its timings cover the rest of the stack
+    'app.health.middleware.QueryMetricsMiddleware',
+    # Before anything else that reads or changes the response body
+    'app.health.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files with far-future cache headers
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # Reports the API throttles' buckets to clients
+    'app.health.middleware.RateLimitHeadersMiddleware',
+    # Only active when HEALTH_QUERY_DETECTOR is set
+    'app.health.middleware.QueryDetectorMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -85,16 +95,129 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
+        # Authorization: Bearer <token>, validated tokens cached in-process
+        'app.health.authentication.ApiTokenAuthentication',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        # orjson-backed; falls back to the stock JSONRenderer's encoding
+        'app.health.renderers.FastJSONRenderer',
     ],
+    # Token buckets per user (per IP for anonymous requests) shared
+    # through the cache; see health.throttling for the scopes
+    'DEFAULT_THROTTLE_CLASSES': [
+        'app.health.throttling.RequestKindThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.environ.get('HEALTH_THROTTLE_READ_RATE', '1200/min'),
+        'write': os.environ.get('HEALTH_THROTTLE_WRITE_RATE', '300/min'),
+        'bulk': os.environ.get('HEALTH_THROTTLE_BULK_RATE', '30/min'),
+    },
     'DEFAULT_PAGINATION_CLASS': (
         'rest_framework.pagination.PageNumberPagination'
     ),
     'PAGE_SIZE': 20
 }
 
+# Caching
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory by default; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. django.core.cache.backends.redis.RedisCache) when running
+# more than one process so invalidations reach every worker.
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'healthtracker'),
+    }
+}
+
+# Refuse to start (system check health.E001) when the cache above is local
+# to each process.  Data versions, replica stickiness and throttle buckets
+# are only correct when every web and job worker shares the cache, so the
+# production settings turn this on.
+HEALTH_REQUIRE_SHARED_CACHE = (
+    os.environ.get('HEALTH_REQUIRE_SHARED_CACHE', 'False') == 'True'
+)
+
+# Cache alias and lifetime (seconds) used for per-user dashboard payloads
+HEALTH_CACHE_ALIAS = 'default'
+HEALTH_DASHBOARD_CACHE_TIMEOUT = int(
+    os.environ.get('HEALTH_DASHBOARD_CACHE_TIMEOUT', 300)
+)
+
+# Responses smaller than this (bytes) are sent uncompressed; brotli quality
+# (0-11) for clients that accept it, when the brotli package is installed
+HEALTH_COMPRESSION_MIN_BYTES = int(
+    os.environ.get('HEALTH_COMPRESSION_MIN_BYTES', 1024)
+)
+HEALTH_BROTLI_QUALITY = int(os.environ.get('HEALTH_BROTLI_QUALITY', 4))
+
+# Maximum number of items accepted by the /api/<resource>/bulk/ endpoints,
+# and of bytes in their request bodies (refused before the body is read)
+HEALTH_BULK_MAX_ITEMS = int(os.environ.get('HEALTH_BULK_MAX_ITEMS', 5000))
+HEALTH_BULK_MAX_BYTES = int(
+    os.environ.get('HEALTH_BULK_MAX_BYTES', 10 * 1024 * 1024)
+)
+
+# Fraction of requests instrumented by QueryMetricsMiddleware (0 disables
+# it), whether sampled responses get a Server-Timing header, and the bearer
+# token for the /metrics endpoint (otherwise staff only, unless DEBUG)
+HEALTH_METRICS_SAMPLE_RATE = float(
+    os.environ.get('HEALTH_METRICS_SAMPLE_RATE', 1.0)
+)
+HEALTH_SERVER_TIMING = (
+    os.environ.get('HEALTH_SERVER_TIMING', 'False') == 'True'
+)
+HEALTH_METRICS_TOKEN = os.environ.get('HEALTH_METRICS_TOKEN', '')
+# Directory where each worker process writes its metrics so that /metrics
+# reports the sum over all workers of this host; empty keeps them per
+# process (one worker per scrape)
+HEALTH_METRICS_DIR = os.environ.get('HEALTH_METRICS_DIR', '')
+
+# Log repeated queries per request (development only)
+HEALTH_QUERY_DETECTOR = (
+    os.environ.get('HEALTH_QUERY_DETECTOR', 'False') == 'True'
+)
+
+# In-process cache of validated API tokens: entries kept, and seconds a
+# revoked token can keep working in processes other than the revoking one
+HEALTH_TOKEN_CACHE_SIZE = int(
+    os.environ.get('HEALTH_TOKEN_CACHE_SIZE', 1024)
+)
+HEALTH_TOKEN_CACHE_TTL = int(os.environ.get('HEALTH_TOKEN_CACHE_TTL', 60))
+
+# Session storage for the HTML views, in the database by default.  Set to
+# django.contrib.sessions.backends.cached_db to read sessions from the
+# cache, .cache to skip the database entirely (needs a shared, persistent
+# cache backend) or .signed_cookies to keep them in the client's cookie,
+# signed with SECRET_KEY.
+SESSION_ENGINE = os.environ.get(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.db'
+)
+
+# Background jobs (manage.py run_workers): attempts per job, retry backoff
+# base and cap (seconds), how often a running job's heartbeat is refreshed
+# and how long a job may go without one before its worker is assumed lost
+# and the job requeued (keep it several heartbeats long).  Export files are
+# deleted after HEALTH_EXPORT_RETENTION_DAYS.  With
+# HEALTH_DEFER_GOAL_PROGRESS, writes queue goal progress refreshes instead
+# of running them inside the request.
+HEALTH_JOB_MAX_ATTEMPTS = int(os.environ.get('HEALTH_JOB_MAX_ATTEMPTS', 3))
+HEALTH_JOB_RETRY_DELAY = int(os.environ.get('HEALTH_JOB_RETRY_DELAY', 10))
+HEALTH_JOB_MAX_RETRY_DELAY = int(
+    os.environ.get('HEALTH_JOB_MAX_RETRY_DELAY', 3600)
+)
+HEALTH_JOB_HEARTBEAT = int(os.environ.get('HEALTH_JOB_HEARTBEAT', 30))
+HEALTH_JOB_TIMEOUT = int(os.environ.get('HEALTH_JOB_TIMEOUT', 300))
+HEALTH_EXPORT_RETENTION_DAYS = int(
+    os.environ.get('HEALTH_EXPORT_RETENTION_DAYS', 7)
+)
+HEALTH_DEFER_GOAL_PROGRESS = (
+    os.environ.get('HEALTH_DEFER_GOAL_PROGRESS', 'False') == 'True'
+)
+
 WSGI_APPLICATION = 'wsgi.application'
 
 
@@ -130,6 +253,26 @@ else:
         }
     }
 
+# Optional read replica of the primary PostgreSQL database.  Eligible reads
+# (dashboards, lists, exports) are routed to it by health.routers, except
+# for users who wrote within the last HEALTH_REPLICA_STICKY_SECONDS.
+if 'HOST' in DATABASES['default'] and os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get(
+            'DB_REPLICA_PORT', DATABASES['default']['PORT']
+        ),
+        'USER': os.environ.get('DB_REPLICA_USER', db_user),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASS', db_pass),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['app.health.routers.ReplicaRouter']
+HEALTH_REPLICA_STICKY_SECONDS = int(
+    os.environ.get('HEALTH_REPLICA_STICKY_SECONDS', 30)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -177,6 +320,27 @@ USE_TZ = True
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Files written by background jobs (e.g. exports)
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+
+# Exports are written by the job workers and downloaded through the web
+# server, so in a deployment both must reach the "exports" storage (the
+# production settings keep the files in the database)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'exports': {
+        'BACKEND': os.environ.get(
+            'HEALTH_EXPORT_STORAGE',
+            'django.core.files.storage.FileSystemStorage'
+        ),
+    },
+}
+
 # Additional directories for static files (for serving frontend SPA)
 # STATICFILES_DIRS = [
 #     BASE_DIR / 'frontend' / 'dist',  # For built Angular/React frontend
@@ -0,0 +1,86 @@
+"""
+Production settings: the defaults in settings.py tuned for serving traffic.
+
+Select with DJANGO_SETTINGS_MODULE=app.settings_production.
+"""
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES, TEMPLATES
+
+DEBUG = os.environ.get('DEBUG', 'False') == 'True'
+
+# Keep database connections open between requests instead of reconnecting
+# every time, and check them before reuse so a connection dropped by the
+# server or a pooler is replaced transparently.  Async (uvicorn) workers
+# handle requests on short-lived threads, where persistent connections
+# would pile up, so they always reconnect.
+if os.environ.get('SERVER_MODE', 'wsgi') == 'asgi':
+    CONN_MAX_AGE = 0
+else:
+    CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 600))
+
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = CONN_MAX_AGE
+    database['CONN_HEALTH_CHECKS'] = CONN_MAX_AGE > 0
+    if database['ENGINE'] == 'django.db.backends.postgresql':
+        database.setdefault('OPTIONS', {}).update({
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+            # TCP keepalives so idle persistent connections aren't
+            # silently dropped by load balancers or NAT
+            'keepalives': 1,
+            'keepalives_idle': 60,
+            'keepalives_interval': 10,
+            'keepalives_count': 5,
+        })
+
+# One cache shared by every gunicorn worker and job worker: Redis at
+# REDIS_URL.  There is deliberately no fallback to the database cache, which
+# would spend several queries of every request on data versions, stickiness
+# and throttle buckets; without REDIS_URL (or a CACHE_BACKEND) the cache
+# stays per-process and health.E001 stops the deployment.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+HEALTH_REQUIRE_SHARED_CACHE = True
+
+# Sum the request metrics of every gunicorn worker on this host
+HEALTH_METRICS_DIR = os.environ.get(
+    'HEALTH_METRICS_DIR', '/tmp/health-metrics'
+)
+
+# Content-hashed static file names (collectstatic writes a manifest plus
+# gzip/brotli variants); WhiteNoise serves hashed files with a one-year
+# immutable Cache-Control header.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+    # The job workers run as a separate service without the web server's
+    # disk; the database is what both can reach
+    'exports': {
+        'BACKEND': os.environ.get(
+            'HEALTH_EXPORT_STORAGE', 'app.health.storage.DatabaseStorage'
+        ),
+    },
+}
+# Cache lifetime of static files without a hash in their name
+WHITENOISE_MAX_AGE = int(os.environ.get('WHITENOISE_MAX_AGE', 3600))
+
+# Compile each template once per process.  Django already does this when
+# DEBUG is off and no loaders are set; spelled out so it stays on if the
+# loader list is ever customised.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
@@ -0,0 +1,100 @@
+"""
+Gunicorn configuration, picked up automatically when gunicorn is started
+from the project root (as start.sh does).
+
+Every value can be overridden with an environment variable, which is how
+different configurations are benchmarked (see "Server Configuration" in
+the README).
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# gthread: a few processes with a thread pool each, good for a Django app
+# that mostly waits on the database.  gevent requires "gevent" and
+# "psycogreen"; uvicorn.workers.UvicornWorker serves the ASGI app.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+
+
+def available_cpus():
+    """CPUs this container may use: its CFS quota, else its CPU affinity
+
+    multiprocessing.cpu_count() reports every CPU of the host.
+    """
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as quota_file:
+            quota, period = quota_file.read().split()
+        if quota != 'max':
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        return multiprocessing.cpu_count()
+
+
+workers = int(os.environ.get('GUNICORN_WORKERS', available_cpus() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Each thread keeps its own persistent connection (CONN_MAX_AGE), so the
+# web service alone can hold workers * threads connections; with the job
+# workers they must stay below the server's max_connections
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 100))
+# Concurrent clients per gevent worker
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+# Reuse client connections behind a load balancer
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers periodically to bound memory growth; the jitter keeps
+# them from all restarting at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# Import the app once in the master so workers fork with it loaded (faster
+# boot, shared memory).  Database connections are opened lazily after the
+# fork, so none are shared between workers.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'True') == 'True'
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+
+def on_starting(server):
+    cfg = server.cfg
+    if cfg.workers > 1:
+        # Refuse to run several workers on a per-process cache: they would
+        # each see their own data versions, sticky flags and buckets
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+        import django
+        django.setup()
+        from app.health.checks import cache_is_shared
+        if not cache_is_shared():
+            raise RuntimeError(
+                f'{cfg.workers} workers need a shared cache; set REDIS_URL '
+                f'or CACHE_BACKEND (see "Server Configuration" in README)'
+            )
+    connections = cfg.workers * (
+        cfg.threads if cfg.worker_class_str == 'gthread' else 1
+    )
+    if connections > db_max_connections:
+        server.log.warning(
+            'Up to %d database connections (workers x threads) exceed '
+            'DB_MAX_CONNECTIONS=%d; lower GUNICORN_WORKERS/GUNICORN_THREADS '
+            'or DB_CONN_MAX_AGE', connections, db_max_connections
+        )
+
+
+def post_fork(server, worker):
+    if server.cfg.worker_class_str == 'gevent':
+        # Make psycopg2 cooperate with gevent instead of blocking the hub
+        try:
+            from psycogreen.gevent import patch_psycopg
+        except ImportError:
+            server.log.warning('psycogreen is not installed; database '
+                               'calls will block gevent workers')
+        else:
+            patch_psycopg()
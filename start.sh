@@ -22,11 +22,22 @@ echo "Running database migrations..."
 python app/manage.py migrate --noinput
 echo "Migrations completed successfully!"
 
+# Table behind CACHE_BACKEND=...db.DatabaseCache (a no-op otherwise)
+python app/manage.py createcachetable
+
 # Collect static files (optional, won't fail if it doesn't work)
 echo "Collecting static files..."
 python app/manage.py collectstatic --noinput || echo "Static files collection skipped"
 
-# Start gunicorn from the root directory (so it can find app.wsgi)
-echo "Starting gunicorn..."
-exec gunicorn --bind 0.0.0.0:$PORT app.wsgi:application
+# Start gunicorn from the root directory (so it can find app.wsgi and
+# gunicorn.conf.py, which sets workers, threads and timeouts).
+# SERVER_MODE=asgi runs uvicorn workers instead, so the async API
+# endpoints can serve many concurrent requests per process.
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+    echo "Starting gunicorn with uvicorn workers (ASGI)..."
+    export GUNICORN_WORKER_CLASS=uvicorn.workers.UvicornWorker
+    exec gunicorn --config gunicorn.conf.py app.app.asgi:application
+fi
 
+echo "Starting gunicorn..."
+exec gunicorn --config gunicorn.conf.py app.wsgi:application